@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from core import AppState, Device
+from simulator import FleetSimulator
+
+# --- Batch Runner ---
+
+# Runs thousands of independent homes headless, each with its own AppState,
+# scenes and daily schedule, driving a FleetSimulator. Homes are split into
+# contiguous shards across a process pool. Workers write straight into .npy
+# files opened as memory maps, one row per home, and only return a count,
+# so nothing bulky is pickled back to the parent.
+#
+# Result directory layout:
+#   power.npy    float32 [homes, steps]  fleet draw of each home per tick (W)
+#   summary.npy  float64 [homes, len(SUMMARY_FIELDS)]
+#   meta.json    run parameters
+
+SUMMARY_FIELDS = ("energy_kwh", "mean_temp", "min_temp", "scenes_applied")
+
+# (seconds after midnight, scene); every home gets its own jitter
+DEFAULT_SCHEDULE = (
+    (7 * 3600, "Home"),
+    (9 * 3600, "Away"),
+    (17 * 3600, "Home"),
+    (23 * 3600, "Night"),
+)
+SCHEDULE_JITTER = 1800
+
+# Scenes written with type selectors so they fit any generated home
+BATCH_SCENES = {
+    "Home": [({"type": "light"}, "ON"), ({"type": "lock"}, "UNLOCKED"), ({"type": "thermostat"}, 21.0)],
+    "Away": [({"type": "light"}, "OFF"), ({"type": "lock"}, "LOCKED"), ({"type": "thermostat"}, 16.0), ({"type": "fan"}, 0)],
+    "Night": [({"type": "light"}, "OFF"), ({"type": "lock"}, "LOCKED"), ({"type": "thermostat"}, 18.0), ({"type": "fan"}, 1)],
+}
+
+ROOM_NAMES = ("Living Room", "Kitchen", "Bedroom", "Office", "Bathroom", "Kids Room")
+
+
+def build_home(home_id, rooms=4):
+    rng = np.random.default_rng(home_id)
+    state = AppState(max_log_entries=1000, demo=False)
+    for r in range(rooms):
+        room = ROOM_NAMES[r] if r < len(ROOM_NAMES) else f"Room {r + 1}"
+        state.add_device(Device(f"light_r{r}", f"{room} Light", "light", "OFF", "Tap to switch the light.", "orange100", room=room))
+        state.add_device(Device(f"thermostat_r{r}", f"{room} Thermostat", "thermostat", round(float(rng.uniform(19, 23)), 1),
+                                "Use slider to change temperature.", "deepOrange50", room=room))
+        if rng.random() < 0.5:
+            state.add_device(Device(f"fan_r{r}", f"{room} Fan", "fan", 0, "0 = OFF, 3 = MAX", "cyan100", room=room))
+    for name, targets in BATCH_SCENES.items():
+        state.scenes.define(name, targets)
+    return state
+
+
+def _home_events(home_id, schedule, seconds):
+    # Absolute (time, scene) events for the whole run, sorted
+    rng = np.random.default_rng(home_id + 1_000_003)
+    events = []
+    for day in range(int(seconds // 86400) + 1):
+        for offset, scene in schedule:
+            at = day * 86400 + offset + rng.integers(-SCHEDULE_JITTER, SCHEDULE_JITTER + 1)
+            if 0 <= at < seconds:
+                events.append((int(at), scene))
+    events.sort()
+    return events
+
+
+def run_home(home_id, power_row, config):
+    # Simulates one home, filling power_row in place; returns its summary
+    state = build_home(home_id, config["rooms"])
+    sim = FleetSimulator.from_state(state, outdoor_temp=config["outdoor_temp"])
+    state.add_listener(sim.on_change)
+    dt = config["dt"]
+    events = _home_events(home_id, config["schedule"], len(power_row) * dt)
+    next_event = 0
+    temp_sum = 0.0
+    temp_min = float("inf")
+    for i in range(len(power_row)):
+        while next_event < len(events) and events[next_event][0] <= sim.time:
+            state.apply_scene(events[next_event][1])
+            next_event += 1
+        sim.step(dt)
+        power_row[i] = sim.total_power()
+        room_mean = float(sim.room_temp.mean())
+        temp_sum += room_mean
+        temp_min = min(temp_min, room_mean)
+    steps = max(1, len(power_row))
+    return (float(sim.energy_wh.sum()) / 1000.0, temp_sum / steps, temp_min, next_event)
+
+
+def _run_shard(out_dir, first, last, config):
+    power = open_memmap(os.path.join(out_dir, "power.npy"), mode="r+")
+    summary = open_memmap(os.path.join(out_dir, "summary.npy"), mode="r+")
+    for home_id in range(first, last):
+        summary[home_id] = run_home(home_id, power[home_id], config)
+    power.flush()
+    summary.flush()
+    return last - first
+
+
+class BatchResult:
+    def __init__(self, out_dir, elapsed=None):
+        self.out_dir = out_dir
+        self.elapsed = elapsed
+        with open(os.path.join(out_dir, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.power = np.load(os.path.join(out_dir, "power.npy"), mmap_mode="r")
+        self.summary = np.load(os.path.join(out_dir, "summary.npy"), mmap_mode="r")
+
+    def column(self, field):
+        return self.summary[:, SUMMARY_FIELDS.index(field)]
+
+    def homes_per_second(self):
+        return self.meta["homes"] / self.elapsed if self.elapsed else None
+
+
+class BatchRunner:
+    def __init__(self, homes, days=1.0, dt=300.0, workers=None, schedule=DEFAULT_SCHEDULE,
+                 rooms=4, outdoor_temp=-2.0, shards_per_worker=4, mp_context=None):
+        self.homes = homes
+        self.days = days
+        self.dt = dt
+        self.workers = workers or os.cpu_count() or 1
+        self.schedule = tuple(schedule)
+        self.rooms = rooms
+        self.outdoor_temp = outdoor_temp
+        # Several shards per worker so one slow shard doesn't idle the rest
+        self.shards_per_worker = shards_per_worker
+        self.mp_context = mp_context
+
+    def shards(self):
+        count = max(1, min(self.homes, self.workers * self.shards_per_worker))
+        edges = np.linspace(0, self.homes, count + 1).astype(int)
+        return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+    def run(self, out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+        steps = int(self.days * 86400 // self.dt)
+        config = {
+            "dt": self.dt,
+            "rooms": self.rooms,
+            "outdoor_temp": self.outdoor_temp,
+            "schedule": self.schedule,
+        }
+        with open(os.path.join(out_dir, "meta.json"), "w") as f:
+            json.dump({"homes": self.homes, "steps": steps, "days": self.days,
+                       "fields": SUMMARY_FIELDS, **config}, f)
+        # Sized up front; workers only ever open them r+
+        open_memmap(os.path.join(out_dir, "power.npy"), mode="w+", dtype=np.float32, shape=(self.homes, steps)).flush()
+        open_memmap(os.path.join(out_dir, "summary.npy"), mode="w+", dtype=np.float64,
+                    shape=(self.homes, len(SUMMARY_FIELDS))).flush()
+
+        start = time.perf_counter()
+        if self.workers == 1:
+            for first, last in self.shards():
+                _run_shard(out_dir, first, last, config)
+        else:
+            with ProcessPoolExecutor(self.workers, mp_context=self.mp_context) as pool:
+                futures = [pool.submit(_run_shard, out_dir, first, last, config) for first, last in self.shards()]
+                for future in as_completed(futures):
+                    future.result()
+        return BatchResult(out_dir, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many homes headless across a process pool.")
+    parser.add_argument("--homes", type=int, default=1000)
+    parser.add_argument("--days", type=float, default=1.0)
+    parser.add_argument("--dt", type=float, default=300.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="batch-results")
+    args = parser.parse_args()
+
+    result = BatchRunner(args.homes, days=args.days, dt=args.dt, workers=args.workers).run(args.out)
+    energy = result.column("energy_kwh")
+    print(f"{args.homes} homes in {result.elapsed:.2f} s ({result.homes_per_second():,.0f} homes/s)")
+    print(f"energy per home: mean {energy.mean():.2f} kWh, max {energy.max():.2f} kWh")
+    print(f"results in {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Batch runner scaling: homes/second as the process pool grows.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_batch_scaling [homes] [days]
+
+import os
+import sys
+import tempfile
+
+from batch import BatchRunner
+
+
+def worker_counts():
+    cpus = os.cpu_count() or 1
+    counts = []
+    n = 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    counts.append(cpus)
+    return counts
+
+
+def main():
+    homes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    days = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    print(f"{homes} homes, {days:g} day(s) at dt=300 s, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'homes/s':>9} {'speedup':>8} {'efficiency':>11}")
+    base = None
+    for workers in worker_counts():
+        with tempfile.TemporaryDirectory() as out_dir:
+            result = BatchRunner(homes, days=days, workers=workers).run(out_dir)
+            rate = result.homes_per_second()
+            del result
+        base = base or rate
+        speedup = rate / base
+        print(f"{workers:>8} {homes / rate:>9.2f} {rate:>9.0f} {speedup:>7.2f}x {speedup / workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
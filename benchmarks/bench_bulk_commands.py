@@ -0,0 +1,69 @@
+# "Turn off every light on floor 3": a loop of per-device toggles (one log
+# entry, journal record and notification each) versus one set_devices()
+# call selecting through the type/tag/state indexes.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_bulk_commands [device_count ...]
+
+import sys
+import tempfile
+import time
+
+from core import AppState, Device
+
+FLOORS = 10
+
+
+def build_state(count, data_dir=None):
+    state = AppState()
+    for i in range(count):
+        tags = (f"floor{i % FLOORS}",)
+        if i % 2:
+            dev = Device(f"light{i}", f"Light {i}", "light", "ON", "Tap to switch the light.", "orange100", tags=tags)
+        else:
+            dev = Device(f"fan{i}", f"Fan {i}", "fan", 2, "0 = OFF, 3 = MAX", "cyan100", tags=tags)
+        state.add_device(dev)
+    if data_dir:
+        state.open_wal(data_dir, fsync=False)
+    notified = []
+    state.add_listener(notified.append)
+    return state, notified
+
+
+def per_device(state):
+    for dev in list(state.devices.values()):
+        if dev.type == "light" and "floor3" in dev.tags and dev.state == "ON":
+            state.toggle_device(dev.id)
+
+
+def bulk(state):
+    state.set_devices({"type": "light", "tag": "floor3"}, "OFF")
+
+
+def bench(count, fn, journal):
+    with tempfile.TemporaryDirectory() as data_dir:
+        state, notified = build_state(count, data_dir if journal else None)
+        state.index.refresh()
+        logs_before = len(state.logs)
+        start = time.perf_counter()
+        fn(state)
+        elapsed = time.perf_counter() - start
+        off = sum(1 for dev in state.devices.values() if dev.type == "light" and dev.state == "OFF")
+        result = elapsed, off, len(state.logs) - logs_before, len(notified)
+        state.close()
+    return result
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'devices':>9} {'journal':>8} {'mode':>10} {'ms':>9} {'switched':>9} {'log rows':>9} {'notifies':>9}")
+    for count in counts:
+        for journal in (False, True):
+            for name, fn in (("per-device", per_device), ("bulk", bulk)):
+                elapsed, off, logged, notifies = bench(count, fn, journal)
+                print(f"{count:>9,} {'wal' if journal else '-':>8} {name:>10} {elapsed * 1e3:>9.2f} {off:>9,} "
+                      f"{logged:>9,} {notifies:>9,}")
+
+
+if __name__ == "__main__":
+    main()
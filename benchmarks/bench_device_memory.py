@@ -0,0 +1,74 @@
+# Memory per device: the original dict-backed Device vs the slotted one.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_device_memory [device_count]
+
+import sys
+import tracemalloc
+
+from core import AppState, Device
+
+
+class LegacyDevice:
+    # Device as it was before __slots__ and string interning
+    def __init__(self, dev_id, name, dev_type, state, details_desc, bg_color):
+        self.id = dev_id
+        self.name = name
+        self.type = dev_type
+        self.state = state
+        self.details_desc = details_desc
+        self.bg_color = bg_color
+
+
+# Per-type fields are built at runtime, like a fleet loaded from config
+FLEET_TYPES = [
+    ("light", "OFF", "Tap to switch the light.", "orange100"),
+    ("lock", "LOCKED", "Tap to lock / unlock the door.", "indigo100"),
+    ("thermostat", 22.0, "Use slider to change temperature.", "deepOrange50"),
+    ("fan", 0, "0 = OFF, 3 = MAX", "cyan100"),
+]
+
+
+def build_fleet(device_cls, count):
+    devices = {}
+    for i in range(count):
+        dev_type, state, desc, color = FLEET_TYPES[i % len(FLEET_TYPES)]
+        dev_id = f"{dev_type}{i}"
+        devices[dev_id] = device_cls(
+            dev_id, f"Device {i}", "".join(dev_type), state, "".join(desc), "".join(color)
+        )
+    return devices
+
+
+def measure(device_cls, count):
+    tracemalloc.start()
+    devices = build_fleet(device_cls, count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del devices
+    return current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    legacy = measure(LegacyDevice, count)
+    slotted = measure(Device, count)
+
+    # Registry operations still work on the compact records
+    state = AppState()
+    for dev in build_fleet(Device, 1000).values():
+        state.add_device(dev)
+    state.toggle_device("light0")
+    state.set_device_value("fan3", 2)
+    assert state.get_device("light0").state == "ON"
+    assert state.get_device("fan3").state == 2
+
+    print(f"devices:          {count}")
+    print(f"legacy Device:    {legacy / 2**20:8.1f} MiB  ({legacy / count:6.1f} B/device)")
+    print(f"slotted Device:   {slotted / 2**20:8.1f} MiB  ({slotted / count:6.1f} B/device)")
+    print(f"reduction:        {100 * (1 - slotted / legacy):8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
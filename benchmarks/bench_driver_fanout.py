@@ -0,0 +1,64 @@
+# Serial vs concurrent device commands against the in-process gateway
+# simulator, and a scene applied through AppState with a driver attached.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_driver_fanout [command_count] [latency_ms]
+
+import sys
+import time
+
+from drivers import DeviceDriver, SimulatorServer
+from core import AppState, Device
+
+
+async def serial(driver, ops):
+    for dev_id, state in ops:
+        await driver.send(dev_id, state)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+
+    server = SimulatorServer(latency=latency)
+    driver = DeviceDriver({"sim": ("127.0.0.1", 0)})
+    driver.start()
+    driver.run(server.start()).result()
+    driver.gateways["sim"] = ("127.0.0.1", server.port)
+
+    ops = [(f"light{i}", "ON" if i % 2 else "OFF") for i in range(count)]
+
+    serial_ops = ops[:max(1, count // 10)]
+    start = time.perf_counter()
+    driver.run(serial(driver, serial_ops)).result()
+    serial_time = (time.perf_counter() - start) / len(serial_ops) * count
+
+    start = time.perf_counter()
+    results = driver.submit(ops).result()
+    concurrent_time = time.perf_counter() - start
+    assert not any(isinstance(r, Exception) for r in results)
+
+    state = AppState()
+    for i in range(count):
+        state.add_device(Device(f"light{i}", f"Light {i}", "light", "OFF", "Tap to switch the light.", "orange100"))
+    state.scenes.define("All on", [({"type": "light"}, "ON")])
+    state.attach_driver(driver)
+    start = time.perf_counter()
+    state.apply_scene("All on")
+    handler_time = time.perf_counter() - start
+    while server.states.get(f"light{count - 1}") != "ON" or driver.sent < 2 * count + len(serial_ops):
+        time.sleep(0.001)
+    scene_time = time.perf_counter() - start
+
+    driver.run(server.stop()).result()
+    driver.stop()
+
+    print(f"commands:              {count} at {latency * 1e3:.1f} ms gateway latency")
+    print(f"serial (extrapolated): {serial_time:8.3f} s")
+    print(f"concurrent fan-out:    {concurrent_time:8.3f} s")
+    print(f"scene apply, handler:  {handler_time * 1e3:8.2f} ms (returns before the I/O)")
+    print(f"scene apply, on wire:  {scene_time:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
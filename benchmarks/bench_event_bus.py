@@ -0,0 +1,67 @@
+# Event bus throughput: one publisher thread sending StateChanged events at
+# a target rate (0 = as fast as it can) to several asyncio consumers on the
+# bus loop, one run per backpressure policy. Reports the rate achieved,
+# what each consumer received, dropped or had coalesced, and how long the
+# consumers took to drain after the last publish.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_event_bus [events] [rate] [subscribers]
+
+import sys
+import time
+
+from events import BLOCK, COALESCE, DROP_OLDEST, EventBus, StateChanged
+
+DEVICES = 1000
+BURST = 1000
+
+
+async def consume(subscription, counts):
+    async for _ in subscription:
+        counts[subscription] = counts.get(subscription, 0) + 1
+
+
+def run(policy, events, rate, subscribers, maxsize):
+    bus = EventBus()
+    loop = bus.start()
+    counts = {}
+    subscriptions = [bus.subscribe(maxsize=maxsize, policy=policy, loop=loop) for _ in range(subscribers)]
+    consumers = [bus.run(consume(subscription, counts)) for subscription in subscriptions]
+    names = [f"dev{i}" for i in range(DEVICES)]
+
+    start = time.perf_counter()
+    for sent in range(0, events, BURST):
+        for i in range(sent, min(sent + BURST, events)):
+            bus.publish(StateChanged(names[i % DEVICES], i - 1, i, 0.0))
+        if rate:
+            ahead = (sent + BURST) / rate - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+    published = time.perf_counter() - start
+
+    # Drained once every buffer is empty
+    while any(len(subscription) for subscription in subscriptions):
+        time.sleep(0.001)
+    drained = time.perf_counter() - start - published
+    stats = [subscription.stats() for subscription in subscriptions]
+    bus.stop()
+    for consumer in consumers:
+        consumer.result()
+    return published, drained, stats, [counts.get(subscription, 0) for subscription in subscriptions]
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    subscribers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    print(f"{events:,} events, target {rate:,.0f}/s, {subscribers} subscribers, buffer 4096")
+    print(f"{'policy':>12} {'published/s':>12} {'drain ms':>9} {'received':>10} {'dropped':>9} {'coalesced':>10} {'blocked':>8}")
+    for policy in (DROP_OLDEST, COALESCE, BLOCK):
+        published, drained, stats, received = run(policy, events, rate, subscribers, 4096)
+        print(f"{policy:>12} {events / published:>12,.0f} {drained * 1e3:>9.1f} {min(received):>10,} "
+              f"{max(s['dropped'] for s in stats):>9,} {max(s['coalesced'] for s in stats):>10,} "
+              f"{max(s['blocked'] for s in stats):>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Load test: one toggle fanned out to N connected overview sessions.
+#
+# Every session is a real ft.Page (over an in-process connection) showing
+# the overview, subscribed to the hub through its DeviceBinder. Latency is
+# measured from the mutation to each session's update leaving for its
+# client. No page loop runs here, so every session's flush happens inline on
+# the hub thread one after another: an upper bound on real fan-out, where
+# flushes run on each session's executor.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_hub_fanout [session_count] [rounds]
+
+import statistics
+import sys
+import time
+
+from benchmarks.fake_page import RecordingConnection, make_page
+from bindings import DeviceBinder
+from hub import StateHub
+from main5 import app_state, create_overview_view
+
+
+class TimedConnection(RecordingConnection):
+    def send_commands(self, session_id, commands):
+        result = super().send_commands(session_id, commands)
+        self.last_sent = time.perf_counter()
+        return result
+
+
+def open_sessions(hub, count):
+    connections = []
+    for i in range(count):
+        page, conn = make_page(TimedConnection)
+        binder = DeviceBinder(page, app_state)
+        page.add(create_overview_view(page, binder))
+        conn.last_sent = 0.0
+        hub.subscribe(f"session{i}", binder.notify)
+        connections.append(conn)
+    return connections
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    hub = StateHub(app_state)
+    connections = open_sessions(hub, count)
+
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        app_state.toggle_device("light1")
+        while any(conn.last_sent < start for conn in connections):
+            time.sleep(0.0005)
+        latencies.extend(conn.last_sent - start for conn in connections)
+
+    # A burst of mutations should reach each session as a handful of deltas
+    deltas_before = hub.deltas_sent
+    for _ in range(200):
+        app_state.toggle_device("door1")
+        app_state.set_device_value("fan1", 3)
+    time.sleep(0.2)
+    burst_deltas = hub.deltas_sent - deltas_before
+
+    latencies.sort()
+    print(f"sessions:            {count}")
+    print(f"fan-out latency p50: {statistics.median(latencies) * 1e3:8.2f} ms (includes {hub.interval * 1e3:.0f} ms coalescing window)")
+    print(f"fan-out latency p99: {latencies[int(len(latencies) * 0.99) - 1] * 1e3:8.2f} ms")
+    print(f"fan-out latency max: {latencies[-1] * 1e3:8.2f} ms")
+    print(f"burst of 400 changes delivered as {burst_deltas} delta(s) per session")
+
+
+if __name__ == "__main__":
+    main()
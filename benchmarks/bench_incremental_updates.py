@@ -0,0 +1,88 @@
+# Full page.update() vs DeviceBinder updates with 1,000 device cards on screen.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_incremental_updates [card_count] [rounds]
+
+import sys
+import time
+
+import flet as ft
+
+from benchmarks.fake_page import make_page
+from bindings import DeviceBinder
+from core import AppState, Device
+from main5 import RENDER_ACTION, RENDER_STATUS
+from presentation import action_text, status_text
+
+
+def build_cards(state, binder):
+    # Same control shape as the overview's on/off cards
+    cards = []
+    texts = {}
+    buttons = {}
+    for dev_id, dev in state.devices.items():
+        txt = ft.Text(status_text(dev), size=12)
+        btn = ft.ElevatedButton(action_text(dev), data=dev_id)
+        texts[dev_id] = txt
+        buttons[dev_id] = btn
+        binder.bind(dev_id, txt, RENDER_STATUS)
+        binder.bind(dev_id, btn, RENDER_ACTION)
+        cards.append(
+            ft.Container(
+                content=ft.Column([
+                    ft.Row([ft.Icon("lightbulb"), ft.Text(dev.name)]),
+                    txt,
+                    ft.Text(dev.details_desc, size=12),
+                    ft.Row([ft.TextButton("Details", data=dev_id), btn]),
+                ]),
+                width=320,
+                shadow=ft.BoxShadow(spread_radius=1, blur_radius=10, color="#1A000000", offset=ft.Offset(0, 4)),
+            )
+        )
+    return cards, texts, buttons
+
+
+def run(card_count, rounds, incremental):
+    state = AppState()
+    state.devices.clear()
+    for i in range(card_count):
+        state.add_device(Device(f"light{i}", f"Light {i}", "light", "OFF", "Tap to switch the light.", "orange100"))
+
+    page, conn = make_page()
+    binder = DeviceBinder(page, state)
+    cards, texts, buttons = build_cards(state, binder)
+    page.add(ft.Row(cards, wrap=True))
+    if incremental:
+        state.add_listener(binder.notify)
+    conn.reset()
+
+    start = time.perf_counter()
+    for r in range(rounds):
+        dev_id = f"light{r % card_count}"
+        state.toggle_device(dev_id)
+        if not incremental:
+            # What the handlers used to do: rewrite every label, then update all
+            for other_id, txt in texts.items():
+                dev = state.get_device(other_id)
+                txt.value = status_text(dev)
+                buttons[other_id].text = action_text(dev)
+            page.update()
+    elapsed = time.perf_counter() - start
+    return elapsed / rounds, conn.bytes_sent / rounds
+
+
+def main():
+    card_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    full_latency, full_bytes = run(card_count, rounds, incremental=False)
+    inc_latency, inc_bytes = run(card_count, rounds, incremental=True)
+
+    print(f"cards on screen:      {card_count}")
+    print(f"full page.update():   {full_latency * 1e3:8.2f} ms/event  {full_bytes:8.0f} B/event")
+    print(f"binder update:        {inc_latency * 1e3:8.2f} ms/event  {inc_bytes:8.0f} B/event")
+    print(f"speed-up:             {full_latency / inc_latency:8.1f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Instrumentation overhead: the toggle handler path (handler, AppState,
+# binder flush, page.update) and an overview build, with metrics on and off.
+# End-to-end differences of a few percent are within this machine's noise,
+# so the cost the sampled handler and page.update wrappers add to one event
+# is also measured directly, on no-op functions, against the event's time.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_instrumentation [events]
+
+import sys
+import time
+from types import SimpleNamespace
+
+import flet as ft
+
+from benchmarks.fake_page import make_page
+from bindings import DeviceBinder
+from instrumentation import instrument_page
+from main5 import app_state, create_overview_view, metrics
+
+
+def find(control, predicate):
+    if predicate(control):
+        return control
+    for child in control._get_children():
+        found = find(child, predicate)
+        if found is not None:
+            return found
+    return None
+
+
+def best_of(fn, repeats=15):
+    # Alternating on/off runs, best of each, so drift hits both equally
+    best = {True: float("inf"), False: float("inf")}
+    for _ in range(repeats):
+        for enabled in (False, True):
+            metrics.enabled = enabled
+            start = time.perf_counter()
+            fn()
+            best[enabled] = min(best[enabled], time.perf_counter() - start)
+    metrics.enabled = True
+    return best[False], best[True]
+
+
+def timeit(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    page, conn = make_page()
+    instrument_page(page, metrics)
+    binder = DeviceBinder(page, app_state)
+    page.add(create_overview_view(page, binder))
+    button = find(page, lambda c: isinstance(c, ft.ElevatedButton) and c.data == "light1")
+    event = SimpleNamespace(control=button)
+
+    def toggles():
+        for _ in range(events):
+            button.on_click(event)
+
+    def builds():
+        for _ in range(20):
+            create_overview_view(page, binder)
+
+    print(f"{'path':>18} {'off':>10} {'on':>10} {'overhead':>9}")
+    for name, fn, per in [("toggle event", toggles, events), ("overview build", builds, 20)]:
+        off, on = best_of(fn)
+        print(f"{name:>18} {off / per * 1e6:>8.1f}us {on / per * 1e6:>8.1f}us {(on - off) / off:>8.1%}")
+    # Both wrappers around a no-op: handler (sampled) and page.update
+    handler = metrics.timed("bench_seconds", sampled=True)(lambda: None)
+    nested = metrics.timed("bench_seconds", sampled=True)(lambda: handler())
+    bare = lambda: (lambda: None)()
+
+    def wrapped():
+        for _ in range(events * 10):
+            nested()
+
+    def unwrapped():
+        for _ in range(events * 10):
+            bare()
+
+    metrics.enabled = True
+    added = min(timeit(wrapped) for _ in range(7)) - min(timeit(unwrapped) for _ in range(7))
+    per_event = added / (events * 10)
+    toggle_off, _ = best_of(toggles)
+    print(f"wrapper cost: {per_event * 1e9:.0f} ns per event, "
+          f"{per_event / (toggle_off / events):.2%} of a toggle event")
+    hist = metrics.histogram("handler_seconds", (("handler", "toggle_click"),))
+    print(f"toggle_click: {hist.count:,} samples, p50 <= {hist.quantile(0.5) * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
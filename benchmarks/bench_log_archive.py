@@ -0,0 +1,79 @@
+# Columnar log archive: streaming export of synthetic months of history,
+# archive size versus the same entries as JSON, and the vectorized
+# per-device-per-hour and top-action queries versus Python loops over the
+# entry dicts.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_log_archive [entries] [days]
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from logarchive import LogArchive, LogArchiveWriter
+
+ACTIONS = ["Set to ON", "Set to OFF", "Set to LOCKED", "Set to UNLOCKED", "Activated Night Scene", "Rule Late arrival light fired"]
+
+
+def synthetic_entries(count, days, devices=500, seed=1):
+    rng = random.Random(seed)
+    start = time.time() - days * 86400
+    step = days * 86400 / count
+    for i in range(count):
+        yield {"time": "", "device": f"dev{rng.randrange(devices)}", "action": rng.choice(ACTIONS),
+               "user": "Automation" if i % 7 == 0 else "User", "ts": start + i * step}
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    days = float(sys.argv[2]) if len(sys.argv) > 2 else 90
+    entries = list(synthetic_entries(count, days))
+
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        writer = LogArchiveWriter(path)
+        writer.extend(entries)
+        writer.close()
+        export = time.perf_counter() - start
+        json_size = sum(len(json.dumps(entry)) + 1 for entry in entries)
+
+        start = time.perf_counter()
+        archive = LogArchive(path)
+        opened = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hours, devices, counts = archive.hourly_counts()
+        hourly = time.perf_counter() - start
+        start = time.perf_counter()
+        top = archive.top_actions(5)
+        top_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loop_hourly = Counter((entry["device"], int(entry["ts"] // 3600)) for entry in entries)
+        loop_hourly_time = time.perf_counter() - start
+        start = time.perf_counter()
+        loop_top = Counter(entry["action"] for entry in entries).most_common(5)
+        loop_top_time = time.perf_counter() - start
+
+        assert counts.sum() == sum(loop_hourly.values())
+        assert top == loop_top, (top, loop_top)
+
+        print(f"entries: {count:,} over {days:g} days, {len(devices)} devices, {len(hours):,} hours")
+        print(f"export:        {export:8.2f} s   ({count / export:,.0f} rows/s)")
+        print(f"archive size:  {dir_size(path) / 1e6:8.1f} MB  (JSON lines {json_size / 1e6:.1f} MB)")
+        print(f"open (mmap):   {opened * 1e3:8.2f} ms")
+        print(f"{'query':>22} {'columnar ms':>12} {'dict loop ms':>13}")
+        print(f"{'per device per hour':>22} {hourly * 1e3:>12.1f} {loop_hourly_time * 1e3:>13.1f}")
+        print(f"{'top actions':>22} {top_time * 1e3:>12.1f} {loop_top_time * 1e3:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
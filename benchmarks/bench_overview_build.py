@@ -0,0 +1,88 @@
+# Overview with 2,000 device cards: building it, and navigating back to it
+# with a rebuild per navigation (how route_change used to work) versus the
+# session's cached view.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_overview_build [card_count] [rounds]
+
+import statistics
+import sys
+import time
+
+import flet as ft
+
+from benchmarks.fake_page import make_page, navigate
+from bindings import DeviceBinder
+from core import Device
+from main5 import app_state, build_header, create_overview_view, main as app_main
+
+KINDS = [
+    ("light", "OFF", "orange100"),
+    ("lock", "LOCKED", "indigo100"),
+    ("thermostat", 21.0, "deepOrange50"),
+    ("fan", 0, "cyan100"),
+]
+
+
+def add_devices(count):
+    for i in range(len(app_state.devices), count):
+        dev_type, state, color = KINDS[i % len(KINDS)]
+        app_state.add_device(Device(f"{dev_type}{i}", f"{dev_type.title()} {i}", dev_type, state, "Bench device", color,
+                                    room=f"Room {i // 8}"))
+
+
+def timed(fn, rounds):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    add_devices(count)
+
+    page, conn = make_page()
+    binder = DeviceBinder(page, app_state)
+    build = timed(lambda: create_overview_view(page, binder), rounds)
+
+    # Before: every navigation back to "/" cleared the views and rebuilt
+    # the overview from scratch
+    def rebuild_navigation():
+        page.views.clear()
+        page.views.append(ft.View("/", [build_header(page), create_overview_view(page, binder)]))
+        page.update()
+
+    rebuild_navigation()
+    conn.reset()
+    rebuild = timed(rebuild_navigation, rounds)
+    rebuild_bytes = conn.bytes_sent / rounds
+
+    # After: the real app, going to a details page and back
+    page, conn = make_page()
+    app_main(page)
+    navigate(page, "/")
+    first_id = next(iter(app_state.devices))
+
+    def cached_navigation():
+        navigate(page, f"/details/{first_id}")
+        conn.reset()
+        start = time.perf_counter()
+        navigate(page, "/")
+        return time.perf_counter() - start, conn.bytes_sent
+
+    samples = [cached_navigation() for _ in range(rounds)]
+    cached = statistics.median(t for t, _ in samples)
+    cached_bytes = statistics.median(b for _, b in samples)
+
+    print(f"cards: {count:,}")
+    print(f"build overview controls:      {build * 1e3:9.1f} ms")
+    print(f"back to /, rebuilt:           {rebuild * 1e3:9.1f} ms {rebuild_bytes:>12,.0f} B")
+    print(f"back to /, cached view:       {cached * 1e3:9.1f} ms {cached_bytes:>12,.0f} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Chart queries over a year of per-second power samples.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_power_chart [days]
+
+import sys
+import time
+
+import numpy as np
+
+from timeseries import Series
+
+SPANS = [("1 hour", 3600), ("1 day", 86400), ("1 week", 7 * 86400), ("30 days", 30 * 86400), ("1 year", 365 * 86400)]
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    count = days * 86400
+    start_ts = 1_700_000_000.0
+
+    rng = np.random.default_rng(0)
+    ts = start_ts + np.arange(count, dtype=np.float64)
+    daily = 300 + 200 * np.sin(np.arange(count) * (2 * np.pi / 86400))
+    values = (daily + rng.normal(0, 20, count)).astype(np.float32)
+
+    series = Series()
+    start = time.perf_counter()
+    series.extend(ts, values)
+    load = time.perf_counter() - start
+
+    print(f"samples:  {count:,} ({days} days at 1 Hz), loaded in {load:.2f} s")
+    print(f"{'span':>10} {'points':>8} {'lttb ms':>9} {'minmax ms':>10}")
+    end_ts = ts[-1]
+    for name, span in SPANS:
+        if span > count:
+            continue
+        start = time.perf_counter()
+        x, _ = series.query(end_ts - span, end_ts, max_points=300)
+        lttb_time = time.perf_counter() - start
+        start = time.perf_counter()
+        series.query(end_ts - span, end_ts, max_points=300, method="minmax")
+        minmax_time = time.perf_counter() - start
+        print(f"{name:>10} {len(x):>8} {lttb_time * 1e3:>9.2f} {minmax_time * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Rule engine throughput: device mutations per second with 50k rules,
+# indexed trigger lookup versus scanning every rule on each change.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_rules [rule_count] [mutations]
+
+import random
+import sys
+import time
+
+from core import AppState, Device
+from rules import RuleEngine
+
+SENSORS = 10_000
+ACTUATORS = 1_000
+
+
+class ScanningRuleEngine(RuleEngine):
+    # Baseline: every change checks every rule's trigger device
+    def candidates(self, dev):
+        return [rule for rule in self.rules.values() if rule.device == dev.id]
+
+
+def build(engine_class, rule_count, seed=0):
+    rng = random.Random(seed)
+    state = AppState()
+    for i in range(SENSORS):
+        state.add_device(Device(f"sensor{i}", f"Sensor {i}", "light", "OFF", "Bench sensor", "orange100"))
+    for i in range(ACTUATORS):
+        state.add_device(Device(f"actuator{i}", f"Actuator {i}", "light", "OFF", "Bench actuator", "orange100"))
+    engine = None
+    if engine_class is not None:
+        # Actuators are never watched, so every cascade is one level deep
+        rules = [
+            {
+                "name": f"rule{i}",
+                "when": {"device": f"sensor{rng.randrange(SENSORS)}", "state": rng.choice(["ON", "OFF"])},
+                "then": [({"id": f"actuator{rng.randrange(ACTUATORS)}"}, rng.choice(["ON", "OFF"]))],
+            }
+            for i in range(rule_count)
+        ]
+        engine = engine_class(state, rules=rules, max_rate=None)
+        state.add_listener(engine.on_change)
+    return state, engine
+
+
+def mutations_per_second(state, mutations, seed=1):
+    rng = random.Random(seed)
+    targets = [f"sensor{rng.randrange(SENSORS)}" for _ in range(mutations)]
+    start = time.perf_counter()
+    for dev_id in targets:
+        state.toggle_device(dev_id)
+    return mutations / (time.perf_counter() - start)
+
+
+def main():
+    rule_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    mutations = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+
+    print(f"{rule_count:,} rules over {SENSORS:,} watched devices")
+    print(f"{'engine':>10} {'mutations/s':>12} {'rules fired':>12} {'rules checked':>14}")
+    for name, engine_class, count in [
+        ("none", None, mutations),
+        ("indexed", RuleEngine, mutations),
+        ("scan", ScanningRuleEngine, max(1, mutations // 100)),
+    ]:
+        start = time.perf_counter()
+        state, engine = build(engine_class, rule_count)
+        setup = time.perf_counter() - start
+        rate = mutations_per_second(state, count)
+        fired = engine.fired if engine else 0
+        checked = engine.evaluated if engine else 0
+        print(f"{name:>10} {rate:>12,.0f} {fired:>12,} {checked:>14,}   (setup {setup:.2f} s, {count:,} mutations)")
+
+
+if __name__ == "__main__":
+    main()
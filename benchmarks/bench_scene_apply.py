@@ -0,0 +1,66 @@
+# Scene compile and apply latency for scenes that touch large fleets.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_scene_apply [device_count ...]
+
+import sys
+import time
+
+from core import AppState, Device
+
+ROOMS = ["Living Room", "Kitchen", "Bedroom", "Hallway", "Office"]
+
+
+def build_state(count):
+    state = AppState()
+    for i in range(count):
+        room = ROOMS[i % len(ROOMS)]
+        tags = ("floor%d" % (i % 10),)
+        if i % 2:
+            dev = Device(f"light{i}", f"Light {i}", "light", "OFF", "Tap to switch the light.", "orange100", room=room, tags=tags)
+        else:
+            dev = Device(f"fan{i}", f"Fan {i}", "fan", 0, "0 = OFF, 3 = MAX", "cyan100", room=room, tags=tags)
+        state.add_device(dev)
+    state.scenes.define("Evening", [
+        ({"type": "light"}, "ON"),
+        ({"type": "light", "room": "Bedroom"}, "OFF"),
+        ({"type": "fan", "tag": ["floor1", "floor2"]}, 2),
+    ])
+    state.scenes.define("Off", [
+        ({"type": "light"}, "OFF"),
+        ({"type": "fan"}, 0),
+    ])
+    return state
+
+
+def bench(count, rounds=5):
+    state = build_state(count)
+    notified = []
+    state.add_listener(notified.append)
+
+    start = time.perf_counter()
+    state.scenes.compile("Evening", state.devices, state.devices_version)
+    state.scenes.compile("Off", state.devices, state.devices_version)
+    compile_time = time.perf_counter() - start
+
+    changed = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        changed += len(state.apply_scene("Evening"))
+        changed += len(state.apply_scene("Off"))
+    apply_time = (time.perf_counter() - start) / (2 * rounds)
+
+    assert len(notified) == 2 * rounds
+    return compile_time, apply_time, changed / (2 * rounds)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    print(f"{'devices':>10} {'compile ms':>12} {'apply ms':>10} {'changed':>10}")
+    for count in counts:
+        compile_time, apply_time, changed = bench(count)
+        print(f"{count:>10} {compile_time * 1e3:>12.2f} {apply_time * 1e3:>10.2f} {changed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
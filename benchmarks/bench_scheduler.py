@@ -0,0 +1,61 @@
+# Scheduler cost per operation with many pending jobs: insert, cancel and
+# firing, on a simulated clock.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_scheduler [job_count]
+
+import random
+import sys
+import time
+
+from core import AppState, Device
+from scheduler import Scheduler
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(0)
+    state = AppState()
+    for i in range(1000):
+        state.add_device(Device(f"light{i}", f"Light {i}", "light", "OFF", "Bench light", "orange100"))
+
+    now = [1_700_000_000.0]
+    scheduler = Scheduler(state, clock=lambda: now[0])
+    day = 86400.0
+    specs = []
+    for i in range(count):
+        action = {"toggle": f"light{rng.randrange(1000)}"}
+        kind = rng.random()
+        if kind < 0.6:
+            specs.append((action, {"at": now[0] + rng.uniform(0, day)}))
+        elif kind < 0.9:
+            specs.append((action, {"every": rng.choice([300.0, 900.0, 3600.0])}))
+        else:
+            specs.append((action, {"cron": f"{rng.randrange(60)} {rng.randrange(24)} * * *"}))
+
+    start = time.perf_counter()
+    ids = [scheduler.schedule(action, **when) for action, when in specs]
+    insert = (time.perf_counter() - start) / count
+
+    cancel_ids = rng.sample(ids, count // 2)
+    start = time.perf_counter()
+    for job_id in cancel_ids:
+        scheduler.cancel(job_id)
+    cancel = (time.perf_counter() - start) / len(cancel_ids)
+
+    # One simulated day in one-minute ticks
+    start = time.perf_counter()
+    fired = 0
+    for _ in range(24 * 60):
+        now[0] += 60
+        fired += scheduler.run_pending()
+    elapsed = time.perf_counter() - start
+
+    print(f"jobs:     {count:,} scheduled, {len(cancel_ids):,} cancelled, {len(scheduler):,} left")
+    print(f"insert:   {insert * 1e6:6.2f} us/job")
+    print(f"cancel:   {cancel * 1e6:6.2f} us/job")
+    print(f"one day:  {fired:,} runs in {elapsed:.2f} s ({elapsed / max(fired, 1) * 1e6:.1f} us/run incl. toggle)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Simulator throughput: ticks/second by fleet size, and a simulated year.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_simulator [device_count ...]
+
+import sys
+import time
+
+from simulator import FleetSimulator
+from timeseries import Series
+
+
+def ticks_per_second(device_count, min_time=1.0):
+    sim = FleetSimulator.synthetic(device_count)
+    ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        sim.step(1.0)
+        ticks += 1
+    return ticks / (time.perf_counter() - start)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'devices':>10} {'ticks/s':>10} {'device-ticks/s':>16}")
+    for count in counts:
+        rate = ticks_per_second(count)
+        print(f"{count:>10} {rate:>10.0f} {rate * count:>16.3g}")
+
+    sim = FleetSimulator.synthetic(10_000)
+    series = Series()
+    start = time.perf_counter()
+    steps = sim.run(365 * 86400, dt=300.0, series=series)
+    elapsed = time.perf_counter() - start
+    print(f"1 simulated year, 10k devices, dt=300 s: {steps} ticks in {elapsed:.2f} s "
+          f"({365 * 86400 / elapsed:,.0f}x real time), {sim.energy_wh.sum() / 1e6:,.1f} MWh")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Cold start: fresh interpreter importing each entry point, plus one full
+# headless command against a fresh data directory.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_startup [runs]
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    ("python (no imports)", ["-c", "pass"]),
+    ("import core", ["-c", "import core"]),
+    ("import headless", ["-c", "import headless"]),
+    ("import flet", ["-c", "import flet"]),
+    ("import main5 (UI)", ["-c", "import main5"]),
+]
+
+
+def cold_start(args, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), min(times)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"{'target':>24} {'median ms':>10} {'min ms':>8}")
+    for name, args in TARGETS:
+        median, best = cold_start(args, runs)
+        print(f"{name:>24} {median * 1e3:>10.1f} {best * 1e3:>8.1f}")
+    with tempfile.TemporaryDirectory() as data_dir:
+        median, best = cold_start(["headless.py", "--data", data_dir, "toggle", "light1"], runs)
+        print(f"{'headless toggle':>24} {median * 1e3:>10.1f} {best * 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# System Status providers: overview build time with the status cache fresh
+# versus every provider stale behind a slow fetch (the build must not wait
+# for it), then stale-while-revalidate under a steady stream of reads: read
+# latency, how many reads were served stale, and how long values stayed
+# stale before the background fetch replaced them.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_status_providers [fetch_delay] [ttl] [seconds]
+
+import statistics
+import sys
+import time
+
+import main5
+from benchmarks.fake_page import make_page
+from bindings import DeviceBinder
+from status import StatusBoard, StubProvider
+
+NAMES = ("weather", "network", "security")
+
+
+def stub_board(delay, ttl):
+    return StatusBoard([
+        StubProvider(name, [(f"{name} A", True), (f"{name} B", False)], delay=delay, interval=ttl, ttl=ttl)
+        for name in NAMES
+    ])
+
+
+def build_time(page, binder, rounds=20):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        main5.create_overview_view(page, binder)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    ttl = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 3.0
+    page, _ = make_page()
+    binder = DeviceBinder(page, main5.app_state)
+
+    # Overview build: cache fresh versus stale with `delay`-second fetches
+    board = main5.status_board = stub_board(delay, 3600)
+    for name in NAMES:
+        board.refresh(name).result()
+    fresh = build_time(page, binder)
+    for provider in board.providers.values():
+        provider.ttl = 0
+    stale = build_time(page, binder)
+    board.stop()
+    print(f"overview build, status fresh:         {fresh * 1e3:8.2f} ms")
+    print(f"overview build, status stale ({delay:g} s): {stale * 1e3:8.2f} ms")
+
+    # Stale-while-revalidate: one reader polling every provider for `seconds`
+    board = stub_board(delay, ttl)
+    for name in NAMES:
+        board.refresh(name).result()
+    latencies = []
+    stale_since = {}
+    stale_spans = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        for name in NAMES:
+            provider = board.providers[name]
+            start = time.perf_counter()
+            board.read(name)
+            latencies.append(time.perf_counter() - start)
+            if provider.stale():
+                stale_since.setdefault(name, start)
+            elif name in stale_since:
+                stale_spans.append(start - stale_since.pop(name))
+        time.sleep(0.0005)
+    stats = board.stats()
+    board.stop()
+    latencies.sort()
+    fetches = sum(p["fetches"] for p in stats["providers"].values())
+    print(f"SWR, fetch {delay:g} s, ttl {ttl:g} s, {seconds:g} s of reads")
+    print(f"  reads:        {stats['reads']:>9,}  ({stats['stale_reads']:,} served stale, "
+          f"{stats['stale_reads'] / stats['reads']:.0%})")
+    print(f"  fetches:      {fetches:>9,}")
+    print(f"  read latency: p50 {latencies[len(latencies) // 2] * 1e6:.1f} us, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.1f} us, max {latencies[-1] * 1e6:.1f} us")
+    if stale_spans:
+        print(f"  stale spans:  median {statistics.median(stale_spans) * 1e3:.0f} ms, "
+              f"max {max(stale_spans) * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
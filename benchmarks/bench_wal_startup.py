@@ -0,0 +1,46 @@
+# Startup (snapshot + WAL tail replay) time after N logged events.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_wal_startup [event_count]
+
+import sys
+import tempfile
+import time
+
+from core import AppState
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        state = AppState()
+        state.open_wal(data_dir)
+        start = time.perf_counter()
+        for i in range(count):
+            if i % 2:
+                state.toggle_device("light1")
+            else:
+                state.set_device_value("fan1", i % 4)
+        enqueue = time.perf_counter() - start
+        state.close()
+        written = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restored = AppState()
+        restored.open_wal(data_dir)
+        startup = time.perf_counter() - start
+        restored.close()
+
+        assert restored.get_device("light1").state == state.get_device("light1").state
+        assert restored.get_device("fan1").state == state.get_device("fan1").state
+        assert len(restored.logs) == len(state.logs)
+
+    print(f"events:            {count}")
+    print(f"mutation calls:    {enqueue:8.3f} s  ({enqueue / count * 1e6:.2f} us/event on the caller)")
+    print(f"durable on disk:   {written:8.3f} s")
+    print(f"startup + replay:  {startup:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
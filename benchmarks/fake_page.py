@@ -0,0 +1,60 @@
+# A real ft.Page wired to an in-process connection instead of a websocket.
+# Every batch of commands is serialised exactly as it would be sent to the
+# client so benchmarks can count messages and bytes on the wire.
+
+import asyncio
+import json
+
+import flet as ft
+from flet.core.local_connection import LocalConnection
+from flet.core.protocol import (
+    ClientActions,
+    ClientMessage,
+    CommandEncoder,
+    PageCommandsBatchResponsePayload,
+)
+
+
+class RecordingConnection(LocalConnection):
+    def __init__(self):
+        super().__init__()
+        self.messages = 0
+        self.bytes_sent = 0
+
+    def reset(self):
+        self.messages = 0
+        self.bytes_sent = 0
+
+    def send_commands(self, session_id, commands):
+        results = []
+        messages = []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ["add", "get"]:
+                results.append(result)
+            if message:
+                messages.append(message)
+        if messages:
+            payload = json.dumps(
+                ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages),
+                cls=CommandEncoder,
+                separators=(",", ":"),
+            )
+            self.messages += 1
+            self.bytes_sent += len(payload)
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+
+def make_page(connection_class=RecordingConnection):
+    conn = connection_class()
+    conn.page_url = "http://localhost"
+    page = ft.Page(conn, "bench", loop=asyncio.new_event_loop())
+    page.route = "/"
+    return page, conn
+
+
+def navigate(page, route):
+    # page.go() dispatches route_change on the page loop, which never runs
+    # here; call the handler inline instead
+    page.route = route
+    page.on_route_change(None)
@@ -0,0 +1,275 @@
+# Benchmark suite: AppState operations and view builds under a synthetic
+# fleet and action log, written as JSON and compared against a baseline.
+#
+# The fleet and the log are generated from a seed, so two runs with the
+# same arguments measure the same data. Each case reports the median, best
+# and p90 time per operation over `repeats` runs; the number of calls per
+# run is picked so a run takes at least --min-time. Cases whose best time
+# is more than --threshold slower than the baseline (benchmarks/baseline.json,
+# committed; --baseline for another) are flagged and the exit status is 1.
+# Timings are machine-specific: after moving to other hardware, save a new
+# baseline there before comparing.
+#
+# The view cases run main5 offline: stub status providers and camera stills
+# with no pipeline thread, so no timing depends on the network or on
+# background work.
+#
+# Run from the repository root:
+#   python -m benchmarks.suite [--devices N] [--logs M] [--out PATH]
+#   python -m benchmarks.suite --save-baseline
+#   python -m benchmarks.suite --baseline other.json
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import flet as ft
+
+from benchmarks.fake_page import make_page, navigate
+from core import AppState, Device
+from status import StatusBoard, StubProvider
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+KINDS = [
+    ("light", "OFF", "Tap to switch the light.", "orange100"),
+    ("lock", "LOCKED", "Tap to lock / unlock the door.", "indigo100"),
+    ("thermostat", 21.0, "Use slider to change temperature.", "deepOrange50"),
+    ("fan", 0, "0 = OFF, 3 = MAX", "cyan100"),
+]
+ROOMS = ["Living Room", "Kitchen", "Bedroom", "Hallway", "Office", "Garage", "Basement", "Attic"]
+ACTIONS = ["Set to ON", "Set to OFF", "Set to LOCKED", "Set to UNLOCKED", "Activated Evening Scene"]
+SCENES = {
+    "Evening": [({"type": "light"}, "ON"), ({"type": "light", "room": "Bedroom"}, "OFF"), ({"type": "fan"}, 2)],
+    "Off": [({"type": "light"}, "OFF"), ({"type": "fan"}, 0)],
+}
+
+
+# --- Synthetic Load ---
+
+def populate(state, devices, logs, seed):
+    # Adds `devices` devices (on top of the defaults) and `logs` log entries
+    rng = random.Random(seed)
+    for i in range(devices):
+        dev_type, value, desc, color = KINDS[i % len(KINDS)]
+        state.add_device(Device(f"{dev_type}{i}", f"{dev_type.title()} {i}", dev_type, value, desc, color,
+                                room=ROOMS[rng.randrange(len(ROOMS))], tags=(f"floor{i % 4}",)))
+    for name, targets in SCENES.items():
+        state.scenes.define(name, targets)
+    state.logs.max_entries = max(state.logs.max_entries, logs + len(state.logs))
+    ids = list(state.devices)
+    # Evenly spaced over one day, so time filters cut the log predictably
+    for i in range(logs):
+        seconds = i * 86400 // max(logs, 1)
+        stamp = f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        state.logs.append({"time": stamp, "device": rng.choice(ids), "action": rng.choice(ACTIONS), "user": "User"})
+    return state
+
+
+def ids_of(state, dev_type):
+    return [dev.id for dev in state.devices.values() if dev.type == dev_type]
+
+
+# --- Cases ---
+
+def core_cases(state):
+    lights = itertools.cycle(ids_of(state, "light"))
+    thermostats = itertools.cycle(ids_of(state, "thermostat"))
+    temperatures = itertools.cycle([18.0, 19.5, 21.0, 22.5])
+    scenes = itertools.cycle(SCENES)
+    devices = itertools.cycle(state.logs.devices())
+    # Reads first: the mutating cases append to the log they filter
+    return [
+        # Details view history, then the statistics table's filters
+        ("logs_for_device", lambda: state.logs.for_device(next(devices))),
+        ("logs_query_action", lambda: state.logs.query(action="unlocked")),
+        ("logs_query_device_window", lambda: state.logs.query(device=next(devices), since="06:00:00", until="18:00:00")),
+        ("logs_query_sorted", lambda: state.logs.query(sort_by="device", descending=False)),
+        ("toggle_device", lambda: state.toggle_device(next(lights))),
+        ("set_device_value", lambda: state.set_device_value(next(thermostats), next(temperatures))),
+        ("log_action", lambda: state.log_action("light1", "Set to ON")),
+        ("apply_scene", lambda: state.apply_scene(next(scenes))),
+    ]
+
+
+def offline(main5):
+    # Canned status values, already fetched, and the cameras' first frames
+    # without the pipeline thread that would keep polling their sources
+    main5.status_board = StatusBoard([
+        StubProvider(name, [(f"{name}: ok", True)], interval=None) for name in ("weather", "network", "security")
+    ])
+    for name in main5.status_board.providers:
+        main5.status_board.refresh(name).result()
+    main5.camera_pipeline.poll()
+    main5.camera_pipeline.start = lambda: None
+
+
+def view_cases():
+    # Views read main5's module-level state, populated by the caller
+    from bindings import DeviceBinder
+    from main5 import app_state, create_details_view, create_overview_view, create_statistics_view, main as app_main
+
+    page, _ = make_page()
+    binder = DeviceBinder(page, app_state)
+    busiest = max(app_state.logs.devices(), key=lambda dev_id: len(app_state.logs.for_device(dev_id)))
+
+    # Route changes through the real app, header and page.update included
+    app_page, _ = make_page()
+    app_main(app_page)
+    navigate(app_page, "/")
+
+    def back_to_overview():
+        navigate(app_page, f"/details/{busiest}")
+        navigate(app_page, "/")
+
+    return [
+        ("view_overview", lambda: create_overview_view(page, binder)),
+        ("view_statistics", lambda: create_statistics_view(page)),
+        ("view_details", lambda: create_details_view(page, busiest)),
+        ("route_stats", lambda: navigate(app_page, "/stats")),
+        ("route_details", lambda: navigate(app_page, f"/details/{busiest}")),
+        ("route_details_and_back", back_to_overview),
+    ]
+
+
+# --- Measurement ---
+
+def calibrate(fn, min_time):
+    # Calls per run so one run takes at least `min_time` seconds
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time or number >= 1 << 20:
+            return number
+        number *= 2
+
+
+def measure(fn, repeats, min_time):
+    number = calibrate(fn, min_time)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    times.sort()
+    return {
+        "median_us": statistics.median(times) * 1e6,
+        "best_us": times[0] * 1e6,
+        "p90_us": times[min(len(times) - 1, int(len(times) * 0.9))] * 1e6,
+        "number": number,
+        "repeats": repeats,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "flet": ft.version.version,
+    }
+
+
+def run(args):
+    cases = core_cases(populate(AppState(), args.devices, args.logs, args.seed))
+    if not args.no_views:
+        # Before main5 is imported, so it never builds the network providers
+        os.environ["SMARTHOME_OFFLINE"] = "1"
+        import main5
+        offline(main5)
+        populate(main5.app_state, args.devices, args.logs, args.seed)
+        cases += view_cases()
+    results = {}
+    for name, fn in cases:
+        if args.only and not any(pattern in name for pattern in args.only):
+            continue
+        results[name] = measure(fn, args.repeats, args.min_time)
+        print(f"{name:<26} {results[name]['median_us']:>12.1f} us  (best {results[name]['best_us']:.1f}, "
+              f"{results[name]['number']} x {args.repeats})", flush=True)
+    return {
+        "params": {"devices": args.devices, "logs": args.logs, "seed": args.seed},
+        "env": environment(),
+        "results": results,
+    }
+
+
+# --- Baseline Comparison ---
+
+def compare(report, baseline, threshold):
+    # Prints current vs baseline best times, which are far less noisy than
+    # medians on a shared machine; returns the regressed case names
+    if baseline["params"] != report["params"]:
+        print(f"warning: baseline was run with {baseline['params']}, this run with {report['params']}")
+    print(f"\n{'case':<26} {'baseline us':>12} {'now us':>12} {'change':>8}")
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<26} {'-':>12} {result['best_us']:>12.1f} {'new':>8}")
+            continue
+        change = result["best_us"] / before["best_us"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<26} {before['best_us']:>12.1f} {result['best_us']:>12.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Smart home benchmark suite")
+    parser.add_argument("--devices", type=int, default=2000, help="synthetic devices added to the defaults")
+    parser.add_argument("--logs", type=int, default=100_000, help="synthetic log entries")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timed run")
+    parser.add_argument("--only", nargs="*", help="run cases whose name contains one of these")
+    parser.add_argument("--no-views", action="store_true", help="skip the Flet view cases")
+    parser.add_argument("--out", default="data/bench/latest.json")
+    parser.add_argument("--baseline", default=BASELINE, help="compare against this report")
+    parser.add_argument("--threshold", type=float, default=0.15, help="slowdown that counts as a regression")
+    parser.add_argument("--save-baseline", metavar="PATH", nargs="?", const=BASELINE,
+                        help=f"also write this run as the baseline (default {os.path.relpath(BASELINE)})")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    write_json(args.out, report)
+    if args.save_baseline:
+        write_json(args.save_baseline, report)
+    elif not os.path.exists(args.baseline):
+        print(f"\nno baseline at {args.baseline}; --save-baseline writes one")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import threading
+
+# --- Device → Control Bindings ---
+
+# A DeviceBinder belongs to one page. Views bind controls to device ids
+# together with a render function `render(control, dev)` that copies the
+# device state onto the control and returns True if anything changed.
+# The binder is notified of changed device ids (by the session hub, or by
+# AppState directly in single-session setups); it only marks them dirty and
+# schedules a flush on the page's next event loop tick, so every change
+# made while handling one event goes out in a single
+# `page.update(*controls)` that contains just the controls that changed.
+#
+# Views bind on the session's thread while the hub flushes on another, so
+# the binding maps are only touched under the binder's lock; flush() copies
+# the bindings it needs and renders outside it.
+
+
+class DeviceBinder:
+    def __init__(self, page, state):
+        self.page = page
+        self.state = state
+        self._bindings = {}
+        self._dirty = set()
+        self._flush_scheduled = False
+        self._lock = threading.Lock()
+
+    def bind(self, dev_id, control, render):
+        with self._lock:
+            self._bindings.setdefault(dev_id, []).append((control, render))
+        return control
+
+    def unbind(self, dev_ids):
+        with self._lock:
+            for dev_id in dev_ids:
+                self._bindings.pop(dev_id, None)
+                self._dirty.discard(dev_id)
+
+    def clear(self):
+        with self._lock:
+            self._bindings.clear()
+            self._dirty.clear()
+
+    def notify(self, dev_ids):
+        with self._lock:
+            for dev_id in dev_ids:
+                if dev_id in self._bindings:
+                    self._dirty.add(dev_id)
+            if not self._dirty or self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        loop = getattr(self.page, "loop", None)
+        if loop is not None and loop.is_running():
+            self.page.run_thread(self.flush)
+        else:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            self._flush_scheduled = False
+            targets = [(dev_id, tuple(self._bindings.get(dev_id, ()))) for dev_id in dirty]
+        changed = []
+        for dev_id, bindings in targets:
+            dev = self.state.get_device(dev_id)
+            if dev is None:
+                continue
+            for control, render in bindings:
+                if render(control, dev):
+                    changed.append(control)
+        if changed:
+            self.page.update(*changed)
+        return changed
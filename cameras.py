@@ -0,0 +1,246 @@
+import base64
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Without Pillow frames are sent as captured and the client scales them
+    Image = None
+
+# --- Camera Pipeline ---
+
+# Frames are pulled from every camera's source on one background thread at
+# a capped rate, whether or not any session is looking at that camera, so
+# switching cameras shows a warm frame immediately. Each new frame is
+# downscaled once to the card size and base64-encoded once; the result is
+# kept in a per-camera LRU keyed by a digest of the raw frame, so looping
+# sources and repeated stills never get re-encoded. A frame whose digest
+# equals the camera's current one is not pushed to subscribers.
+
+CARD_SIZE = (300, 200)
+JPEG_QUALITY = 80
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+class FileSequenceSource:
+    # Image files of a directory in name order, or a single still, looping
+    def __init__(self, path, loop=True):
+        if os.path.isdir(path):
+            self.files = sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            self.files = [path] if os.path.isfile(path) else []
+        self.loop = loop
+        self.position = 0
+
+    def read(self):
+        # Raw bytes of the next frame, or None when there is none
+        if not self.files or (not self.loop and self.position >= len(self.files)):
+            return None
+        path = self.files[self.position % len(self.files)]
+        self.position += 1
+        with open(path, "rb") as f:
+            return f.read()
+
+
+class MjpegSource:
+    # Local MJPEG stand-in: a file of back-to-back JPEG frames, each running
+    # from an SOI marker to the following EOI marker
+    SOI = b"\xff\xd8"
+    EOI = b"\xff\xd9"
+
+    def __init__(self, path, loop=True, chunk_size=64 * 1024):
+        self.path = path
+        self.loop = loop
+        self.chunk_size = chunk_size
+        self._file = None
+        self._buffer = b""
+
+    def read(self):
+        if self._file is None:
+            if not os.path.isfile(self.path):
+                return None
+            self._file = open(self.path, "rb")
+        rewound = False
+        while True:
+            start = self._buffer.find(self.SOI)
+            if start >= 0:
+                end = self._buffer.find(self.EOI, start + 2)
+                if end >= 0:
+                    frame = self._buffer[start:end + 2]
+                    self._buffer = self._buffer[end + 2:]
+                    return frame
+            chunk = self._file.read(self.chunk_size)
+            if chunk:
+                self._buffer += chunk
+                continue
+            if not self.loop or rewound:
+                return None
+            # End of the stream: start over, dropping any partial frame
+            self._file.seek(0)
+            self._buffer = b""
+            rewound = True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def open_source(path):
+    if path.lower().endswith((".mjpg", ".mjpeg")):
+        return MjpegSource(path)
+    return FileSequenceSource(path)
+
+
+def first_source(*paths):
+    # Source for the first path that exists, or None
+    for path in paths:
+        if os.path.exists(path):
+            return open_source(path)
+    return None
+
+
+def downscale(raw, size=CARD_SIZE, quality=JPEG_QUALITY):
+    # Crops to the card's aspect ratio and scales to exactly `size` as JPEG
+    if Image is None:
+        return raw
+    with Image.open(io.BytesIO(raw)) as img:
+        fitted = ImageOps.fit(img.convert("RGB"), size)
+    out = io.BytesIO()
+    fitted.save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+
+class FrameCache:
+    # LRU of digest -> base64 frame
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self._frames = OrderedDict()
+
+    def get(self, key):
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+        return frame
+
+    def put(self, key, frame):
+        self._frames[key] = frame
+        self._frames.move_to_end(key)
+        if len(self._frames) > self.capacity:
+            self._frames.popitem(last=False)
+
+    def __len__(self):
+        return len(self._frames)
+
+
+class Camera:
+    def __init__(self, camera_id, name, source, fallback_src=None, cache_size=32):
+        self.id = camera_id
+        self.name = name
+        self.source = source
+        # Shown by the card until the first frame arrives
+        self.fallback_src = fallback_src
+        self.cache = FrameCache(cache_size)
+        self.frame = None
+        self.frame_key = None
+        self.frames_read = 0
+        self.frames_encoded = 0
+
+    def poll(self):
+        # Reads the next frame; True if it differs from the current one
+        raw = self.source.read() if self.source is not None else None
+        if raw is None:
+            return False
+        self.frames_read += 1
+        key = hashlib.blake2b(raw, digest_size=16).digest()
+        if key == self.frame_key:
+            return False
+        frame = self.cache.get(key)
+        if frame is None:
+            frame = base64.b64encode(downscale(raw)).decode("ascii")
+            self.cache.put(key, frame)
+            self.frames_encoded += 1
+        self.frame, self.frame_key = frame, key
+        return True
+
+
+class CameraPipeline:
+    def __init__(self, cameras, fps=5.0):
+        self.cameras = list(cameras)
+        self.fps = fps
+        self.frames_pushed = 0
+        self.frames_unchanged = 0
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def camera(self, camera_id):
+        for camera in self.cameras:
+            if camera.id == camera_id:
+                return camera
+        return None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        # First frame of every camera before anyone asks for it
+        self.poll()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="camera-pipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def subscribe(self, session_id, callback):
+        # `callback(camera)` runs on the pipeline thread for every changed frame
+        self.start()
+        with self._lock:
+            self._sessions[session_id] = callback
+
+    def unsubscribe(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def poll(self):
+        changed = []
+        for camera in self.cameras:
+            if camera.poll():
+                changed.append(camera)
+            elif camera.source is not None:
+                self.frames_unchanged += 1
+        if not changed:
+            return changed
+        with self._lock:
+            sessions = list(self._sessions.items())
+        for camera in changed:
+            for session_id, callback in sessions:
+                try:
+                    callback(camera)
+                except Exception:
+                    # A session that can't take updates (e.g. disconnected) is dropped
+                    self.unsubscribe(session_id)
+            self.frames_pushed += 1
+        return changed
+
+    def _run(self):
+        # Fixed-rate schedule; a slow poll delays the next tick instead of
+        # letting ticks pile up
+        period = 1.0 / self.fps
+        deadline = time.monotonic()
+        while True:
+            deadline = max(deadline + period, time.monotonic())
+            if self._stop.wait(deadline - time.monotonic()):
+                return
+            self.poll()
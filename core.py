@@ -0,0 +1,264 @@
+import sys
+import threading
+import time
+
+from device_index import DeviceIndex
+from events import EventBus, LogAppended, StateChanged
+from logstore import LogStore, DEFAULT_MAX_ENTRIES
+from wal import DataDirLock, WriteAheadLog, OP_STATE, OP_LOG, OP_BULK, encode_value, decode_value
+from scenes import SceneEngine
+
+# Device registry and application state, with no UI dependencies: the Flet
+# app (main5.py), the headless entry point and the batch runner share it.
+#
+# Flet handlers, the scheduler, rules, the HTTP API and status providers all
+# change or query it from their own threads. Every mutation (and every index
+# or log query) runs under AppState.lock, so the device index sets, the log
+# store and the journal only ever see one writer. It is re-entrant because
+# listeners such as the rule engine mutate the state from inside _notify.
+
+# --- Data Models & State ---
+
+NO_TAGS = frozenset()
+
+class Device:
+    # Slotted so large fleets don't pay for a __dict__ per device
+    __slots__ = ("id", "name", "type", "state", "details_desc", "bg_color", "room", "tags")
+
+    def __init__(self, dev_id, name, dev_type, state, details_desc, bg_color, room=None, tags=()):
+        self.id = dev_id
+        self.name = name
+        # Type, description and colour repeat across the fleet, share one copy
+        self.type = sys.intern(dev_type)
+        self.state = state  # Can be "ON", "OFF", "LOCKED", "UNLOCKED", or a number/float
+        self.details_desc = sys.intern(details_desc)
+        self.bg_color = sys.intern(bg_color)
+        self.room = sys.intern(room) if room else None
+        self.tags = frozenset(tags) if tags else NO_TAGS
+
+class AppState:
+    # demo=False starts with no devices, scenes or log entries, e.g. for
+    # generated homes that add their own
+    def __init__(self, max_log_entries=DEFAULT_MAX_ENTRIES, demo=True):
+        self.devices = {
+            "light1": Device("light1", "Living Room Light", "light", "OFF", "Tap to switch the light.", "orange100", room="Living Room"),
+            "door1": Device("door1", "Front Door", "lock", "LOCKED", "Tap to lock / unlock the door.", "indigo100", room="Hallway", tags=("entrance",)),
+            "thermostat1": Device("thermostat1", "Thermostat", "thermostat", 22.0, "Use slider to change temperature.", "deepOrange50", room="Living Room"),
+            "fan1": Device("fan1", "Ceiling Fan", "fan", 0, "0 = OFF, 3 = MAX", "cyan100", room="Living Room"),
+        } if demo else {}
+        # Bumped whenever devices are added so compiled scenes are rebuilt
+        self.devices_version = 0
+        self.scenes = SceneEngine() if demo else SceneEngine({})
+        # Devices by type, room, tag and current state, for bulk commands
+        self.index = DeviceIndex(self)
+        # Oldest first; the store hands them back newest first
+        self.logs = LogStore([
+            {"time": "08:12:32", "device": "light1", "action": "Turn ON", "user": "User"},
+            {"time": "08:13:23", "device": "light1", "action": "Turn OFF", "user": "User"},
+            {"time": "08:13:26", "device": "light1", "action": "Turn ON", "user": "User"},
+        ] if demo else (), max_entries=max_log_entries)
+        self.wal = None
+        # Held while the WAL is open; see wal.DataDirLock
+        self.data_lock = None
+        # Journal records open_wal() couldn't apply and skipped
+        self.replay_errors = 0
+        self.last_replay_error = None
+        # Called with the ids of devices whose state changed
+        self.listeners = []
+        # Typed StateChanged/LogAppended events for async consumers
+        self.events = EventBus()
+        # Optional drivers.DeviceDriver that pushes changes to the hardware
+        self.driver = None
+        self.lock = threading.RLock()
+
+    def add_device(self, dev):
+        with self.lock:
+            self.devices[dev.id] = dev
+            self.devices_version += 1
+            return dev
+
+    def get_device(self, dev_id):
+        return self.devices.get(dev_id)
+
+    def toggle_device(self, dev_id):
+        with self.lock:
+            dev = self.devices.get(dev_id)
+            if dev:
+                if dev.type == "light":
+                    self._set_state(dev, "ON" if dev.state == "OFF" else "OFF")
+                elif dev.type == "lock":
+                    self._set_state(dev, "LOCKED" if dev.state == "UNLOCKED" else "UNLOCKED")
+                self._journal(OP_STATE, (dev_id, encode_value(dev.state)))
+                self.log_action(dev_id, f"Set to {dev.state}")
+                self._notify((dev_id,))
+
+    def set_device_value(self, dev_id, value):
+        with self.lock:
+            dev = self.devices.get(dev_id)
+            if dev:
+                self._set_state(dev, value)
+                self._journal(OP_STATE, (dev_id, encode_value(value)))
+                # self.log_action(dev_id, f"Set to {value}") # Optional: log slider changes
+                self._notify((dev_id,))
+
+    def log_action(self, dev_id, action, user="User"):
+        # "time" is what the views show; "ts" dates the entry for the archive
+        ts = time.time()
+        now = time.strftime("%H:%M:%S", time.localtime(ts))
+        entry = {"time": now, "device": dev_id, "action": action, "user": user, "ts": ts}
+        with self.lock:
+            self.logs.append(entry)
+            self._journal(OP_LOG, (now, dev_id, action, user, repr(ts)))
+            if self.events.subscribers:
+                self.events.publish(LogAppended(entry))
+
+    def apply_scene(self, name):
+        with self.lock:
+            ops = self.scenes.compile(name, self.devices, self.devices_version)
+            return self.apply_ops(ops, "SCENE", f"Activated {name} Scene")
+
+    def apply_ops(self, ops, log_device, log_text, user="User"):
+        # One pass over compiled (device, state) operations, one log entry
+        # and one notification for every device that actually changed
+        changed = []
+        with self.lock:
+            for dev, state in ops:
+                if dev.state != state:
+                    self._set_state(dev, state)
+                    changed.append(dev.id)
+                    self._journal(OP_STATE, (dev.id, encode_value(state)))
+            self.log_action(log_device, log_text, user)
+            if changed:
+                self._notify(changed)
+        return changed
+
+    # --- Bulk Commands ---
+
+    def select_devices(self, selector):
+        # Ids of the devices matching a scene-style selector, which may also
+        # filter on the current state: {"type": "light", "tag": "floor3", "state": "ON"}
+        with self.lock:
+            return self.index.select(selector)
+
+    def set_devices(self, selector, value, user="User"):
+        # Sets every selected device to `value` in one pass, with one journal
+        # record and one log entry for the whole batch instead of one each
+        devices = self.devices
+        with self.lock:
+            changed = [dev_id for dev_id in self.index.select(selector) if devices[dev_id].state != value]
+            publish = self.events.publish if self.events.subscribers else None
+            for dev_id in changed:
+                dev = devices[dev_id]
+                if publish:
+                    publish(StateChanged(dev_id, dev.state, value))
+                dev.state = value
+            self.index.states_changed(changed, value)
+            if changed:
+                self._journal(OP_BULK, (encode_value(value), *changed))
+            criteria = ", ".join(f"{key}={wanted}" for key, wanted in selector.items()) or "all"
+            self.log_action("BULK", f"Set {len(changed)} devices to {value} ({criteria})", user)
+            if changed:
+                self._notify(changed)
+        return changed
+
+    def _set_state(self, dev, value):
+        old = dev.state
+        self.index.state_changed(dev.id, old, value)
+        dev.state = value
+        if self.events.subscribers:
+            self.events.publish(StateChanged(dev.id, old, value))
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def attach_driver(self, driver):
+        self.driver = driver
+        driver.on_failure = self._driver_failed
+
+    def _driver_failed(self, dev_id, state, error):
+        # Driver thread: the gateway never applied `state`; the log entry
+        # (and its LogAppended event) is what tells the user
+        reason = str(error) or type(error).__name__
+        self.log_action(dev_id, f"Gateway failed to apply {state} ({reason})", user="Driver")
+
+    def _notify(self, dev_ids):
+        if self.driver is not None:
+            # Fire and forget; scenes fan out concurrently in the driver
+            self.driver.submit([(dev_id, self.devices[dev_id].state) for dev_id in dev_ids])
+        for listener in self.listeners:
+            listener(dev_ids)
+
+    # --- Persistence ---
+
+    def open_wal(self, data_dir, **options):
+        # Restore the latest snapshot plus the log tail, then journal from
+        # here on. Raises DataDirLocked if another process owns data_dir.
+        self.data_lock = DataDirLock(data_dir).acquire()
+        wal = WriteAheadLog(data_dir, **options)
+        snapshot = wal.load_snapshot()
+        first_segment = 0
+        if snapshot:
+            self.restore_snapshot(snapshot)
+            first_segment = snapshot["segment"]
+        for op, fields in wal.replay(first_segment):
+            try:
+                self._replay(op, fields)
+            except (ValueError, IndexError, TypeError) as e:
+                # A record that doesn't parse mustn't keep the app from starting
+                self.replay_errors += 1
+                self.last_replay_error = f"op {op} {fields!r}: {e!r}"
+        wal.start()
+        self.wal = wal
+
+    def close(self):
+        if self.wal:
+            self.wal.close()
+            self.wal = None
+        if self.data_lock is not None:
+            self.data_lock.release()
+            self.data_lock = None
+
+    def snapshot(self):
+        return {
+            "devices": {dev_id: dev.state for dev_id, dev in self.devices.items()},
+            "logs": list(self.logs.oldest_first()),
+        }
+
+    def restore_snapshot(self, snapshot):
+        for dev_id, state in snapshot["devices"].items():
+            dev = self.devices.get(dev_id)
+            if dev:
+                self._set_state(dev, state)
+        self.logs.clear()
+        for entry in snapshot["logs"]:
+            self.logs.append(entry)
+
+    def _replay(self, op, fields):
+        if op == OP_STATE:
+            dev = self.devices.get(fields[0])
+            if dev:
+                self._set_state(dev, decode_value(fields[1]))
+        elif op == OP_BULK:
+            value = decode_value(fields[0])
+            for dev_id in fields[1:]:
+                dev = self.devices.get(dev_id)
+                if dev:
+                    self._set_state(dev, value)
+        elif op == OP_LOG:
+            entry = {"time": fields[0], "device": fields[1], "action": fields[2], "user": fields[3]}
+            if len(fields) > 4:
+                entry["ts"] = float(fields[4])
+            self.logs.append(entry)
+
+    def _journal(self, op, fields):
+        if self.wal is None:
+            return
+        # Always called under self.lock, so no other thread can change the
+        # state between a snapshot's copy and its place in the journal
+        self.wal.append(op, fields)
+        if self.wal.snapshot_due():
+            self.wal.snapshot(self.snapshot)
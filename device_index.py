@@ -0,0 +1,194 @@
+import re
+from bisect import bisect_left
+
+# --- Device Search Index ---
+
+# Secondary indexes over AppState.devices for the overview grid: devices by
+# room and by type, and an inverted index from lower-cased words of each
+# device's name, id, room and type to device ids. The sorted token list
+# makes a search term a prefix match: "liv li" finds "Living Room Light".
+# The index follows the registry lazily, rebuilding the next time it is
+# used after AppState.devices_version changes.
+#
+# For bulk commands it also keeps devices by tag and by current state. The
+# state postings can't wait for a rebuild, so AppState reports every state
+# change through state_changed().
+
+WORD = re.compile(r"\w+")
+NO_ROOM = "No room"
+
+
+def _tokens(dev):
+    text = f"{dev.name} {dev.id} {dev.room or ''} {dev.type}".lower()
+    return set(WORD.findall(text))
+
+
+def _alternatives(value):
+    # Selector values may be a single value or a list of alternatives
+    return value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+
+
+class DeviceIndex:
+    def __init__(self, state):
+        self.state = state
+        self._version = None
+        self.order = {}
+        self.by_room = {}
+        self.by_type = {}
+        self.by_tag = {}
+        self.by_state = {}
+        self.postings = {}
+        self.tokens = []
+        # Ids of the devices of a set of types, by frozenset of types
+        self._typed = {}
+
+    def refresh(self):
+        if self._version == self.state.devices_version:
+            return
+        order = {}
+        by_room = {}
+        by_type = {}
+        by_tag = {}
+        by_state = {}
+        postings = {}
+        for i, (dev_id, dev) in enumerate(self.state.devices.items()):
+            order[dev_id] = i
+            by_room.setdefault(dev.room or NO_ROOM, []).append(dev_id)
+            by_type.setdefault(dev.type, []).append(dev_id)
+            for tag in dev.tags:
+                by_tag.setdefault(tag, []).append(dev_id)
+            by_state.setdefault(dev.state, set()).add(dev_id)
+            for token in _tokens(dev):
+                postings.setdefault(token, []).append(dev_id)
+        self.order = order
+        self.by_room = by_room
+        self.by_type = by_type
+        self.by_tag = by_tag
+        self.by_state = by_state
+        self.postings = postings
+        self.tokens = sorted(postings)
+        self._typed = {}
+        self._version = self.state.devices_version
+
+    def _of_types(self, types):
+        # Ids of the devices whose type is in `types`, or None when that is
+        # every device
+        if types is None or all(dev_type in types for dev_type in self.by_type):
+            return None
+        key = frozenset(types)
+        ids = self._typed.get(key)
+        if ids is None:
+            ids = self._typed[key] = {dev_id for dev_type in key for dev_id in self.by_type.get(dev_type, ())}
+        return ids
+
+    def _prefix_matches(self, term):
+        # Union of the postings of every token starting with `term`
+        matches = set()
+        i = bisect_left(self.tokens, term)
+        while i < len(self.tokens) and self.tokens[i].startswith(term):
+            matches.update(self.postings[self.tokens[i]])
+            i += 1
+        return matches
+
+    def search(self, query="", types=None):
+        # Ids of devices matching every term of `query`, in registry order;
+        # `types` keeps only devices of those types
+        self.refresh()
+        allowed = self._of_types(types)
+        terms = WORD.findall(query.lower())
+        if not terms:
+            if allowed is None:
+                return list(self.order)
+            return sorted(allowed, key=self.order.__getitem__)
+        # Narrowest term first so the intersection shrinks quickly
+        sets = sorted((self._prefix_matches(term) for term in terms), key=len)
+        if allowed is not None:
+            sets.append(allowed)
+        found = sets[0]
+        for other in sets[1:]:
+            if not found:
+                break
+            found = found & other
+        return sorted(found, key=self.order.__getitem__)
+
+    def grouped(self, query="", group_by=None, types=None):
+        # [(group name, [dev_id, ...]), ...]; groups keep the order in which
+        # they first appear in the registry. group_by is "room", "type" or None.
+        self.refresh()
+        if group_by is not None and not WORD.search(query):
+            if group_by == "type":
+                return [(dev_type, ids) for dev_type, ids in self.by_type.items() if types is None or dev_type in types]
+            allowed = self._of_types(types)
+            if allowed is None:
+                return list(self.by_room.items())
+            groups = ((room, [dev_id for dev_id in ids if dev_id in allowed]) for room, ids in self.by_room.items())
+            return [(room, ids) for room, ids in groups if ids]
+        ids = self.search(query, types)
+        if group_by is None:
+            return [(None, ids)] if ids else []
+        groups = {}
+        devices = self.state.devices
+        for dev_id in ids:
+            dev = devices[dev_id]
+            key = (dev.room or NO_ROOM) if group_by == "room" else dev.type
+            groups.setdefault(key, []).append(dev_id)
+        return list(groups.items())
+
+    # --- Bulk Selection ---
+
+    def state_changed(self, dev_id, old, new):
+        if self._version != self.state.devices_version or old == new:
+            # Not built yet, or stale: the next refresh() reads current states
+            return
+        ids = self.by_state.get(old)
+        if ids is not None:
+            ids.discard(dev_id)
+            if not ids:
+                del self.by_state[old]
+        self.by_state.setdefault(new, set()).add(dev_id)
+
+    def states_changed(self, dev_ids, new):
+        # state_changed() for a batch of devices that all moved to `new`;
+        # one set difference per distinct old state instead of one per device
+        if self._version != self.state.devices_version:
+            return
+        moved = set(dev_ids)
+        for old, ids in list(self.by_state.items()):
+            if old != new and not ids.isdisjoint(moved):
+                ids -= moved
+                if not ids:
+                    del self.by_state[old]
+        self.by_state.setdefault(new, set()).update(moved)
+
+    def _matching(self, key, value):
+        if key == "id":
+            return {dev_id for dev_id in _alternatives(value) if dev_id in self.order}
+        if key == "state":
+            index = self.by_state
+        elif key == "type":
+            index = self.by_type
+        elif key == "room":
+            index = self.by_room
+        elif key == "tag":
+            index = self.by_tag
+        else:
+            raise ValueError(f"Unknown selector key: {key}")
+        matches = set()
+        for alternative in _alternatives(value):
+            matches.update(index.get(alternative, ()))
+        return matches
+
+    def select(self, selector):
+        # Ids matching a scene-style selector ("id", "type", "room", "tag")
+        # that may also filter on "state", in registry order. Every key is
+        # answered from its posting lists; no device is looked at.
+        self.refresh()
+        if not selector:
+            return list(self.order)
+        sets = sorted((self._matching(key, value) for key, value in selector.items()), key=len)
+        found = sets[0]
+        for other in sets[1:]:
+            if not found:
+                break
+            found &= other
+        return sorted(found, key=self.order.__getitem__)
@@ -0,0 +1,318 @@
+import asyncio
+import itertools
+import json
+import os
+import threading
+from concurrent.futures import wait
+
+# --- Device Drivers ---
+
+# Devices sit behind network gateways. The driver layer sends state changes
+# to them without blocking Flet handlers: it runs its own asyncio loop on a
+# background thread and `submit()` just schedules the work there.
+#
+# Wire protocol (one JSON object per line, both directions):
+#
+#   -> {"id": 7, "device": "light1", "state": "ON"}
+#   <- {"id": 7, "ok": true, "state": "ON"}
+#
+# Responses carry the request id, so a connection can have many requests in
+# flight at once (pipelining) and the gateway may answer out of order.
+#
+# Different devices are commanded concurrently, but commands for one device
+# go out one at a time, in the order they were submitted. A command that a
+# newer one for the same device has replaced before it was sent (or between
+# its retries) is dropped, so a slow or retried ON can't land after an OFF.
+# A command that still fails after its retries, and that no newer command
+# has replaced, is reported to `on_failure(dev_id, state, error)` on the
+# driver thread; AppState logs it so the UI doesn't silently show a state
+# the device never took.
+#
+# Gateways are configured in <data>/gateways.json; without the file the
+# app runs without a driver:
+#
+#   {"gateways": {"hall": ["192.168.1.20", 9000]}, "routes": {"door1": "hall"},
+#    "default": "hall", "timeout": 2.0}
+
+
+class DriverError(Exception):
+    pass
+
+
+class GatewayConnection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.in_flight = 0
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._reader_task = None
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._reader_task = asyncio.ensure_future(self._read_responses())
+
+    async def _read_responses(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as exc:
+            self._fail_pending(DriverError(f"gateway {self.host}:{self.port} failed: {exc}"))
+            return
+        self._fail_pending(DriverError(f"gateway {self.host}:{self.port} closed the connection"))
+
+    def _fail_pending(self, exc):
+        if self._writer is not None:
+            self._writer.close()
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    async def request(self, dev_id, state, timeout):
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.in_flight += 1
+        try:
+            message = {"id": request_id, "device": dev_id, "state": state}
+            self._writer.write(json.dumps(message).encode("utf-8") + b"\n")
+            await self._writer.drain()
+            response = await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
+            self.in_flight -= 1
+        if not response.get("ok"):
+            raise DriverError(response.get("error", f"gateway rejected {dev_id}"))
+        return response
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+class GatewayPool:
+    # Up to `size` pooled connections to one gateway; each request goes to
+    # the connection with the fewest requests in flight.
+    def __init__(self, host, port, size=4):
+        self.host = host
+        self.port = port
+        self.size = size
+        self._connections = []
+        self._lock = None
+
+    async def _connection(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        self._connections = [c for c in self._connections if c.connected]
+        idle = [c for c in self._connections if c.in_flight == 0]
+        if idle:
+            return idle[0]
+        async with self._lock:
+            if len(self._connections) < self.size:
+                connection = GatewayConnection(self.host, self.port)
+                await connection.connect()
+                self._connections.append(connection)
+                return connection
+        return min(self._connections, key=lambda c: c.in_flight)
+
+    async def request(self, dev_id, state, timeout):
+        connection = await self._connection()
+        return await connection.request(dev_id, state, timeout)
+
+    async def close(self):
+        for connection in self._connections:
+            await connection.close()
+        self._connections = []
+
+
+class DeviceDriver:
+    def __init__(self, gateways, routes=None, default_gateway=None, pool_size=4,
+                 timeout=2.0, retries=2, max_concurrency=256):
+        # gateways: {name: (host, port)}, routes: {dev_id: gateway name}
+        self.gateways = dict(gateways)
+        self.routes = dict(routes or {})
+        self.default_gateway = default_gateway or next(iter(self.gateways))
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.max_concurrency = max_concurrency
+        self.sent = 0
+        self.failed = 0
+        self.superseded = 0
+        self.last_error = None
+        self.on_failure = None
+        self._pools = {}
+        # Per device: the version of its newest command and the lock its
+        # commands queue on; dropped once the device has nothing queued
+        self._versions = {}
+        self._device_locks = {}
+        self._futures = set()
+        self._semaphore = None
+        self._loop = None
+        self._thread = None
+
+    # --- Async API ---
+
+    def _pool(self, dev_id):
+        name = self.routes.get(dev_id, self.default_gateway)
+        pool = self._pools.get(name)
+        if pool is None:
+            host, port = self.gateways[name]
+            pool = self._pools[name] = GatewayPool(host, port, self.pool_size)
+        return pool
+
+    async def send(self, dev_id, state):
+        # Returns the gateway's response, or None if a newer command for the
+        # device replaced this one
+        version = self._versions.get(dev_id, 0) + 1
+        self._versions[dev_id] = version
+        lock = self._device_locks.get(dev_id)
+        if lock is None:
+            lock = self._device_locks[dev_id] = asyncio.Lock()
+        try:
+            # asyncio.Lock wakes waiters first come, first served
+            async with lock:
+                return await self._send_latest(dev_id, state, version)
+        finally:
+            if self._versions.get(dev_id) == version:
+                del self._versions[dev_id]
+                del self._device_locks[dev_id]
+
+    async def _send_latest(self, dev_id, state, version):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                if self._versions[dev_id] != version:
+                    self.superseded += 1
+                    return None
+                try:
+                    response = await self._pool(dev_id).request(dev_id, state, self.timeout)
+                    self.sent += 1
+                    return response
+                except (OSError, asyncio.TimeoutError, DriverError) as exc:
+                    if attempt == self.retries:
+                        self.failed += 1
+                        self.last_error = repr(exc)
+                        if self.on_failure is not None and self._versions[dev_id] == version:
+                            self.on_failure(dev_id, state, exc)
+                        raise
+                    await asyncio.sleep(0.05 * 2 ** attempt)
+
+    async def send_many(self, ops):
+        # Fans out concurrently; failures are returned, not raised
+        return await asyncio.gather(*(self.send(dev_id, state) for dev_id, state in ops), return_exceptions=True)
+
+    async def close(self):
+        for pool in self._pools.values():
+            await pool.close()
+        self._pools = {}
+
+    # --- Thread bridge for Flet handlers ---
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="device-driver", daemon=True)
+        self._thread.start()
+
+    def run(self, coro):
+        # Runs any coroutine on the driver loop, e.g. a SimulatorServer
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def submit(self, ops):
+        # Returns a concurrent.futures.Future immediately
+        future = self.run(self.send_many(list(ops)))
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return future
+
+    def stop(self, timeout=5.0):
+        # Gives submitted commands `timeout` seconds to reach the gateways
+        if self._loop is None:
+            return
+        wait(list(self._futures), timeout)
+        self.run(self.close()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+
+def load_driver(path):
+    # A DeviceDriver for the gateways configured in `path`, or None without one
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    gateways = {name: tuple(address) for name, address in config["gateways"].items()}
+    options = {key: config[key] for key in ("pool_size", "timeout", "retries", "max_concurrency") if key in config}
+    return DeviceDriver(gateways, routes=config.get("routes"), default_gateway=config.get("default"), **options)
+
+
+class SimulatorServer:
+    # In-process stand-in for a gateway. Each request is answered from its
+    # own task after `latency` seconds, so pipelined requests overlap.
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.states = {}
+        self.requests = 0
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        lock = asyncio.Lock()
+
+        async def answer(request):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            self.requests += 1
+            self.states[request["device"]] = request["state"]
+            response = {"id": request["id"], "ok": True, "state": request["state"]}
+            async with lock:
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(answer(json.loads(line)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
@@ -0,0 +1,293 @@
+import itertools
+import threading
+import time
+from collections import deque
+
+# --- Event Bus ---
+
+# Typed events for every device state change and log entry, streamed to any
+# number of asyncio consumers:
+#
+#   sub = state.events.subscribe(maxsize=1024, policy=COALESCE)
+#   async for event in sub:
+#       ...
+#
+# publish() is synchronous and thread-safe, since AppState is mutated from
+# handler, scheduler and rule threads. It copies the event into the bounded
+# buffer of each subscription and wakes a waiting consumer on its loop.
+# When a buffer is full, the subscription's policy decides:
+#
+#   DROP_OLDEST  the oldest buffered event is discarded (counted in `dropped`)
+#   COALESCE     state changes of a device already buffered are merged into
+#                one event (first old, latest new); a full buffer then drops
+#                its oldest device
+#   BLOCK        the publisher waits for the consumer to catch up. A
+#                publisher running on the consumer's own loop can't wait for
+#                it, so there it falls back to dropping the oldest event.
+#                Publishers hold AppState.lock, so a wait is capped at
+#                `block_timeout`; a consumer that misses it is marked
+#                stalled and drops its oldest events, without waiting, until
+#                it reads again.
+#
+# With no subscribers, AppState skips building events altogether. asyncio
+# is only imported once something subscribes, which keeps it out of the
+# startup of one-shot headless commands.
+
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+BLOCK = "block"
+POLICIES = (DROP_OLDEST, COALESCE, BLOCK)
+BLOCK_TIMEOUT = 0.5
+
+
+class StateChanged:
+    __slots__ = ("device", "old", "new", "ts")
+    kind = "state"
+
+    def __init__(self, device, old, new, ts=None):
+        self.device = device
+        self.old = old
+        self.new = new
+        self.ts = time.time() if ts is None else ts
+
+    def to_json(self):
+        return {"kind": self.kind, "device": self.device, "old": self.old, "new": self.new, "ts": self.ts}
+
+
+class LogAppended:
+    __slots__ = ("entry",)
+    kind = "log"
+
+    def __init__(self, entry):
+        self.entry = entry
+
+    def to_json(self):
+        return {"kind": self.kind, **self.entry}
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Subscription:
+    def __init__(self, bus, maxsize, policy, kinds, loop, block_timeout=BLOCK_TIMEOUT):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown backpressure policy: {policy!r}")
+        self.bus = bus
+        self.maxsize = maxsize
+        self.policy = policy
+        self.kinds = frozenset(kinds) if kinds else None
+        self.loop = loop
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.blocked = 0
+        self.stalls = 0
+        self.block_timeout = block_timeout
+        # Set when a BLOCK wait timed out; cleared by the next read
+        self.stalled = False
+        self._buffer = {} if policy == COALESCE else deque()
+        self._keys = itertools.count()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._waiter = None
+        self._closed = False
+        self._batch = deque()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    # --- Publisher Side ---
+
+    def offer(self, event):
+        with self._lock:
+            if self._closed:
+                return
+            buffer = self._buffer
+            if self.policy == COALESCE:
+                key = event.device if event.kind == "state" else next(self._keys)
+                queued = buffer.get(key)
+                if queued is not None:
+                    buffer[key] = StateChanged(key, queued.old, event.new, event.ts)
+                    self.coalesced += 1
+                else:
+                    if len(buffer) >= self.maxsize:
+                        del buffer[next(iter(buffer))]
+                        self.dropped += 1
+                    buffer[key] = event
+            else:
+                if len(buffer) >= self.maxsize:
+                    if self.policy == BLOCK and not self.stalled and not self._on_own_loop():
+                        self.blocked += 1
+                        deadline = time.monotonic() + self.block_timeout
+                        while len(buffer) >= self.maxsize and not self._closed:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                self.stalled = True
+                                self.stalls += 1
+                                break
+                            self._not_full.wait(remaining)
+                        if self._closed:
+                            return
+                    if len(buffer) >= self.maxsize:
+                        buffer.popleft()
+                        self.dropped += 1
+                buffer.append(event)
+            if self._waiter is not None:
+                waiter, self._waiter = self._waiter, None
+                self.loop.call_soon_threadsafe(_wake, waiter)
+
+    def _on_own_loop(self):
+        import asyncio
+
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    # --- Consumer Side ---
+
+    async def get_batch(self, max_items=None):
+        # Waits for at least one event and returns up to `max_items` of what
+        # is buffered, oldest first; [] once the subscription is closed
+        while True:
+            with self._lock:
+                buffer = self._buffer
+                if buffer:
+                    if self.policy == COALESCE:
+                        if max_items is None or max_items >= len(buffer):
+                            batch = list(buffer.values())
+                            buffer.clear()
+                        else:
+                            keys = list(itertools.islice(buffer, max_items))
+                            batch = [buffer.pop(key) for key in keys]
+                    elif max_items is None or max_items >= len(buffer):
+                        batch = list(buffer)
+                        buffer.clear()
+                    else:
+                        batch = [buffer.popleft() for _ in range(max_items)]
+                    self.delivered += len(batch)
+                    if self.policy == BLOCK:
+                        self.stalled = False
+                        self._not_full.notify_all()
+                    return batch
+                if self._closed:
+                    return []
+                waiter = self._waiter = self.loop.create_future()
+            await waiter
+
+    def drain(self):
+        # Everything buffered right now, without waiting
+        with self._lock:
+            batch = list(self._buffer.values() if self.policy == COALESCE else self._buffer)
+            self._buffer.clear()
+            self.delivered += len(batch)
+            self.stalled = False
+            self._not_full.notify_all()
+        return batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._batch:
+            batch = await self.get_batch()
+            if not batch:
+                raise StopAsyncIteration
+            self._batch.extend(batch)
+        return self._batch.popleft()
+
+    def close(self):
+        # Ends iteration once the buffer is consumed and releases publishers
+        self.bus.unsubscribe(self)
+        with self._lock:
+            self._closed = True
+            self._not_full.notify_all()
+            if self._waiter is not None:
+                waiter, self._waiter = self._waiter, None
+                self.loop.call_soon_threadsafe(_wake, waiter)
+
+    def stats(self):
+        return {"policy": self.policy, "buffered": len(self._buffer), "delivered": self.delivered,
+                "dropped": self.dropped, "coalesced": self.coalesced, "blocked": self.blocked,
+                "stalls": self.stalls}
+
+
+class EventBus:
+    def __init__(self):
+        # Replaced, never mutated, so publish() iterates without a lock
+        self._subscriptions = ()
+        # Plain attribute, read on every state change
+        self.subscribers = 0
+        self._lock = threading.Lock()
+        self.published = 0
+        self.loop = None
+        self._thread = None
+
+    def subscribe(self, maxsize=1024, policy=DROP_OLDEST, kinds=None, loop=None, block_timeout=BLOCK_TIMEOUT):
+        # Call from the consumer's event loop, or pass the loop it runs on
+        if loop is None:
+            import asyncio
+
+            loop = asyncio.get_running_loop()
+        subscription = Subscription(self, maxsize, policy, kinds, loop, block_timeout)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+            self.subscribers = len(self._subscriptions)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+            self.subscribers = len(self._subscriptions)
+
+    def publish(self, event):
+        self.published += 1
+        for subscription in self._subscriptions:
+            if subscription.kinds is None or event.kind in subscription.kinds:
+                subscription.offer(event)
+
+    # --- Background Loop ---
+
+    def start(self):
+        # A loop on its own thread for consumers of sync code (e.g. the HTTP API)
+        import asyncio
+
+        if self._thread is not None:
+            return self.loop
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="event-bus", daemon=True)
+        self._thread.start()
+        return self.loop
+
+    def run(self, coro):
+        # Schedules a consumer coroutine on the background loop; returns a concurrent Future
+        import asyncio
+
+        return asyncio.run_coroutine_threadsafe(coro, self.start())
+
+    def stop(self, timeout=1.0):
+        # Closes every subscription and gives consumers `timeout` seconds to
+        # finish what they have buffered before they are cancelled
+        import asyncio
+
+        if self._thread is None:
+            return
+        for subscription in self._subscriptions:
+            subscription.close()
+        asyncio.run_coroutine_threadsafe(self._finish_consumers(timeout), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self._thread = None
+        self.loop.close()
+        self.loop = None
+
+    async def _finish_consumers(self, timeout):
+        import asyncio
+
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
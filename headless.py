@@ -0,0 +1,439 @@
+import argparse
+import json
+import os
+import signal
+import sys
+from urllib.parse import parse_qs, quote as urlquote, urlencode, urlsplit
+
+from core import AppState
+from events import COALESCE, DROP_OLDEST
+from wal import DataDirLocked
+from rules import RuleEngine
+from scheduler import Scheduler
+
+# --- Headless Entry Point ---
+
+# Drives the controller without Flet, either one command at a time:
+#
+#   python headless.py list
+#   python headless.py toggle light1
+#   python headless.py set thermostat1 21.5
+#   python headless.py scene Night
+#   python headless.py bulk '{"type": "light", "tag": "floor3"}' OFF
+#   python headless.py schedule '{"action": {"scene": "Night"}, "cron": "0 23 * * *"}'
+#   python headless.py schedules
+#   python headless.py unschedule job1
+#   python headless.py export-logs --out data/log-archive
+#
+# or as a local HTTP/JSON API:
+#
+#   python headless.py serve --port 8551
+#
+#   GET  /devices                  every device
+#   GET  /devices/<id>             one device
+#   POST /devices/<id>/toggle
+#   POST /devices/<id>/value       body {"value": 21.5}
+#   POST /devices/bulk             body {"select": {"type": "light"}, "value": "OFF"}
+#   GET  /scenes
+#   POST /scenes/<name>
+#   GET  /logs?device=&action=&limit=
+#   GET  /events?policy=coalesce   server-sent stream of state changes and log entries
+#                                  (policy coalesce or drop_oldest)
+#   GET  /schedules
+#   POST /schedules                body {"action": ..., "at"/"every"/"cron": ...}
+#   POST /schedules/<id>/cancel
+#
+# State is restored from and journaled to the same data directory the UI uses,
+# and changes go to the gateways configured in <data>/gateways.json. Only
+# one process owns the directory at a time (see wal.DataDirLock). While
+# `serve` owns it, CLI commands are sent to its API instead; while anything
+# else does, they fail with the owner's pid.
+# Schedules are saved there too and belong to the owner: the UI or `serve`
+# runs them, and jobs added or cancelled from the CLI go through its API.
+
+
+def device_json(dev):
+    return {"id": dev.id, "name": dev.name, "type": dev.type, "state": dev.state,
+            "room": dev.room, "tags": sorted(dev.tags)}
+
+
+def parse_value(text):
+    # Slider values are numbers; anything else is kept as a string state
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+class HeadlessController:
+    # Thin command layer over AppState shared by the CLI and the HTTP API.
+    # Every command runs under AppState's lock, which the scheduler's jobs
+    # and the rule engine also mutate the state under.
+    def __init__(self, state, scheduler=None):
+        self.state = state
+        self.scheduler = scheduler
+        self._lock = state.lock
+
+    def devices(self):
+        with self._lock:
+            return [device_json(dev) for dev in self.state.devices.values()]
+
+    def device(self, dev_id):
+        with self._lock:
+            dev = self.state.get_device(dev_id)
+            return device_json(dev) if dev else None
+
+    def toggle(self, dev_id):
+        with self._lock:
+            dev = self.state.get_device(dev_id)
+            if dev is None:
+                return None
+            self.state.toggle_device(dev_id)
+            return device_json(dev)
+
+    def set_value(self, dev_id, value):
+        with self._lock:
+            dev = self.state.get_device(dev_id)
+            if dev is None:
+                return None
+            self.state.set_device_value(dev_id, value)
+            return device_json(dev)
+
+    def set_many(self, selector, value):
+        with self._lock:
+            try:
+                changed = self.state.set_devices(selector, value)
+            except ValueError as e:
+                return {"error": str(e)}
+            return {"changed": changed}
+
+    def scenes(self):
+        return self.state.scenes.names()
+
+    def apply_scene(self, name):
+        with self._lock:
+            if name not in self.state.scenes.names():
+                return None
+            return {"scene": name, "changed": self.state.apply_scene(name)}
+
+    def logs(self, device=None, action=None, limit=50):
+        with self._lock:
+            page, has_more = self.state.logs.query(device=device, action=action, limit=limit)
+            return {"logs": list(page), "has_more": has_more}
+
+    def schedules(self):
+        return self.scheduler.jobs()
+
+    def add_schedule(self, spec):
+        # {"action": {...}, "at" | "every" | "cron": ..., "name": optional}
+        try:
+            job_id = self.scheduler.schedule(
+                spec.get("action"), at=spec.get("at"), every=spec.get("every"), cron=spec.get("cron"), name=spec.get("name")
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+        self.scheduler.save()
+        return {"id": job_id}
+
+    def cancel_schedule(self, job_id):
+        if not self.scheduler.cancel(job_id):
+            return None
+        self.scheduler.save()
+        return {"cancelled": job_id}
+
+
+# --- HTTP API ---
+
+SSE_POLICIES = (COALESCE, DROP_OLDEST)
+LOG_EXPORT_INTERVAL = 60.0
+
+class ApiHandler:
+    # Request handling mixed into BaseHTTPRequestHandler by serve(); http.server
+    # is only imported there, which keeps one-shot CLI commands quick to start
+    controller = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reply(self, result):
+        if result is None:
+            self._send(404, {"error": "not found"})
+        else:
+            self._send(200, result)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if parts == ["devices"]:
+            self._reply(self.controller.devices())
+        elif len(parts) == 2 and parts[0] == "devices":
+            self._reply(self.controller.device(parts[1]))
+        elif parts == ["scenes"]:
+            self._reply(self.controller.scenes())
+        elif parts == ["schedules"]:
+            self._reply(self.controller.schedules())
+        elif parts == ["logs"]:
+            self._reply(self.controller.logs(query.get("device"), query.get("action"), int(query.get("limit", 50))))
+        elif parts == ["events"]:
+            self._stream_events(query.get("policy", "coalesce"))
+        else:
+            self._reply(None)
+
+    def _stream_events(self, policy, keepalive=15.0):
+        # Server-sent events until the client goes away or the server stops.
+        # The subscription lives on the bus loop; this thread waits on it.
+        from concurrent.futures import TimeoutError as WaitTimeout
+
+        bus = self.controller.state.events
+        if policy not in SSE_POLICIES:
+            # BLOCK would let a client that stops reading hold up every mutation
+            self._send(400, {"error": f"policy must be one of {', '.join(SSE_POLICIES)}"})
+            return
+        loop = bus.start()
+        subscription = bus.subscribe(maxsize=1024, policy=policy, loop=loop)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while True:
+                pending = bus.run(subscription.get_batch())
+                try:
+                    batch = pending.result(keepalive)
+                except WaitTimeout:
+                    pending.cancel()
+                    # A comment line; writing it is how a closed client is noticed
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                if not batch:
+                    break
+                self.wfile.write("".join(f"data: {json.dumps(event.to_json())}\n\n" for event in batch).encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            subscription.close()
+
+    def do_POST(self):
+        parts = [p for p in urlsplit(self.path).path.split("/") if p]
+        try:
+            body = self._body()
+        except ValueError:
+            self._send(400, {"error": "invalid JSON body"})
+            return
+        if parts == ["devices", "bulk"]:
+            if not isinstance(body.get("select"), dict) or "value" not in body:
+                self._send(400, {"error": "need 'select' (object) and 'value'"})
+                return
+            result = self.controller.set_many(body["select"], body["value"])
+            self._send(400 if "error" in result else 200, result)
+        elif len(parts) == 3 and parts[0] == "devices" and parts[2] == "toggle":
+            self._reply(self.controller.toggle(parts[1]))
+        elif len(parts) == 3 and parts[0] == "devices" and parts[2] == "value":
+            if "value" not in body:
+                self._send(400, {"error": "missing 'value'"})
+                return
+            self._reply(self.controller.set_value(parts[1], body["value"]))
+        elif len(parts) == 2 and parts[0] == "scenes":
+            self._reply(self.controller.apply_scene(parts[1]))
+        elif parts == ["schedules"]:
+            result = self.controller.add_schedule(body)
+            self._send(400 if "error" in result else 200, result)
+        elif len(parts) == 3 and parts[0] == "schedules" and parts[2] == "cancel":
+            self._reply(self.controller.cancel_schedule(parts[1]))
+        else:
+            self._reply(None)
+
+
+def serve(controller, host="127.0.0.1", port=8551):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    handler = type("BoundApiHandler", (ApiHandler, BaseHTTPRequestHandler), {"controller": controller})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+# --- CLI ---
+
+def api_request(args):
+    # (method, path, body) of the API call doing what a CLI command does;
+    # None for commands only the directory's owner can run
+    quote = lambda text: urlquote(text, safe="")
+    if args.command == "list":
+        return "GET", "/devices", None
+    if args.command == "toggle":
+        return "POST", f"/devices/{quote(args.device)}/toggle", {}
+    if args.command == "set":
+        return "POST", f"/devices/{quote(args.device)}/value", {"value": parse_value(args.value)}
+    if args.command == "scene":
+        return "POST", f"/scenes/{quote(args.name)}", {}
+    if args.command == "bulk":
+        return "POST", "/devices/bulk", {"select": json.loads(args.selector), "value": parse_value(args.value)}
+    if args.command == "schedules":
+        return "GET", "/schedules", None
+    if args.command == "schedule":
+        return "POST", "/schedules", json.loads(args.spec)
+    if args.command == "unschedule":
+        return "POST", f"/schedules/{quote(args.job_id)}/cancel", {}
+    if args.command == "logs":
+        query = urlencode({key: value for key, value in (("device", args.device), ("limit", args.limit)) if value})
+        return "GET", f"/logs?{query}", None
+    return None
+
+
+def forward(api, request):
+    # Runs a command through the owning process's API; returns (status, result)
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    method, path, body = request
+    data = None if body is None else json.dumps(body).encode()
+    headers = {"Content-Type": "application/json"} if data is not None else {}
+    try:
+        with urlopen(Request(api + path, data=data, method=method, headers=headers), timeout=30) as response:
+            return response.status, json.load(response)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+def _interrupt(signum, frame):
+    # SIGTERM shuts the server down like Ctrl+C so the journal is closed
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the smart home controller without the UI.")
+    parser.add_argument("--data", default="data", help="state directory shared with the UI")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    commands.add_parser("toggle").add_argument("device")
+    set_parser = commands.add_parser("set")
+    set_parser.add_argument("device")
+    set_parser.add_argument("value")
+    commands.add_parser("scene").add_argument("name")
+    bulk_parser = commands.add_parser("bulk")
+    bulk_parser.add_argument("selector", help='JSON selector, e.g. {"type": "light"}')
+    bulk_parser.add_argument("value")
+    commands.add_parser("schedules")
+    commands.add_parser("schedule").add_argument("spec", help="JSON job spec")
+    commands.add_parser("unschedule").add_argument("job_id")
+    commands.add_parser("export-logs").add_argument("--out", default=None, help="archive directory (default <data>/log-archive)")
+    logs_parser = commands.add_parser("logs")
+    logs_parser.add_argument("--device")
+    logs_parser.add_argument("--limit", type=int, default=20)
+    serve_parser = commands.add_parser("serve")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8551)
+    args = parser.parse_args(argv)
+
+    state = AppState()
+    try:
+        state.open_wal(args.data)
+    except DataDirLocked as e:
+        request = api_request(args)
+        api = e.owner.get("api")
+        if not api:
+            print(f"{e}, which serves no API; stop it first", file=sys.stderr)
+            return 2
+        if request is None:
+            print(f"{e}; '{args.command}' can't go through its API, stop it first", file=sys.stderr)
+            return 2
+        status, result = forward(api, request)
+        if status == 404:
+            print("not found", file=sys.stderr)
+            return 1
+        print(json.dumps(result, indent=2))
+        return 0 if status == 200 else 1
+    driver = None
+    gateways = os.path.join(args.data, "gateways.json")
+    if os.path.exists(gateways):
+        # asyncio is only imported when there are gateways to talk to
+        from drivers import load_driver
+
+        driver = load_driver(gateways)
+        driver.start()
+        state.attach_driver(driver)
+    rules = RuleEngine(state)
+    state.add_listener(rules.on_change)
+    scheduler = Scheduler(state, path=os.path.join(args.data, "schedules.json"))
+    scheduler.load()
+    controller = HeadlessController(state, scheduler)
+    try:
+        if args.command == "serve":
+            server = serve(controller, args.host, args.port)
+            signal.signal(signal.SIGTERM, _interrupt)
+            api = f"http://{args.host}:{server.server_address[1]}"
+            # CLI commands against this data directory come here from now on
+            state.data_lock.advertise(api=api)
+            print(f"Serving on {api}", file=sys.stderr)
+            # Keeps <data>/log-archive current, as the UI does
+            from logarchive import LogArchiver
+            archiver = LogArchiver(state.logs, os.path.join(args.data, "log-archive"), lock=state.lock)
+            archiver.export()
+            scheduler.call_every(LOG_EXPORT_INTERVAL, archiver.export)
+            scheduler.start()
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+                scheduler.stop()
+                archiver.export()
+                state.events.stop()
+            return 0
+        if args.command == "list":
+            result = controller.devices()
+        elif args.command == "toggle":
+            result = controller.toggle(args.device)
+        elif args.command == "set":
+            result = controller.set_value(args.device, parse_value(args.value))
+        elif args.command == "scene":
+            result = controller.apply_scene(args.name)
+        elif args.command == "bulk":
+            result = controller.set_many(json.loads(args.selector), parse_value(args.value))
+        elif args.command == "schedules":
+            result = controller.schedules()
+        elif args.command == "schedule":
+            result = controller.add_schedule(json.loads(args.spec))
+        elif args.command == "unschedule":
+            result = controller.cancel_schedule(args.job_id)
+        elif args.command == "export-logs":
+            from logarchive import export_logs
+            out = args.out or os.path.join(args.data, "log-archive")
+            result = {"archive": out, "exported": export_logs(state.logs, out)}
+        else:
+            result = controller.logs(args.device, limit=args.limit)
+        if result is None:
+            print("not found", file=sys.stderr)
+            return 1
+        print(json.dumps(result, indent=2))
+        return 1 if isinstance(result, dict) and "error" in result else 0
+    finally:
+        if driver is not None:
+            # Waits for this command's changes to reach the gateways
+            driver.stop()
+        state.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import threading
+import time
+
+# --- Session Hub ---
+
+# One AppState is shared by every connected session. The hub listens to it
+# and pushes compact deltas ({dev_id: state}) to each subscribed session.
+# Changes are coalesced for `interval` seconds on the hub's own thread, so a
+# burst of mutations (a scene, a slider drag) becomes one delta per session
+# carrying only the latest state of each device, and the mutating handler
+# never waits on other sessions.
+
+
+class StateHub:
+    def __init__(self, state, interval=0.02):
+        self.state = state
+        self.interval = interval
+        self.deltas_sent = 0
+        self.changes_published = 0
+        self._sessions = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.state.add_listener(self.publish)
+        self._thread = threading.Thread(target=self._run, name="state-hub", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, session_id, callback):
+        # `callback(delta)` is called on the hub thread and must not block
+        self.start()
+        with self._lock:
+            self._sessions[session_id] = callback
+
+    def unsubscribe(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def session_count(self):
+        return len(self._sessions)
+
+    def publish(self, dev_ids):
+        with self._lock:
+            self._pending.update(dev_ids)
+            self.changes_published += 1
+        self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            sessions = list(self._sessions.items())
+        if not pending:
+            return None
+        devices = self.state.devices
+        delta = {dev_id: devices[dev_id].state for dev_id in pending if dev_id in devices}
+        for session_id, callback in sessions:
+            try:
+                callback(delta)
+            except Exception:
+                # A session that can't take updates (e.g. disconnected) is dropped
+                self.unsubscribe(session_id)
+        self.deltas_sent += 1
+        return delta
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            if self.interval:
+                time.sleep(self.interval)
+            self._wakeup.clear()
+            self.flush()
@@ -0,0 +1,300 @@
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+# --- Metrics ---
+
+# Latency and size histograms for the hot paths: event handlers, view
+# builders and page updates. Recording is a perf_counter pair, a bisect
+# over fixed buckets and three additions under the histogram's lock. Event
+# handlers and page updates run thousands of times a second, so only every
+# `sample_every`-th call is timed and recorded with that weight: counts and
+# sums stay estimates of the totals, and an untimed call costs one counter
+# step. View builds are timed on every call. Histograms are keyed by metric
+# name plus labels and export as Prometheus text (cumulative `le` buckets)
+# or JSON.
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PREFIX = "smarthome_"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "count", "sum", "max", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        # Handlers, page updates and the scheduler observe from several threads
+        self._lock = threading.Lock()
+
+    def observe(self, value, weight=1):
+        # `weight` is the number of calls a sampled observation stands for
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += weight
+            self.count += weight
+            self.sum += value * weight
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+class Metrics:
+    def __init__(self, enabled=True, sample_every=16):
+        self.enabled = enabled
+        self.sample_every = sample_every
+        self._histograms = {}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, labels=(), bounds=LATENCY_BUCKETS):
+        key = (name, labels)
+        hist = self._histograms.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(key, Histogram(bounds))
+        return hist
+
+    def calls(self, name, labels=()):
+        # Call counter for sampling, shared by every wrapper of one metric so
+        # handlers rebuilt with each view keep their place in the cycle
+        key = (name, labels)
+        counter = self._calls.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._calls.setdefault(key, itertools.count(1))
+        return counter
+
+    def observe(self, name, value, labels=(), bounds=LATENCY_BUCKETS):
+        if self.enabled:
+            self.histogram(name, labels, bounds).observe(value)
+
+    def timed(self, name, sampled=False, **labels):
+        # Decorator recording the call's wall time in `name`, also when it
+        # raises. `sampled` times only every `sample_every`-th call; it is
+        # meant for event handlers and passes positional arguments only,
+        # which keeps the untimed calls to a counter step.
+        label_items = tuple(sorted(labels.items()))
+
+        def decorate(fn):
+            hist = self.histogram(name, label_items)
+
+            if sampled:
+                every = self.sample_every
+                calls = self.calls(name, label_items)
+
+                @functools.wraps(fn)
+                def sampled_wrapper(*args):
+                    if next(calls) % every or not self.enabled:
+                        return fn(*args)
+                    start = time.perf_counter()
+                    try:
+                        return fn(*args)
+                    finally:
+                        hist.observe(time.perf_counter() - start, every)
+                return sampled_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    hist.observe(time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    # --- Export ---
+
+    def to_json(self):
+        out = []
+        for (name, labels), hist in sorted(self._histograms.items()):
+            if not hist.count:
+                continue
+            out.append({
+                "name": PREFIX + name,
+                "labels": dict(labels),
+                "count": hist.count,
+                "sum": hist.sum,
+                "max": hist.max,
+                "p50": hist.quantile(0.5),
+                "p99": hist.quantile(0.99),
+                "buckets": dict(zip([str(b) for b in hist.bounds] + ["+Inf"], hist.counts)),
+            })
+        return out
+
+    def to_prometheus(self):
+        lines = []
+        typed = set()
+        for (name, labels), hist in sorted(self._histograms.items()):
+            if not hist.count:
+                continue
+            metric = PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            base = ",".join(f'{k}="{v}"' for k, v in labels)
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, n in zip(list(hist.bounds) + ["+Inf"], hist.counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{metric}_sum{suffix} {hist.sum!r}")
+            lines.append(f"{metric}_count{suffix} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # Format from the extension: .json, anything else is Prometheus text
+        text = json.dumps(self.to_json(), indent=1) if path.endswith(".json") else self.to_prometheus()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+def instrument_page(page, metrics, size_every=64):
+    # Times every page.update() of this page (control.update() goes through
+    # it too), sampled like handlers, and records the size of the commands
+    # sent. Serializing for the size is the costly part, so only every
+    # `size_every`-th batch is measured.
+    from flet.core.protocol import CommandEncoder
+
+    update = page.update
+    update_hist = metrics.histogram("page_update_seconds")
+    size_hist = metrics.histogram("page_update_bytes", bounds=SIZE_BUCKETS)
+    every = metrics.sample_every
+    calls = metrics.calls("page_update_seconds")
+
+    @functools.wraps(update)
+    def timed_update(*controls):
+        if next(calls) % every or not metrics.enabled:
+            return update(*controls)
+        start = time.perf_counter()
+        try:
+            return update(*controls)
+        finally:
+            update_hist.observe(time.perf_counter() - start, every)
+
+    page.update = timed_update
+
+    conn = page.connection
+    if conn is None or getattr(conn, "_instrumented", False):
+        return page
+    # The connection may be shared by every session; wrap it once
+    send_commands = conn.send_commands
+    batches = itertools.count(1)
+
+    def measured_send(session_id, commands):
+        if metrics.enabled and not next(batches) % size_every:
+            size = len(json.dumps(commands, cls=CommandEncoder, separators=(",", ":")))
+            size_hist.observe(size, size_every)
+        return send_commands(session_id, commands)
+
+    conn.send_commands = measured_send
+    conn._instrumented = True
+    return page
+
+
+# --- Sampling Profiler ---
+
+class SamplingProfiler:
+    # Opt-in wall-clock sampler: a thread snapshots every other thread's
+    # stack each `interval` seconds and counts collapsed stacks, written in
+    # the "frame;frame;frame count" format flame graph tools read. Cost is
+    # paid on the sampler thread, proportional to the sampling rate.
+    def __init__(self, interval=0.005, max_depth=48):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+        return self.running
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                parts = []
+                while frame is not None and len(parts) < self.max_depth:
+                    code = frame.f_code
+                    key = (code.co_filename, code.co_name)
+                    name = names.get(key)
+                    if name is None:
+                        name = names[key] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+                    parts.append(name)
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+
+    def top(self, n=20):
+        # Most sampled leaf functions
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,299 @@
+import argparse
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+# --- Columnar Log Archive ---
+
+# Long-term action log history for offline analytics, kept outside the
+# bounded in-memory LogStore. An archive is a directory of column files:
+#
+#   ts.f8      float64  epoch seconds (NaN for entries logged before
+#                       entries carried a timestamp)
+#   device.i4  int32    codes into the "device" dictionary
+#   action.i4  int32    codes into the "action" dictionary
+#   user.i4    int32    codes into the "user" dictionary
+#   meta.json  row count and the three dictionaries
+#
+# Columns are headerless little-endian arrays, so the writer streams entries
+# in fixed-size chunks and appends to an existing archive without knowing
+# the final length. Only meta.json (replaced atomically on close) says how
+# many rows are committed; anything after that from an interrupted export
+# is cut off on the next open. Readers memory-map the columns, and queries
+# work on one chunk of rows at a time with NumPy, so their memory use does
+# not grow with the archive.
+
+COLUMNS = (("ts", "<f8"), ("device", "<i4"), ("action", "<i4"), ("user", "<i4"))
+CODED = ("device", "action", "user")
+CHUNK_ROWS = 1 << 16
+QUERY_CHUNK_ROWS = 1 << 20
+
+
+def _column_path(path, name, dtype):
+    return os.path.join(path, f"{name}.{np.dtype(dtype).kind}{np.dtype(dtype).itemsize}")
+
+
+def _read_meta(path):
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return {"rows": 0, "last_ts": None, "dictionaries": {name: [] for name in CODED}}
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+class LogArchiveWriter:
+    def __init__(self, path, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        os.makedirs(path, exist_ok=True)
+        meta = _read_meta(path)
+        self.rows = meta["rows"]
+        self.last_ts = meta["last_ts"]
+        self.dictionaries = meta["dictionaries"]
+        self._codes = {name: {value: code for code, value in enumerate(values)}
+                       for name, values in self.dictionaries.items()}
+        self._files = {}
+        for name, dtype in COLUMNS:
+            f = open(_column_path(path, name, dtype), "ab")
+            # Drop rows an interrupted export wrote past the committed count
+            f.truncate(self.rows * np.dtype(dtype).itemsize)
+            self._files[name] = f
+        self._chunk = []
+
+    def _encode(self, name, values):
+        codes = self._codes[name]
+        dictionary = self.dictionaries[name]
+        out = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(dictionary)
+                dictionary.append(value)
+            out[i] = code
+        return out
+
+    def append(self, entry):
+        self._chunk.append(entry)
+        if len(self._chunk) >= self.chunk_rows:
+            self.flush()
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def flush(self):
+        chunk, self._chunk = self._chunk, []
+        if not chunk:
+            return
+        ts = np.fromiter((entry.get("ts", math.nan) for entry in chunk), dtype=np.float64, count=len(chunk))
+        ts.tofile(self._files["ts"])
+        for name in CODED:
+            self._encode(name, [entry[name] for entry in chunk]).tofile(self._files[name])
+        self.rows += len(chunk)
+        if not np.isnan(ts).all():
+            self.last_ts = max(self.last_ts or -math.inf, float(np.nanmax(ts)))
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        meta = {"rows": self.rows, "last_ts": self.last_ts, "dictionaries": self.dictionaries}
+        meta_path = os.path.join(self.path, "meta.json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+
+def export_logs(logs, path, chunk_rows=CHUNK_ROWS):
+    # Appends the entries of a LogStore not yet in the archive at `path`:
+    # those newer than its last timestamp, or every entry into a new
+    # archive. Returns how many rows were written.
+    writer = LogArchiveWriter(path, chunk_rows)
+    before = writer.rows
+    if before == 0:
+        writer.extend(logs.oldest_first())
+    else:
+        since = writer.last_ts if writer.last_ts is not None else -math.inf
+        writer.extend(entry for entry in logs.oldest_first() if entry.get("ts", -math.inf) > since)
+    writer.close()
+    return writer.rows - before
+
+
+class LogArchiver:
+    # Keeps an archive in step with a live LogStore. export() appends what
+    # was logged since its last call; entries the store evicts before that
+    # are held until then, so nothing leaves the bounded store unarchived.
+    # The first export picks up after the archive's last timestamp, like
+    # export_logs(). `lock` guards the store (AppState.lock).
+    def __init__(self, logs, path, lock=None, chunk_rows=CHUNK_ROWS):
+        self.logs = logs
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.exported = 0
+        self._state_lock = lock or threading.RLock()
+        self._lock = threading.Lock()
+        # Sequence number of the last entry taken for export
+        self._seq = None
+        self._evicted = []
+        logs.on_evict = self._on_evict
+
+    def _on_evict(self, seq, entry):
+        # Under the store's lock, on every eviction once exporting started
+        if self._seq is not None and seq > self._seq:
+            self._evicted.append(entry)
+            self._seq = seq
+
+    def export(self):
+        # Returns how many rows were written
+        with self._lock:
+            with self._state_lock:
+                if self._seq is None:
+                    entries = list(self.logs.oldest_first())
+                else:
+                    entries = self._evicted + list(self.logs.since_seq(self._seq))
+                self._evicted = []
+                first_export = self._seq is None
+                self._seq = self.logs.last_seq
+            writer = LogArchiveWriter(self.path, self.chunk_rows)
+            before = writer.rows
+            if first_export and before:
+                since = writer.last_ts if writer.last_ts is not None else -math.inf
+                entries = (entry for entry in entries if entry.get("ts", -math.inf) > since)
+            writer.extend(entries)
+            writer.close()
+            written = writer.rows - before
+            self.exported += written
+            return written
+
+
+class LogArchive:
+    def __init__(self, path):
+        self.path = path
+        meta = _read_meta(path)
+        self.rows = meta["rows"]
+        self.dictionaries = meta["dictionaries"]
+        for name, dtype in COLUMNS:
+            if self.rows:
+                column = np.memmap(_column_path(path, name, dtype), dtype=dtype, mode="r", shape=(self.rows,))
+            else:
+                column = np.empty(0, dtype=dtype)
+            setattr(self, name, column)
+
+    def __len__(self):
+        return self.rows
+
+    def code(self, name, value):
+        # Dictionary code of `value` in column `name`, or -1 if it never occurs
+        try:
+            return self.dictionaries[name].index(value)
+        except ValueError:
+            return -1
+
+    def _chunks(self, start=None, end=None, device=None, first_row=0):
+        # (row slice, boolean mask) per chunk of rows matching the filters
+        device_code = self.code("device", device) if device is not None else None
+        for lo in range(first_row, self.rows, QUERY_CHUNK_ROWS):
+            rows = slice(lo, min(lo + QUERY_CHUNK_ROWS, self.rows))
+            mask = np.ones(rows.stop - rows.start, dtype=bool)
+            if start is not None or end is not None:
+                ts = self.ts[rows]
+                if start is not None:
+                    mask &= ts >= start
+                if end is not None:
+                    mask &= ts < end
+            if device_code is not None:
+                mask &= self.device[rows] == device_code
+            yield rows, mask
+
+    # --- Queries ---
+
+    def hourly_counts(self, start=None, end=None):
+        # (hour starts as epoch seconds, device names, counts[device, hour])
+        # over entries with a timestamp; hours are epoch-aligned
+        lowest, highest = math.inf, -math.inf
+        for rows, mask in self._chunks(start, end):
+            ts = self.ts[rows][mask]
+            ts = ts[~np.isnan(ts)]
+            if len(ts):
+                lowest = min(lowest, float(ts.min()))
+                highest = max(highest, float(ts.max()))
+        devices = self.dictionaries["device"]
+        if lowest > highest:
+            return np.empty(0), devices, np.zeros((len(devices), 0), dtype=np.int64)
+        first = int(lowest // 3600)
+        hours = int(highest // 3600) - first + 1
+        counts = np.zeros(len(devices) * hours, dtype=np.int64)
+        for rows, mask in self._chunks(start, end):
+            mask &= ~np.isnan(self.ts[rows])
+            hour = (self.ts[rows][mask] // 3600).astype(np.int64) - first
+            cell = self.device[rows][mask].astype(np.int64) * hours + hour
+            counts += np.bincount(cell, minlength=len(counts))
+        return (np.arange(hours) + first) * 3600.0, devices, counts.reshape(len(devices), hours)
+
+    def top_actions(self, n=10, device=None, start=None, end=None):
+        # [(action, count), ...] most frequent first
+        actions = self.dictionaries["action"]
+        counts = np.zeros(len(actions), dtype=np.int64)
+        for rows, mask in self._chunks(start, end, device):
+            counts += np.bincount(self.action[rows][mask], minlength=len(actions))
+        order = np.argsort(counts, kind="stable")[::-1][:n]
+        return [(actions[i], int(counts[i])) for i in order if counts[i]]
+
+    # --- Import ---
+
+    def entries(self, since=None, first_row=0):
+        # Log entries (oldest first) decoded back to LogStore dicts
+        names = {name: self.dictionaries[name] for name in CODED}
+        for rows, mask in self._chunks(since, first_row=first_row):
+            index = np.flatnonzero(mask) + rows.start
+            columns = [self.ts[index].tolist()] + [getattr(self, name)[index].tolist() for name in CODED]
+            for ts, device, action, user in zip(*columns):
+                entry = {"time": "" if ts != ts else time.strftime("%H:%M:%S", time.localtime(ts)),
+                         "device": names["device"][device], "action": names["action"][action],
+                         "user": names["user"][user]}
+                if ts == ts:
+                    entry["ts"] = ts
+                yield entry
+
+    def import_into(self, logs, since=None):
+        # Appends archived entries to a LogStore, only decoding the newest
+        # rows it can hold. Returns how many were added.
+        first_row = max(0, self.rows - logs.max_entries) if logs.max_entries else 0
+        added = 0
+        for entry in self.entries(since, first_row):
+            logs.append(entry)
+            added += 1
+        return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a columnar action log archive.")
+    parser.add_argument("path", nargs="?", default="data/log-archive")
+    parser.add_argument("--days", type=float, default=None, help="only the last N days")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    archive = LogArchive(args.path)
+    start = time.time() - args.days * 86400 if args.days else None
+    print(f"{len(archive):,} entries, {len(archive.dictionaries['device'])} devices")
+    print("top actions:")
+    for action, count in archive.top_actions(args.top, device=args.device, start=start):
+        print(f"  {count:>10,}  {action}")
+    hours, devices, counts = archive.hourly_counts(start=start)
+    if counts.size:
+        busiest = np.argsort(counts, axis=None)[::-1][:args.top]
+        print("busiest device hours:")
+        for cell in busiest:
+            dev, hour = divmod(int(cell), counts.shape[1])
+            if counts[dev, hour]:
+                stamp = time.strftime("%Y-%m-%d %H:00", time.localtime(hours[hour]))
+                print(f"  {counts[dev, hour]:>10,}  {stamp}  {devices[dev]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import collections
+import heapq
+import itertools
+
+# --- Action Log Store ---
+
+# Bounded action log. Entries are kept oldest-first in a ring buffer so that
+# appending is O(1); once `max_entries` is reached the oldest entry is evicted.
+# Iteration and indexing are newest-first, which is the order the views show.
+# A per-device index mirrors the ring buffer so the details view can look up
+# one device's history without scanning the whole log.
+#
+# Every entry gets a sequence number as it is appended. page() returns a
+# cursor built from it (plus the sort value), so the next page starts right
+# after the last row shown no matter how many entries arrived meanwhile.
+# The log archiver uses the same numbers to export only new entries, and
+# `on_evict(seq, entry)` to catch entries leaving before it got to them.
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+class LogStore:
+    def __init__(self, entries=(), max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = collections.deque()
+        self._by_device = {}
+        # Sequence numbers of each device's entries, alongside _by_device
+        self._device_seqs = {}
+        self._next_seq = 0
+        self.on_evict = None
+        for entry in entries:
+            self.append(entry)
+
+    def append(self, entry):
+        if self.max_entries and len(self._entries) >= self.max_entries:
+            self._evict_oldest()
+        self._entries.append(entry)
+        device_entries = self._by_device.get(entry["device"])
+        if device_entries is None:
+            device_entries = self._by_device[entry["device"]] = collections.deque()
+            self._device_seqs[entry["device"]] = collections.deque()
+        device_entries.append(entry)
+        self._device_seqs[entry["device"]].append(self._next_seq)
+        self._next_seq += 1
+
+    def _evict_oldest(self):
+        old = self._entries.popleft()
+        if self.on_evict is not None:
+            self.on_evict(self._next_seq - len(self._entries) - 1, old)
+        # The globally oldest entry is always the oldest one for its device too
+        device_entries = self._by_device[old["device"]]
+        device_entries.popleft()
+        self._device_seqs[old["device"]].popleft()
+        if not device_entries:
+            del self._by_device[old["device"]]
+            del self._device_seqs[old["device"]]
+
+    def for_device(self, dev_id, limit=None):
+        # Newest-first history of a single device
+        device_entries = self._by_device.get(dev_id)
+        if not device_entries:
+            return []
+        if limit is None:
+            return list(reversed(device_entries))
+        result = []
+        for entry in reversed(device_entries):
+            if len(result) >= limit:
+                break
+            result.append(entry)
+        return result
+
+    def _pairs(self, device, descending, after=None):
+        # (seq, entry) in time order, starting after sequence number `after`
+        if device:
+            entries = self._by_device.get(device, ())
+            seqs = self._device_seqs.get(device, ())
+            pairs = zip(reversed(seqs), reversed(entries)) if descending else zip(seqs, entries)
+            if after is not None:
+                if descending:
+                    pairs = itertools.dropwhile(lambda pair: pair[0] >= after, pairs)
+                else:
+                    pairs = itertools.dropwhile(lambda pair: pair[0] <= after, pairs)
+            return pairs
+        # The ring buffer holds consecutive sequence numbers
+        entries = self._entries
+        first = self._next_seq - len(entries)
+        if descending:
+            end = len(entries) if after is None else max(0, min(len(entries), after - first))
+            return zip(itertools.count(first + end - 1, -1), itertools.islice(reversed(entries), len(entries) - end, None))
+        start = 0 if after is None else max(0, min(len(entries), after - first + 1))
+        return zip(itertools.count(first + start), itertools.islice(entries, start, None))
+
+    def _filtered(self, pairs, action, since, until):
+        # query()'s filters over (seq, entry) pairs
+        if action:
+            needle = action.lower()
+            pairs = (p for p in pairs if needle in p[1]["action"].lower())
+        if since:
+            pairs = (p for p in pairs if p[1]["time"] >= since)
+        if until:
+            pairs = (p for p in pairs if p[1]["time"] <= until)
+        return pairs
+
+    def query(self, device=None, action=None, since=None, until=None,
+              sort_by="time", descending=True, offset=0, limit=50):
+        # One page of matching entries plus whether more follow. A device
+        # filter is served from the per-device index; `action` is a
+        # case-insensitive substring, `since`/`until` compare "HH:MM:SS"
+        # strings. Time order is insertion order, so the default sort only
+        # walks as far as the requested page.
+        if device:
+            source = self._by_device.get(device, ())
+        else:
+            source = self._entries
+
+        matches = reversed(source) if descending else iter(source)
+        if action:
+            needle = action.lower()
+            matches = (e for e in matches if needle in e["action"].lower())
+        if since:
+            matches = (e for e in matches if e["time"] >= since)
+        if until:
+            matches = (e for e in matches if e["time"] <= until)
+
+        wanted = offset + limit + 1
+        if sort_by != "time":
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            matches = pick(wanted, matches, key=lambda e: e[sort_by])
+
+        page = list(itertools.islice(matches, offset, wanted))
+        return page[:limit], len(page) > limit
+
+    def page(self, device=None, action=None, since=None, until=None,
+             sort_by="time", descending=True, after=None, limit=50, upto=None):
+        # Like query(), but continues from `after`, the cursor returned with
+        # the previous page, instead of an offset. Returns the entries and
+        # the cursor for the next page (None when there is none). With
+        # `upto` (a later cursor) it returns every entry up to and including
+        # that one instead of `limit`, e.g. to reload a page dropped from
+        # the top of a window without a gap to the page below it.
+        if sort_by == "time":
+            pairs = self._pairs(device, descending, after[0] if after else None)
+            if upto is not None:
+                if descending:
+                    pairs = itertools.takewhile(lambda pair: pair[0] >= upto[0], pairs)
+                else:
+                    pairs = itertools.takewhile(lambda pair: pair[0] <= upto[0], pairs)
+            matches = self._filtered(pairs, action, since, until)
+            if upto is not None:
+                return [entry for _, entry in matches], upto
+        else:
+            # Keyset over (sort value, seq), so equal values keep a stable order
+            def key(pair):
+                return pair[1][sort_by], pair[0]
+
+            matches = self._filtered(self._pairs(device, descending), action, since, until)
+            if after is not None:
+                bound = (after[1], after[0])
+                if descending:
+                    matches = (p for p in matches if key(p) < bound)
+                else:
+                    matches = (p for p in matches if key(p) > bound)
+            if upto is not None:
+                last = (upto[1], upto[0])
+                if descending:
+                    matches = (p for p in matches if key(p) >= last)
+                else:
+                    matches = (p for p in matches if key(p) <= last)
+                return [entry for _, entry in sorted(matches, key=key, reverse=descending)], upto
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            matches = pick(limit + 1, matches, key=key)
+        found = list(itertools.islice(matches, limit + 1))
+        cursor = None
+        if len(found) > limit:
+            seq, entry = found[limit - 1]
+            cursor = (seq, entry[sort_by] if sort_by != "time" else None)
+        return [entry for _, entry in found[:limit]], cursor
+
+    def oldest_first(self):
+        return iter(self._entries)
+
+    @property
+    def last_seq(self):
+        # Sequence number of the newest entry; -1 before the first
+        return self._next_seq - 1
+
+    def since_seq(self, seq):
+        # Entries with a sequence number after `seq`, oldest first
+        first = self._next_seq - len(self._entries)
+        return itertools.islice(self._entries, max(0, seq + 1 - first), None)
+
+    def devices(self):
+        return list(self._by_device)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_device.clear()
+        self._device_seqs.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return reversed(self._entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self._entries)
+        if not 0 <= index < len(self._entries):
+            raise IndexError("log index out of range")
+        return self._entries[len(self._entries) - 1 - index]
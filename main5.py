@@ -1,57 +1,193 @@
 import flet as ft
+import collections
 import datetime
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
 
-# --- Data Models & State ---
+from core import AppState
+from bindings import DeviceBinder
+from slider_pipeline import SliderPipeline
+from hub import StateHub
+from timeseries import PowerMeter
+from simulator import FleetSimulator
+from cameras import Camera, CameraPipeline, first_source
+from rules import RuleEngine
+from scheduler import Scheduler
+from drivers import load_driver
+from headless import HeadlessController, serve
+from instrumentation import Metrics, SamplingProfiler, instrument_page
+from logarchive import LogArchiver
+from presentation import DEVICE_TYPES, action_text, device_type, labels, status_text, value_text
+from status import NetworkProvider, SecurityProvider, StatusBoard, StubProvider, WeatherProvider
+from wal import DataDirLocked
 
-class Device:
-    def __init__(self, dev_id, name, dev_type, state, details_desc, bg_color):
-        self.id = dev_id
-        self.name = name
-        self.type = dev_type
-        self.state = state  # Can be "ON", "OFF", "LOCKED", "UNLOCKED", or a number/float
-        self.details_desc = details_desc
-        self.bg_color = bg_color
+# --- App Wiring ---
 
-class AppState:
-    def __init__(self):
-        self.devices = {
-            "light1": Device("light1", "Living Room Light", "light", "OFF", "Tap to switch the light.", "orange100"),
-            "door1": Device("door1", "Front Door", "lock", "LOCKED", "Tap to lock / unlock the door.", "indigo100"),
-            "thermostat1": Device("thermostat1", "Thermostat", "thermostat", 22.0, "Use slider to change temperature.", "deepOrange50"),
-            "fan1": Device("fan1", "Ceiling Fan", "fan", 0, "0 = OFF, 3 = MAX", "cyan100"),
-        }
-        self.logs = [
-            {"time": "08:12:32", "device": "light1", "action": "Turn ON", "user": "User"},
-            {"time": "08:13:23", "device": "light1", "action": "Turn OFF", "user": "User"},
-            {"time": "08:13:26", "device": "light1", "action": "Turn ON", "user": "User"},
-        ]
+app_state = AppState()
+# Shared by every session so its metrics cover all slider traffic
+slider_pipeline = SliderPipeline(app_state)
+# Fans state deltas out to every connected session
+state_hub = StateHub(app_state)
+# Per-device and total power draw history for the Statistics chart
+power_meter = PowerMeter(app_state)
+app_state.add_listener(power_meter.on_change)
+# Room temperatures, HVAC duty and power draw for the whole fleet
+simulator = FleetSimulator.from_state(app_state)
+app_state.add_listener(simulator.on_change)
+# Automations triggered by device changes
+rule_engine = RuleEngine(app_state)
+app_state.add_listener(rule_engine.on_change)
+# Pushes state changes to the device gateways, if data/gateways.json has any
+device_driver = load_driver("data/gateways.json")
+# Timed device actions (persisted with the state) and the status card clock
+scheduler = Scheduler(app_state, path="data/schedules.json")
+# Handler, view build and page update latencies; exported under data/
+metrics = Metrics()
+profiler = SamplingProfiler()
+METRICS_EXPORT_INTERVAL = 15.0
+PROFILE_PATH = "data/profile.folded"
+# Months of action history beyond the in-memory log, exported as entries
+# arrive (and before the log evicts them)
+log_archiver = LogArchiver(app_state.logs, "data/log-archive", lock=app_state.lock)
+LOG_EXPORT_INTERVAL = 60.0
+# Room/type groups and search for the overview grid; the state's own index
+device_index = app_state.index
+# Live feeds come from assets/cameras/<id>/ (an image sequence) or
+# assets/cameras/<id>.mjpg; without either the camera shows its still
+camera_pipeline = CameraPipeline([
+    Camera("front_door", "Front Door", first_source("assets/cameras/front_door", "assets/cameras/front_door.mjpg", "assets/front_door.png"), fallback_src="/front_door.png"),
+    Camera("back_door", "Back Door", first_source("assets/cameras/back_door", "assets/cameras/back_door.mjpg", "assets/back_door.png"), fallback_src="/back_door.png"),
+], fps=5)
+# Weather, network and alarm state for the System Status card, fetched in
+# the background; SMARTHOME_OFFLINE=1 swaps the network ones for stubs
+if os.environ.get("SMARTHOME_OFFLINE"):
+    status_providers = [StubProvider("weather", [("Kuopio: -2°C, Snowy", True)]),
+                        StubProvider("network", [("Network Online", True)])]
+else:
+    status_providers = [WeatherProvider("Kuopio", 62.89, 27.68), NetworkProvider()]
+status_board = StatusBoard(status_providers + [SecurityProvider(app_state)])
 
-    def get_device(self, dev_id):
-        return self.devices.get(dev_id)
+def export_metrics():
+    # Every METRICS_EXPORT_INTERVAL seconds and on shutdown
+    metrics.write("data/metrics.prom")
+    metrics.write("data/metrics.json")
 
-    def toggle_device(self, dev_id):
-        dev = self.devices.get(dev_id)
-        if dev:
-            if dev.type == "light":
-                dev.state = "ON" if dev.state == "OFF" else "OFF"
-            elif dev.type == "lock":
-                dev.state = "LOCKED" if dev.state == "UNLOCKED" else "UNLOCKED"
-            self.log_action(dev_id, f"Set to {dev.state}")
+# --- Views ---
 
-    def set_device_value(self, dev_id, value):
-        dev = self.devices.get(dev_id)
-        if dev:
-            dev.state = value
-            # self.log_action(dev_id, f"Set to {value}") # Optional: log slider changes
+LOG_PAGE_SIZE = 50
+LOG_COLUMNS = ["time", "device", "action", "user"]
+# At most LOG_WINDOW_PAGES pages of log rows exist at once; rows have a
+# fixed height so dropping a page can keep the scroll position
+LOG_WINDOW_PAGES = 4
+LOG_ROW_HEIGHT = 40
+LOG_TABLE_HEIGHT = 480
+CHART_SPAN = 24 * 3600
+# (provider, icon, icon color while ok) of the System Status card rows
+STATUS_ROWS = (("weather", "cloud", "blue400"), ("network", "wifi", "green500"), ("security", "security", "green500"))
+STATUS_DOWN_COLOR = "blueGrey300"
+# Overview grid rows have fixed heights so the window of built rows can be
+# placed from the scroll offset alone; rows beyond the viewport kept built
+# on either side
+GRID_ROW_HEIGHT = 220
+GRID_HEADER_HEIGHT = 40
+GRID_SPACING = 20
+GRID_OVERSCAN_ROWS = 4
 
-    def log_action(self, dev_id, action):
-        now = datetime.datetime.now().strftime("%H:%M:%S")
-        self.logs.insert(0, {"time": now, "device": dev_id, "action": action, "user": "User"})
+# --- Styles ---
 
+# One instance of each style shared by every card and button that uses it,
+# instead of a fresh copy per control on every build
+CARD_SHADOW = ft.BoxShadow(spread_radius=1, blur_radius=10, color="#1A000000", offset=ft.Offset(0, 4))
+PANEL_SHADOW = ft.BoxShadow(spread_radius=1, blur_radius=10, color="#0D000000", offset=ft.Offset(0, 4))
+LINK_STYLE = ft.ButtonStyle(color="blue600")
+PILL_BUTTON_STYLE = ft.ButtonStyle(color="blue800", bgcolor="blue50", shape=ft.RoundedRectangleBorder(radius=10))
+ACTION_BUTTON_STYLE = ft.ButtonStyle(color="blueGrey800", bgcolor="white", elevation=2)
 
-app_state = AppState()
+def chart_points(page):
+    # About one point per 3 px of chart width, never more than a few hundred
+    width = (page.width or 1100) - 100
+    return max(50, min(400, int(width // 3)))
 
-# --- Views ---
+def grid_columns(page):
+    # Cards per grid row: what fits beside the 300 px widget column
+    width = (page.width or 1100) - 60 - 300 - 30
+    return max(1, int(width + 20) // 340)
+
+def grid_height(page):
+    return max(400, (page.height or 900) - 200)
+
+def group_title(group, group_by):
+    if group_by is None:
+        return "All devices"
+    if group_by == "type":
+        return DEVICE_TYPES[group].title if group in DEVICE_TYPES else group.title()
+    return group
+
+def device_state(dev):
+    return dev.state
+
+def bind_attr(attr, label):
+    # Render function for DeviceBinder: set `attr` only when it changed
+    def render(control, dev):
+        value = label(dev)
+        if getattr(control, attr) == value:
+            return False
+        setattr(control, attr, value)
+        return True
+    return render
+
+RENDER_STATUS = bind_attr("value", status_text)
+RENDER_ACTION = bind_attr("text", action_text)
+RENDER_VALUE = bind_attr("value", value_text)
+RENDER_SLIDER = bind_attr("value", device_state)
+
+class ViewCache:
+    # One session's built views by route; a view is rebuilt only when the
+    # version it was built for changes
+    def __init__(self):
+        self._views = {}
+        self.builds = 0
+        self.hits = 0
+
+    def get(self, route, version, build):
+        cached = self._views.get(route)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        view = build()
+        self._views[route] = (version, view)
+        self.builds += 1
+        return view
+
+class IsolatedRow(ft.Row):
+    # page.update() stops at isolated controls instead of walking their
+    # whole subtree. Everything inside the overview is updated through
+    # targeted updates (binder, slider labels, camera), so a navigation
+    # doesn't diff thousands of card controls that can't have changed.
+    def is_isolated(self):
+        return True
+
+def build_header(page):
+    return ft.Container(
+        content=ft.Row(
+            [
+                ft.Row([
+                    ft.Icon("home", size=30, color="blue600"),
+                    ft.Text("Smart Home", size=24, weight=ft.FontWeight.BOLD, color="blueGrey900"),
+                ]),
+                ft.Row(
+                    [
+                        ft.TextButton("Overview", on_click=lambda _: page.go("/"), style=LINK_STYLE),
+                        ft.TextButton("Statistics", on_click=lambda _: page.go("/stats"), style=LINK_STYLE),
+                    ]
+                )
+            ],
+            alignment=ft.MainAxisAlignment.SPACE_BETWEEN
+        ),
+        padding=ft.padding.only(bottom=20)
+    )
 
 def main(page: ft.Page):
     page.title = "Smart Home Controller + Simulator"
@@ -65,70 +201,45 @@ def main(page: ft.Page):
     }
     page.theme = ft.Theme(font_family="Roboto")
 
+    instrument_page(page, metrics)
+
+    # Pushes device state changes from any session to this session's controls
+    binder = DeviceBinder(page, app_state)
+    state_hub.subscribe(page.session_id, binder.notify)
+
+    def on_close(e):
+        state_hub.unsubscribe(page.session_id)
+        camera_pipeline.unsubscribe(page.session_id)
+        scheduler.cancel(f"clock:{page.session_id}")
+        status_board.unsubscribe(page.session_id)
+
+    page.on_close = on_close
+
+    # Views built for this session, by route
+    views = ViewCache()
+
+    def make_view(route, body):
+        # Each view gets its own header; a control can only have one parent
+        return ft.View(route, [build_header(page), body], padding=30, bgcolor="grey50", scroll=ft.ScrollMode.AUTO)
+
     def route_change(route):
-        page.views.clear()
-        
-        # Common Header
-        header = ft.Container(
-            content=ft.Row(
-                [
-                    ft.Row([
-                        ft.Icon("home", size=30, color="blue600"),
-                        ft.Text("Smart Home", size=24, weight=ft.FontWeight.BOLD, color="blueGrey900"),
-                    ]),
-                    ft.Row(
-                        [
-                            ft.TextButton("Overview", on_click=lambda _: page.go("/"), style=ft.ButtonStyle(color="blue600")),
-                            ft.TextButton("Statistics", on_click=lambda _: page.go("/stats"), style=ft.ButtonStyle(color="blue600")),
-                        ]
-                    )
-                ],
-                alignment=ft.MainAxisAlignment.SPACE_BETWEEN
-            ),
-            padding=ft.padding.only(bottom=20)
+        # The overview always sits at the bottom of the view stack and is
+        # reused until the device registry or the scene list changes, so
+        # coming back to it sends nothing but the removal of the view above.
+        # Statistics and details are pushed on top and rebuilt per visit,
+        # since they show a snapshot of the logs and power history.
+        overview = views.get(
+            "/",
+            (app_state.devices_version, tuple(app_state.scenes.names())),
+            lambda: make_view("/", create_overview_view(page, binder)),
         )
-
-        if page.route == "/":
-            page.views.append(
-                ft.View(
-                    "/",
-                    [
-                        header,
-                        create_overview_view(page)
-                    ],
-                    padding=30,
-                    bgcolor="grey50",
-                    scroll=ft.ScrollMode.AUTO
-                )
-            )
-        elif page.route == "/stats":
-            page.views.append(
-                ft.View(
-                    "/stats",
-                    [
-                        header,
-                        create_statistics_view(page)
-                    ],
-                    padding=30,
-                    bgcolor="grey50",
-                    scroll=ft.ScrollMode.AUTO
-                )
-            )
+        stack = [overview]
+        if page.route == "/stats":
+            stack.append(make_view("/stats", create_statistics_view(page)))
         elif page.route.startswith("/details/"):
             dev_id = page.route.split("/")[-1]
-            page.views.append(
-                ft.View(
-                    f"/details/{dev_id}",
-                    [
-                        header,
-                        create_details_view(page, dev_id)
-                    ],
-                    padding=30,
-                    bgcolor="grey50",
-                    scroll=ft.ScrollMode.AUTO
-                )
-            )
-        
+            stack.append(make_view(f"/details/{dev_id}", create_details_view(page, dev_id)))
+        page.views[:] = stack
         page.update()
 
     def view_pop(view):
@@ -140,77 +251,53 @@ def main(page: ft.Page):
     page.on_view_pop = view_pop
     page.go(page.route)
 
-def create_overview_view(page):
-    
-    # Dictionaries to store mutable controls
-    # Key: dev_id, Value: Control
-    status_texts = {}
-    action_buttons = {}
-    value_labels = {}
-    slider_controls = {}
+@metrics.timed("view_build_seconds", view="overview")
+def create_overview_view(page, binder):
+    # Controls from the previous overview are gone; bind the new ones
+    binder.clear()
 
     def go_details(e):
         dev_id = e.control.data
         page.go(f"/details/{dev_id}")
 
+    # State changes reach the controls through the binder, which only
+    # updates the controls whose device actually changed
+    @metrics.timed("handler_seconds", sampled=True, handler="toggle_click")
     def toggle_click(e):
-        dev_id = e.control.data
-        app_state.toggle_device(dev_id)
-        dev = app_state.get_device(dev_id)
-        
-        # Update UI
-        if dev_id in status_texts:
-            status_text = f"Status: {dev.state}"
-            if dev.type == "lock":
-                status_text = f"Door: {dev.state}"
-            status_texts[dev_id].value = status_text
-            
-        if dev_id in action_buttons:
-            btn_text = "Turn ON" if dev.state == "OFF" else "Turn OFF"
-            if dev.type == "lock":
-                btn_text = "Unlock" if dev.state == "LOCKED" else "Lock"
-            action_buttons[dev_id].text = btn_text
-            
-        page.update()
+        app_state.toggle_device(e.control.data)
 
+    # While dragging only the label follows every tick; AppState writes are
+    # rate limited by the pipeline and the final value lands on change end
+    @metrics.timed("handler_seconds", sampled=True, handler="slider_change")
     def slider_change(e):
         dev_id = e.control.data
-        val = e.control.value
-        app_state.set_device_value(dev_id, val)
-        dev = app_state.get_device(dev_id)
+        txt_val = value_texts[dev_id]
+        txt_val.value = labels(app_state.get_device(dev_id), e.control.value).value
+        txt_val.update()
+        slider_pipeline.on_change(dev_id, e.control.value)
 
-        if dev_id in value_labels:
-            val_text = f"Set point: {dev.state} °C" if dev.type == "thermostat" else f"Fan speed: {int(dev.state)}"
-            value_labels[dev_id].value = val_text
-            
-        page.update()
+    @metrics.timed("handler_seconds", sampled=True, handler="slider_change_end")
+    def slider_change_end(e):
+        slider_pipeline.on_change_end(e.control.data, e.control.value)
+
+    value_texts = {}
 
     # Helper to build On/Off Card
     def build_on_off_card(dev_id, icon, icon_color):
         dev = app_state.get_device(dev_id)
-        btn_text = "Turn ON" if dev.state == "OFF" else "Turn OFF"
-        if dev.type == "lock":
-            btn_text = "Unlock" if dev.state == "LOCKED" else "Lock"
-        
-        # Status text
-        status_str = f"Status: {dev.state}"
-        if dev.type == "lock":
-            status_str = f"Door: {dev.state}"
-        
+
         # Create controls
-        txt_status = ft.Text(status_str, size=12, weight=ft.FontWeight.W_500)
+        shown = labels(dev)
+        txt_status = ft.Text(shown.status, size=12, weight=ft.FontWeight.W_500)
         btn_action = ft.ElevatedButton(
-            btn_text, 
-            data=dev_id, 
-            on_click=toggle_click, 
-            bgcolor="white", 
-            color="blueGrey800",
-            elevation=2
+            shown.action,
+            data=dev_id,
+            on_click=toggle_click,
+            style=ACTION_BUTTON_STYLE,
         )
 
-        # Store refs
-        status_texts[dev_id] = txt_status
-        action_buttons[dev_id] = btn_action
+        binder.bind(dev_id, txt_status, RENDER_STATUS)
+        binder.bind(dev_id, btn_action, RENDER_ACTION)
 
         return ft.Container(
             content=ft.Column(
@@ -225,7 +312,7 @@ def create_overview_view(page):
                     ft.Container(height=10),
                     ft.Row(
                         [
-                            ft.TextButton("Details", data=dev_id, on_click=go_details, style=ft.ButtonStyle(color="blue600")),
+                            ft.TextButton("Details", data=dev_id, on_click=go_details, style=LINK_STYLE),
                             btn_action
                         ],
                         alignment=ft.MainAxisAlignment.SPACE_BETWEEN
@@ -237,35 +324,30 @@ def create_overview_view(page):
             padding=20,
             border_radius=15,
             width=320,
-            shadow=ft.BoxShadow(
-                spread_radius=1,
-                blur_radius=10,
-                color="#1A000000",
-                offset=ft.Offset(0, 4),
-            )
+            shadow=CARD_SHADOW
         )
 
     # Helper to build Slider Card
     def build_slider_card(dev_id, icon, icon_color, min_val, max_val, divisions, label_fmt):
         dev = app_state.get_device(dev_id)
-        
-        # Dynamic label for value
-        val_text = f"Set point: {dev.state} °C" if dev.type == "thermostat" else f"Fan speed: {int(dev.state)}"
-        
-        txt_val = ft.Text(val_text, size=12, weight=ft.FontWeight.W_500)
-        value_labels[dev_id] = txt_val
+
+        txt_val = ft.Text(value_text(dev), size=12, weight=ft.FontWeight.W_500)
 
         slider = ft.Slider(
-            min=min_val, 
-            max=max_val, 
-            divisions=divisions, 
-            value=dev.state, 
-            label=label_fmt, 
+            min=min_val,
+            max=max_val,
+            divisions=divisions,
+            value=dev.state,
+            label=label_fmt,
             data=dev_id,
             on_change=slider_change,
+            on_change_end=slider_change_end,
             active_color="blue600"
         )
-        slider_controls[dev_id] = slider
+        value_texts[dev_id] = txt_val
+
+        binder.bind(dev_id, txt_val, RENDER_VALUE)
+        binder.bind(dev_id, slider, RENDER_SLIDER)
 
         return ft.Container(
             content=ft.Column(
@@ -281,7 +363,7 @@ def create_overview_view(page):
                     ft.Row(
                         [
                             ft.Container(), # Spacer
-                            ft.TextButton("Details", data=dev_id, on_click=go_details, style=ft.ButtonStyle(color="blue600")),
+                            ft.TextButton("Details", data=dev_id, on_click=go_details, style=LINK_STYLE),
                         ],
                         alignment=ft.MainAxisAlignment.SPACE_BETWEEN
                     )
@@ -292,19 +374,54 @@ def create_overview_view(page):
             padding=20,
             border_radius=15,
             width=320,
-            shadow=ft.BoxShadow(
-                spread_radius=1,
-                blur_radius=10,
-                color="#1A000000",
-                offset=ft.Offset(0, 4),
-            )
+            shadow=CARD_SHADOW
         )
 
     # Helper to build System Status Card
     def build_system_status_card():
-        now = datetime.datetime.now().strftime("%H:%M")
-        date_str = datetime.datetime.now().strftime("%A, %d %B")
-        
+        now = datetime.datetime.now()
+        txt_time = ft.Text(now.strftime("%H:%M"), size=28, weight=ft.FontWeight.BOLD, color="blueGrey900")
+        txt_date = ft.Text(now.strftime("%A, %d %B"), size=14, color="blueGrey600")
+
+        def tick_clock():
+            # Scheduler thread, on every minute boundary; sends only the
+            # texts that changed
+            now = datetime.datetime.now()
+            changed = []
+            for control, value in ((txt_time, now.strftime("%H:%M")), (txt_date, now.strftime("%A, %d %B"))):
+                if control.value != value:
+                    control.value = value
+                    changed.append(control)
+            if changed:
+                page.update(*changed)
+
+        # Replaces this session's clock job from a previous overview build
+        scheduler.call_cron("* * * * *", tick_clock, job_id=f"clock:{page.session_id}")
+
+        # Cached provider values only; a stale one is refreshed in the
+        # background and arrives through on_status
+        def provider_text(value):
+            # Kept past its ttl because refreshing it failed
+            return f"{value.text} (stale)" if value.stale else value.text
+
+        status_controls = {}
+        status_rows = []
+        for name, icon, color in STATUS_ROWS:
+            value = status_board.read(name)
+            status_icon = ft.Icon(icon, size=30, color=color if value.ok else STATUS_DOWN_COLOR)
+            txt_status = ft.Text(provider_text(value), size=16, weight=ft.FontWeight.W_500, color="blueGrey800")
+            status_controls[name] = (status_icon, txt_status, color)
+            status_rows += [ft.Container(height=20 if not status_rows else 10), ft.Row([status_icon, txt_status])]
+
+        def on_status(name, value):
+            # Status worker thread, only for values that changed
+            status_icon, txt_status, color = status_controls[name]
+            status_icon.color = color if value.ok else STATUS_DOWN_COLOR
+            txt_status.value = provider_text(value)
+            page.update(status_icon, txt_status)
+
+        status_board.subscribe(page.session_id, on_status)
+
         return ft.Container(
             content=ft.Column(
                 [
@@ -313,25 +430,11 @@ def create_overview_view(page):
                     ft.Row([
                         ft.Icon("access_time", size=40, color="blue600"),
                         ft.Column([
-                            ft.Text(now, size=28, weight=ft.FontWeight.BOLD, color="blueGrey900"),
-                            ft.Text(date_str, size=14, color="blueGrey600"),
+                            txt_time,
+                            txt_date,
                         ], spacing=0)
                     ]),
-                    ft.Container(height=20),
-                    ft.Row([
-                        ft.Icon("cloud", size=30, color="blue400"),
-                        ft.Text("Kuopio: -2°C, Snowy", size=16, weight=ft.FontWeight.W_500, color="blueGrey800"),
-                    ]),
-                    ft.Container(height=10),
-                    ft.Row([
-                        ft.Icon("wifi", size=30, color="green500"),
-                        ft.Text("Network Online", size=16, weight=ft.FontWeight.W_500, color="blueGrey800"),
-                    ]),
-                    ft.Container(height=10),
-                    ft.Row([
-                        ft.Icon("security", size=30, color="green500"),
-                        ft.Text("System Armed", size=16, weight=ft.FontWeight.W_500, color="blueGrey800"),
-                    ]),
+                    *status_rows,
                 ],
                 spacing=5
             ),
@@ -339,90 +442,17 @@ def create_overview_view(page):
             padding=20,
             border_radius=15,
             width=300,
-            shadow=ft.BoxShadow(
-                spread_radius=1,
-                blur_radius=10,
-                color="#1A000000",
-                offset=ft.Offset(0, 4),
-            )
+            shadow=CARD_SHADOW
         )
 
     # Helper to build Scenes Card
     def build_scenes_card():
+        @metrics.timed("handler_seconds", handler="scene_click")
         def scene_click(e):
             scene_name = e.control.text
-            if scene_name == "Home":
-                app_state.toggle_device("light1") # Ensure ON? Simple toggle for now or set specific state
-                # Better: Set specific states
-                dev_light = app_state.get_device("light1")
-                dev_light.state = "ON"
-                dev_door = app_state.get_device("door1")
-                dev_door.state = "UNLOCKED"
-                app_state.log_action("SCENE", "Activated Home Scene")
-                
-            elif scene_name == "Away":
-                dev_light = app_state.get_device("light1")
-                dev_light.state = "OFF"
-                dev_door = app_state.get_device("door1")
-                dev_door.state = "LOCKED"
-                app_state.log_action("SCENE", "Activated Away Scene")
-
-            elif scene_name == "Night":
-                dev_light = app_state.get_device("light1")
-                dev_light.state = "OFF"
-                dev_door = app_state.get_device("door1")
-                dev_door.state = "LOCKED"
-                dev_fan = app_state.get_device("fan1")
-                dev_fan.state = 1
-                app_state.log_action("SCENE", "Activated Night Scene")
-                
-            elif scene_name == "Party":
-                dev_light = app_state.get_device("light1")
-                dev_light.state = "ON"
-                dev_door = app_state.get_device("door1")
-                dev_door.state = "UNLOCKED"
-                dev_fan = app_state.get_device("fan1")
-                dev_fan.state = 2
-                app_state.log_action("SCENE", "Activated Party Scene")
-
-            # Force UI update for all devices
-            # We need to update the specific controls. 
-            # Since we don't have easy access to them here without refetching or storing them globally,
-            # we can trigger a full page update or call the update logic if we refactor.
-            # For now, let's just update the page and rely on the fact that we might need to 
-            # manually update the text/buttons if they are not reactive.
-            # Wait, the controls in `create_overview_view` are created once. 
-            # We need to update `status_texts` and `action_buttons`.
-            
-            # To do this properly, we should iterate over the `status_texts` and update them.
-            # But `status_texts` is local to `create_overview_view`.
-            # We can access them if we define `scene_click` inside `create_overview_view` (which it is).
-            
-            for dev_id, txt in status_texts.items():
-                dev = app_state.get_device(dev_id)
-                status_str = f"Status: {dev.state}"
-                if dev.type == "lock":
-                    status_str = f"Door: {dev.state}"
-                txt.value = status_str
-                
-            for dev_id, btn in action_buttons.items():
-                dev = app_state.get_device(dev_id)
-                btn_text = "Turn ON" if dev.state == "OFF" else "Turn OFF"
-                if dev.type == "lock":
-                    btn_text = "Unlock" if dev.state == "LOCKED" else "Lock"
-                btn.text = btn_text
-
-            for dev_id, slider in slider_controls.items():
-                dev = app_state.get_device(dev_id)
-                slider.value = dev.state
-            
-            for dev_id, txt in value_labels.items():
-                 dev = app_state.get_device(dev_id)
-                 val_text = f"Set point: {dev.state} °C" if dev.type == "thermostat" else f"Fan speed: {int(dev.state)}"
-                 txt.value = val_text
-
-            page.update()
-            
+            # The binder pushes the changed devices' controls on its own
+            app_state.apply_scene(scene_name)
+
             # Show feedback
             # Try page.open if available, else fallback
             try:
@@ -432,72 +462,71 @@ def create_overview_view(page):
                 page.snack_bar.open = True
                 page.update()
 
+        # Two scene buttons per row, one row per pair of defined scenes
+        buttons = [
+            ft.ElevatedButton(name, icon=app_state.scenes.icon(name), on_click=scene_click, style=PILL_BUTTON_STYLE)
+            for name in app_state.scenes.names()
+        ]
+        scene_rows = []
+        for i in range(0, len(buttons), 2):
+            scene_rows.append(ft.Container(height=10))
+            scene_rows.append(ft.Row(buttons[i:i + 2], alignment=ft.MainAxisAlignment.SPACE_BETWEEN))
+
         return ft.Container(
             content=ft.Column(
                 [
                     ft.Text("Quick Scenes", weight=ft.FontWeight.BOLD, size=18, color="blueGrey800"),
-                    ft.Container(height=10),
-                    ft.Row([
-                        ft.ElevatedButton("Home", icon="home", on_click=scene_click, bgcolor="blue50", color="blue800", style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=10))),
-                        ft.ElevatedButton("Away", icon="directions_walk", on_click=scene_click, bgcolor="blue50", color="blue800", style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=10))),
-                    ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                    ft.Container(height=10),
-                    ft.Row([
-                        ft.ElevatedButton("Night", icon="bedtime", on_click=scene_click, bgcolor="blue50", color="blue800", style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=10))),
-                        ft.ElevatedButton("Party", icon="music_note", on_click=scene_click, bgcolor="blue50", color="blue800", style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=10))),
-                    ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                ],
+                ] + scene_rows,
                 spacing=5
             ),
             bgcolor="white",
             padding=20,
             border_radius=15,
             width=300,
-            shadow=ft.BoxShadow(
-                spread_radius=1,
-                blur_radius=10,
-                color="#1A000000",
-                offset=ft.Offset(0, 4),
-            )
+            shadow=CARD_SHADOW
         )
 
     # Helper to build Camera Card
     def build_camera_card():
-        # Camera definitions
-        cameras = [
-            {"name": "Front Door", "src": "/front_door.png"},
-            {"name": "Back Door", "src": "/back_door.png"}
-        ]
-        
-        # We need to store the current camera index. 
+        cameras = camera_pipeline.cameras
         current_cam = [0] # List to be mutable in closure
 
-        # Initial Image
-        cam = cameras[current_cam[0]]
-        
+        def show_frame(camera):
+            # Warm frame from the pipeline if there is one, else the still
+            if camera.frame is not None:
+                img_control.src_base64 = camera.frame
+                img_control.src = None
+            else:
+                img_control.src_base64 = None
+                img_control.src = camera.fallback_src
+
         img_control = ft.Image(
-            src=cam['src'],
             width=300,
             height=200,
             fit=ft.ImageFit.COVER,
             border_radius=10,
             gapless_playback=True
         )
-        
-        txt_cam_name = ft.Text(f"CAM 0{current_cam[0]+1} - {cam['name']}", color="white", size=12, weight=ft.FontWeight.BOLD)
+        show_frame(cameras[0])
+
+        txt_cam_name = ft.Text(f"CAM 01 - {cameras[0].name}", color="white", size=12, weight=ft.FontWeight.BOLD)
+
+        def on_frame(camera):
+            # Pipeline thread, at most its fps and only for changed frames
+            if camera is cameras[current_cam[0]]:
+                show_frame(camera)
+                img_control.update()
+
+        camera_pipeline.subscribe(page.session_id, on_frame)
 
+        @metrics.timed("handler_seconds", handler="next_camera")
         def next_camera(e):
-            # Cycle camera
+            # Cycle camera; its latest frame is already encoded
             current_cam[0] = (current_cam[0] + 1) % len(cameras)
             cam = cameras[current_cam[0]]
-            
-            # Update Image
-            img_control.src = cam['src']
-            
-            # Update Label
-            txt_cam_name.value = f"CAM 0{current_cam[0]+1} - {cam['name']}"
-            
-            page.update()
+            show_frame(cam)
+            txt_cam_name.value = f"CAM 0{current_cam[0]+1} - {cam.name}"
+            page.update(img_control, txt_cam_name)
 
         return ft.Container(
             content=ft.Column(
@@ -522,7 +551,7 @@ def create_overview_view(page):
                         ]
                     ),
                     ft.Container(height=10),
-                    ft.ElevatedButton("Switch Camera", icon="switch_camera", on_click=next_camera, bgcolor="blue50", color="blue800", style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=10))),
+                    ft.ElevatedButton("Switch Camera", icon="switch_camera", on_click=next_camera, style=PILL_BUTTON_STYLE),
                 ],
                 spacing=5
             ),
@@ -530,40 +559,163 @@ def create_overview_view(page):
             padding=20,
             border_radius=15,
             width=300,
-            shadow=ft.BoxShadow(
-                spread_radius=1,
-                blur_radius=10,
-                color="#1A000000",
-                offset=ft.Offset(0, 4),
-            )
+            shadow=CARD_SHADOW
         )
 
-    return ft.Row(
+    def build_card(dev_id):
+        shown = device_type(app_state.get_device(dev_id))
+        if shown.card == "on_off":
+            return build_on_off_card(dev_id, shown.icon, shown.icon_color)
+        return build_slider_card(dev_id, shown.icon, shown.icon_color, *shown.slider)
+
+    # Device grid: the matching devices are laid out as a flat list of rows
+    # (group headers and rows of cards), but only the rows in and around the
+    # viewport exist as controls. Two spacers stand in for the rows above and
+    # below that window, so the list scrolls over the whole grid; as it
+    # scrolls the window moves, and rows leaving it are dropped and unbound.
+    # Cards per row follow the window width.
+    grid = {"query": "", "group_by": "type", "columns": grid_columns(page), "rows": [], "offsets": [0],
+            "window": (0, 0), "built": {}, "pixels": 0}
+    top_spacer = ft.Container(height=0)
+    bottom_spacer = ft.Container(height=0)
+
+    def layout_rows():
+        rows = []
+        columns = grid["columns"]
+        with app_state.lock:
+            groups = device_index.grouped(grid["query"], grid["group_by"], DEVICE_TYPES)
+        for group, dev_ids in groups:
+            rows.append(("header", group_title(group, grid["group_by"]), len(dev_ids)))
+            for i in range(0, len(dev_ids), columns):
+                rows.append(("cards", dev_ids[i:i + columns]))
+        return rows
+
+    def build_row(row):
+        if row[0] == "header":
+            return ft.Container(
+                ft.Text(f"{row[1]} ({row[2]})", weight=ft.FontWeight.BOLD, size=18, color="blueGrey800"),
+                padding=ft.padding.only(top=10),
+                height=GRID_HEADER_HEIGHT,
+            )
+        # Cards change only through targeted updates, see IsolatedRow
+        return ft.Container(IsolatedRow([build_card(dev_id) for dev_id in row[1]], spacing=20), height=GRID_ROW_HEIGHT)
+
+    def release_row(row):
+        if row[0] == "cards":
+            binder.unbind(row[1])
+            for dev_id in row[1]:
+                value_texts.pop(dev_id, None)
+
+    def window_for(pixels):
+        # Rows covering the viewport at `pixels`, plus the overscan on each side
+        offsets = grid["offsets"]
+        top = max(0, bisect_right(offsets, pixels) - 1)
+        bottom = bisect_left(offsets, pixels + grid_list.height)
+        return top, min(len(grid["rows"]), bottom)
+
+    def show_window(pixels):
+        rows, offsets, built = grid["rows"], grid["offsets"], grid["built"]
+        top, bottom = window_for(pixels)
+        first = max(0, top - GRID_OVERSCAN_ROWS)
+        last = min(len(rows), bottom + GRID_OVERSCAN_ROWS)
+        for i in [i for i in built if not first <= i < last]:
+            release_row(rows[i])
+            del built[i]
+        controls = []
+        if first:
+            top_spacer.height = offsets[first] - GRID_SPACING
+            controls.append(top_spacer)
+        for i in range(first, last):
+            if i not in built:
+                built[i] = build_row(rows[i])
+            controls.append(built[i])
+        if last < len(rows):
+            bottom_spacer.height = offsets[-1] - offsets[last] - GRID_SPACING
+            controls.append(bottom_spacer)
+        grid_list.controls[:] = controls
+        grid["window"] = (first, last)
+        grid["pixels"] = pixels
+
+    def reset_grid(anchor=None):
+        # Lays the grid out again and shows it from the top, or from the row
+        # holding `anchor` (a device id); returns that row's offset
+        binder.clear()
+        value_texts.clear()
+        grid["built"] = {}
+        rows = grid["rows"] = layout_rows()
+        offsets = [0]
+        for row in rows:
+            offsets.append(offsets[-1] + (GRID_HEADER_HEIGHT if row[0] == "header" else GRID_ROW_HEIGHT) + GRID_SPACING)
+        grid["offsets"] = offsets
+        pixels = next((offsets[i] for i, row in enumerate(rows) if row[0] == "cards" and anchor in row[1]), 0)
+        show_window(pixels)
+        matches = sum(row[2] for row in rows if row[0] == "header")
+        txt_matches.value = f"{matches} devices"
+        txt_empty.visible = not rows
+        return pixels
+
+    def grid_scroll(e):
+        # Moves the window once the viewport gets within half the overscan
+        # of an edge with more rows beyond it
+        first, last = grid["window"]
+        top, bottom = window_for(e.pixels)
+        slack = GRID_OVERSCAN_ROWS // 2
+        grid["pixels"] = e.pixels
+        if (first > 0 and top - first < slack) or (last < len(grid["rows"]) and last - bottom < slack):
+            show_window(e.pixels)
+            grid_list.update()
+
+    def grid_resized(e):
+        columns = grid_columns(page)
+        height = grid_height(page)
+        if columns == grid["columns"] and height == grid_list.height:
+            return
+        # Keep the first device in view in view
+        rows = grid["rows"]
+        top = window_for(grid["pixels"])[0]
+        anchor = next((row[1][0] for row in rows[top:] if row[0] == "cards"), None)
+        grid["columns"] = columns
+        grid_list.height = height
+        pixels = reset_grid(anchor)
+        page.update(grid_list, txt_matches, txt_empty)
+        grid_list.scroll_to(offset=pixels, duration=0)
+
+    def search_change(e):
+        grid["query"] = e.control.value or ""
+        reset_grid()
+        page.update(grid_list, txt_matches, txt_empty)
+        grid_list.scroll_to(offset=0, duration=0)
+
+    def group_change(e):
+        grid["group_by"] = None if e.control.value == "none" else e.control.value
+        reset_grid()
+        page.update(grid_list, txt_matches, txt_empty)
+        grid_list.scroll_to(offset=0, duration=0)
+
+    search_field = ft.TextField(label="Search devices", prefix_icon="search", on_change=search_change, width=260, dense=True)
+    group_dropdown = ft.Dropdown(
+        label="Group by",
+        value="type",
+        options=[ft.dropdown.Option("type", "Type"), ft.dropdown.Option("room", "Room"), ft.dropdown.Option("none", "None")],
+        on_change=group_change,
+        width=150,
+        dense=True,
+    )
+    txt_matches = ft.Text("", color="blueGrey600")
+    txt_empty = ft.Text("No devices match.", color="blueGrey600", visible=False)
+    grid_list = ft.ListView(spacing=GRID_SPACING, height=grid_height(page), on_scroll=grid_scroll, on_scroll_interval=100)
+    reset_grid()
+    # The latest overview built for the page follows its size
+    page.on_resized = grid_resized
+
+    return IsolatedRow(
         [
             # Left Column (Devices)
             ft.Column(
                 [
-                    ft.Text("On/Off devices", weight=ft.FontWeight.BOLD, size=18, color="blueGrey800"),
-                    ft.Row(
-                        [
-                            build_on_off_card("light1", "lightbulb", "orange700"),
-                            build_on_off_card("door1", "door_front_door", "indigo700"),
-                        ],
-                        wrap=True,
-                        spacing=20,
-                        run_spacing=20
-                    ),
-                    ft.Container(height=30),
-                    ft.Text("Slider controlled devices", weight=ft.FontWeight.BOLD, size=18, color="blueGrey800"),
-                    ft.Row(
-                        [
-                            build_slider_card("thermostat1", "thermostat", "deepOrange700", 10, 30, 20, "{value}°C"),
-                            build_slider_card("fan1", "wind_power", "cyan700", 0, 3, 3, "{value}"),
-                        ],
-                        wrap=True,
-                        spacing=20,
-                        run_spacing=20
-                    )
+                    ft.Row([search_field, group_dropdown, txt_matches], spacing=20, vertical_alignment=ft.CrossAxisAlignment.CENTER),
+                    txt_empty,
+                    grid_list,
                 ],
                 expand=True,
             ),
@@ -583,20 +735,15 @@ def create_overview_view(page):
         spacing=30
     )
 
+@metrics.timed("view_build_seconds", view="statistics")
 def create_statistics_view(page):
-    # Mock data for chart
-    data_points = [
-        ft.LineChartDataPoint(0, 3),
-        ft.LineChartDataPoint(1, 2),
-        ft.LineChartDataPoint(2, 5),
-        ft.LineChartDataPoint(3, 3.5),
-        ft.LineChartDataPoint(4, 4),
-        ft.LineChartDataPoint(5, 3),
-        ft.LineChartDataPoint(6, 4),
-        ft.LineChartDataPoint(7, 3),
-        ft.LineChartDataPoint(8, 4),
-        ft.LineChartDataPoint(9, 3),
-    ]
+    # Last 24 h of the fleet's total draw, downsampled to what the chart can
+    # actually show; the current draw is held to "now"
+    now = time.time()
+    ts, watts = power_meter.total.query(now - CHART_SPAN, now, chart_points(page))
+    data_points = [ft.LineChartDataPoint((t - now) / 3600, w) for t, w in zip(ts.tolist(), watts.tolist())]
+    data_points.append(ft.LineChartDataPoint(0, power_meter.total_draw()))
+    max_y = max(point.y for point in data_points) * 1.2 or 1
 
     chart = ft.LineChart(
         data_series=[
@@ -613,109 +760,249 @@ def create_statistics_view(page):
         left_axis=ft.ChartAxis(
             labels=[
                 ft.ChartAxisLabel(
-                    value=1, label=ft.Text("100W", size=10, weight=ft.FontWeight.BOLD, color="grey600")
-                ),
-                ft.ChartAxisLabel(
-                    value=3, label=ft.Text("300W", size=10, weight=ft.FontWeight.BOLD, color="grey600")
-                ),
-                ft.ChartAxisLabel(
-                    value=5, label=ft.Text("500W", size=10, weight=ft.FontWeight.BOLD, color="grey600")
-                ),
+                    value=max_y * f, label=ft.Text(f"{max_y * f:.0f}W", size=10, weight=ft.FontWeight.BOLD, color="grey600")
+                )
+                for f in (0.25, 0.5, 0.75)
             ],
             labels_size=40,
         ),
         bottom_axis=ft.ChartAxis(
             labels=[
                 ft.ChartAxisLabel(
-                    value=0, label=ft.Text("00:00", size=10, weight=ft.FontWeight.BOLD, color="grey600")
+                    value=-24, label=ft.Text("-24h", size=10, weight=ft.FontWeight.BOLD, color="grey600")
                 ),
                 ft.ChartAxisLabel(
-                    value=5, label=ft.Text("12:00", size=10, weight=ft.FontWeight.BOLD, color="grey600")
+                    value=-12, label=ft.Text("-12h", size=10, weight=ft.FontWeight.BOLD, color="grey600")
                 ),
                 ft.ChartAxisLabel(
-                    value=9, label=ft.Text("24:00", size=10, weight=ft.FontWeight.BOLD, color="grey600")
+                    value=0, label=ft.Text("Now", size=10, weight=ft.FontWeight.BOLD, color="grey600")
                 ),
             ],
             labels_size=32,
         ),
         tooltip_bgcolor="#CC263238",
         min_y=0,
-        max_y=6,
-        min_x=0,
-        max_x=9,
+        max_y=max_y,
+        min_x=-24,
+        max_x=0,
         expand=True,
     )
 
     # Data Table
-    rows = []
-    for log in app_state.logs:
-        rows.append(
-            ft.DataRow(
-                cells=[
-                    ft.DataCell(ft.Text(log["time"], color="blueGrey700")),
-                    ft.DataCell(ft.Text(log["device"], weight=ft.FontWeight.W_500)),
-                    ft.DataCell(ft.Text(log["action"])),
-                    ft.DataCell(ft.Text(log["user"])),
-                ]
-            )
+    # A window of at most LOG_WINDOW_PAGES pages of rows. Pages are fetched
+    # from a cursor (the last row of the page before), so entries logged
+    # meanwhile never shift or repeat rows. Scrolling near the bottom loads
+    # the next page and drops the top one; scrolling back up reloads it.
+    query = {"device": None, "action": None, "since": None, "until": None, "sort_by": "time", "descending": True}
+    # [(cursor the page was fetched after, its rows)], the cursors of the
+    # pages dropped from the top, and where the next page starts
+    log_window = {"pages": collections.deque(), "dropped": [], "next": None, "pixels": 0}
+
+    def make_row(log):
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text(log["time"], color="blueGrey700")),
+                ft.DataCell(ft.Text(log["device"], weight=ft.FontWeight.W_500)),
+                ft.DataCell(ft.Text(log["action"])),
+                ft.DataCell(ft.Text(log["user"])),
+            ]
         )
 
+    def fetch_page(after, upto=None):
+        with app_state.lock:
+            logs, cursor = app_state.logs.page(after=after, limit=LOG_PAGE_SIZE, upto=upto, **query)
+        return [make_row(log) for log in logs], cursor
+
+    def show_pages():
+        data_table.rows[:] = [row for _, rows in log_window["pages"] for row in rows]
+        more_button.visible = log_window["next"] is not None
+        newer_button.visible = bool(log_window["dropped"])
+
+    def load_rows():
+        log_window["pages"].clear()
+        log_window["dropped"].clear()
+        rows, log_window["next"] = fetch_page(None)
+        log_window["pages"].append((None, rows))
+        show_pages()
+
+    def refresh_rows():
+        load_rows()
+        page.update(data_table, more_button, newer_button)
+        log_list.scroll_to(offset=0, duration=0)
+
+    def next_page():
+        # Returns how many rows were dropped from the top
+        pages = log_window["pages"]
+        after = log_window["next"]
+        rows, log_window["next"] = fetch_page(after)
+        pages.append((after, rows))
+        dropped = 0
+        if len(pages) > LOG_WINDOW_PAGES:
+            top_after, top_rows = pages.popleft()
+            log_window["dropped"].append(top_after)
+            dropped = len(top_rows)
+        show_pages()
+        return dropped
+
+    def previous_page():
+        # Returns how many rows were added at the top
+        pages = log_window["pages"]
+        after = log_window["dropped"].pop()
+        # Up to the row the current top page continues from
+        rows, _ = fetch_page(after, upto=pages[0][0])
+        pages.appendleft((after, rows))
+        if len(pages) > LOG_WINDOW_PAGES:
+            log_window["next"] = pages.pop()[0]
+        show_pages()
+        return len(rows)
+
+    def sort_logs(e):
+        query["sort_by"] = LOG_COLUMNS[e.column_index]
+        # Time defaults to newest first, text columns to A-Z
+        query["descending"] = not e.ascending
+        data_table.sort_column_index = e.column_index
+        data_table.sort_ascending = e.ascending
+        refresh_rows()
+
+    def filter_logs(e):
+        query["device"] = device_filter.value if device_filter.value != "all" else None
+        query["action"] = action_filter.value or None
+        query["since"] = since_filter.value or None
+        query["until"] = until_filter.value or None
+        refresh_rows()
+
+    def load_more(e):
+        if log_window["next"] is None:
+            return
+        dropped = next_page()
+        page.update(data_table, more_button, newer_button)
+        if dropped:
+            # Keep the rows in view where they were
+            log_list.scroll_to(offset=max(0, log_window["pixels"] - dropped * LOG_ROW_HEIGHT), duration=0)
+
+    def load_newer(e):
+        if not log_window["dropped"]:
+            return
+        added = previous_page()
+        page.update(data_table, more_button, newer_button)
+        log_list.scroll_to(offset=log_window["pixels"] + added * LOG_ROW_HEIGHT, duration=0)
+
+    def log_scroll(e):
+        # The next page near the bottom, the dropped one back near the top
+        log_window["pixels"] = e.pixels
+        if e.max_scroll_extent and e.pixels >= e.max_scroll_extent - 200:
+            load_more(e)
+        elif e.pixels <= 200 and log_window["dropped"]:
+            load_newer(e)
+
     data_table = ft.DataTable(
         columns=[
-            ft.DataColumn(ft.Text("Time", weight=ft.FontWeight.BOLD, color="blueGrey800")),
-            ft.DataColumn(ft.Text("Device", weight=ft.FontWeight.BOLD, color="blueGrey800")),
-            ft.DataColumn(ft.Text("Action", weight=ft.FontWeight.BOLD, color="blueGrey800")),
-            ft.DataColumn(ft.Text("User", weight=ft.FontWeight.BOLD, color="blueGrey800")),
+            ft.DataColumn(ft.Text("Time", weight=ft.FontWeight.BOLD, color="blueGrey800"), on_sort=sort_logs),
+            ft.DataColumn(ft.Text("Device", weight=ft.FontWeight.BOLD, color="blueGrey800"), on_sort=sort_logs),
+            ft.DataColumn(ft.Text("Action", weight=ft.FontWeight.BOLD, color="blueGrey800"), on_sort=sort_logs),
+            ft.DataColumn(ft.Text("User", weight=ft.FontWeight.BOLD, color="blueGrey800"), on_sort=sort_logs),
         ],
-        rows=rows,
+        rows=[],
+        sort_column_index=0,
+        sort_ascending=False,
+        data_row_min_height=LOG_ROW_HEIGHT,
+        data_row_max_height=LOG_ROW_HEIGHT,
         border=ft.border.all(1, "grey200"),
         vertical_lines=ft.border.BorderSide(1, "grey100"),
         horizontal_lines=ft.border.BorderSide(1, "grey100"),
         heading_row_color="grey100",
     )
+    more_button = ft.TextButton("Load more", on_click=load_more, style=LINK_STYLE)
+    newer_button = ft.TextButton("Load newer", on_click=load_newer, style=LINK_STYLE, visible=False)
+    # The log scrolls on its own, inside the scrolling view, so on_scroll
+    # sees the table's offsets rather than the page's
+    log_list = ft.Column([newer_button, data_table, more_button], spacing=0, scroll=ft.ScrollMode.AUTO,
+                         height=LOG_TABLE_HEIGHT, on_scroll=log_scroll, on_scroll_interval=100)
+
+    with app_state.lock:
+        log_devices = app_state.logs.devices()
+    device_filter = ft.Dropdown(
+        label="Device",
+        value="all",
+        options=[ft.dropdown.Option("all", "All devices")] + [ft.dropdown.Option(dev_id) for dev_id in sorted(log_devices)],
+        on_change=filter_logs,
+        width=180,
+    )
+    action_filter = ft.TextField(label="Action contains", on_change=filter_logs, width=200)
+    since_filter = ft.TextField(label="From (HH:MM:SS)", on_submit=filter_logs, on_blur=filter_logs, width=150)
+    until_filter = ft.TextField(label="To (HH:MM:SS)", on_submit=filter_logs, on_blur=filter_logs, width=150)
+
+    load_rows()
+
+    # Opt-in sampling profiler; the collapsed stacks are written on stop
+    @metrics.timed("handler_seconds", handler="profile_toggle")
+    def profile_toggle(e):
+        if e.control.value:
+            profiler.start()
+            txt_profile.value = "Profiling..."
+        else:
+            profiler.stop()
+            profiler.write(PROFILE_PATH)
+            txt_profile.value = f"{profiler.samples} samples written to {PROFILE_PATH}"
+        page.update(txt_profile)
+
+    txt_profile = ft.Text("Profiling..." if profiler.running else "", size=12, color="blueGrey600")
+    profile_switch = ft.Switch(label="Sampling profiler", value=profiler.running, on_change=profile_toggle)
 
     return ft.Column(
         [
-            ft.Text("Power consumption (simulated)", weight=ft.FontWeight.BOLD, size=18, color="blueGrey800"),
+            ft.Row(
+                [
+                    ft.Text("Power consumption (last 24 h)", weight=ft.FontWeight.BOLD, size=18, color="blueGrey800"),
+                    ft.Row([txt_profile, profile_switch]),
+                ],
+                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            ),
             ft.Container(
                 content=chart,
                 height=250,
                 bgcolor="white",
                 padding=20,
                 border_radius=15,
-                shadow=ft.BoxShadow(
-                    spread_radius=1,
-                    blur_radius=10,
-                    color="#0D000000",
-                    offset=ft.Offset(0, 4),
-                )
+                shadow=PANEL_SHADOW
             ),
             ft.Container(height=30),
             ft.Text("Action log", weight=ft.FontWeight.BOLD, size=18, color="blueGrey800"),
+            ft.Row([device_filter, action_filter, since_filter, until_filter], wrap=True, spacing=10),
             ft.Container(
-                content=data_table,
+                content=log_list,
                 bgcolor="white",
                 border_radius=15,
                 padding=10,
-                shadow=ft.BoxShadow(
-                    spread_radius=1,
-                    blur_radius=10,
-                    color="#0D000000",
-                    offset=ft.Offset(0, 4),
-                )
+                shadow=PANEL_SHADOW
             )
         ],
-        scroll=ft.ScrollMode.AUTO,
         expand=True
     )
 
+@metrics.timed("view_build_seconds", view="details")
 def create_details_view(page, dev_id):
     dev = app_state.get_device(dev_id)
     if not dev:
         return ft.Text("Device not found")
 
-    # Filter logs for this device (mock logic, in real app we'd filter properly)
-    device_logs = [l for l in app_state.logs if l["device"] == dev_id]
+    # Per-device index lookup, newest first; one page, like the log table
+    with app_state.lock:
+        device_logs = app_state.logs.for_device(dev_id, limit=LOG_PAGE_SIZE)
+
+    # Registered types show their card's wording, e.g. "Set point: 22.0 °C"
+    shown = device_type(dev)
+    state_text = f"State: {dev.state}"
+    if shown:
+        card_labels = labels(dev)
+        state_text = card_labels.value or card_labels.status
+    # Simulated temperature of the room a thermostat controls
+    room_temp = simulator.room_temperature(dev_id)
+    txt_room_temp = ft.Text(
+        f"Room temperature: {room_temp:.1f} °C" if room_temp is not None else "",
+        color="blueGrey600",
+        visible=bool(shown and shown.show_room_temp) and room_temp is not None,
+    )
 
     log_items = []
     for log in device_logs:
@@ -730,8 +1017,9 @@ def create_details_view(page, dev_id):
                 ]),
                 ft.Container(height=10),
                 ft.Text(f"ID: {dev.id}", color="blueGrey600"),
-                ft.Text(f"Type: {dev.type}", color="blueGrey600"),
-                ft.Text(f"State: {dev.state}", size=16, weight=ft.FontWeight.BOLD, color="blueGrey800"),
+                ft.Text(f"Type: {shown.title if shown else dev.type}", color="blueGrey600"),
+                ft.Text(state_text, size=16, weight=ft.FontWeight.BOLD, color="blueGrey800"),
+                txt_room_temp,
                 ft.Divider(color="grey300"),
                 ft.Text("Recent actions", size=18, weight=ft.FontWeight.BOLD, color="blueGrey800"),
                 ft.Column(log_items),
@@ -743,13 +1031,48 @@ def create_details_view(page, dev_id):
         bgcolor="white",
         padding=30,
         border_radius=15,
-        shadow=ft.BoxShadow(
-            spread_radius=1,
-            blur_radius=10,
-            color="#1A000000",
-            offset=ft.Offset(0, 4),
-        )
+        shadow=CARD_SHADOW
     )
 
 if __name__ == "__main__":
-    ft.app(target=main, assets_dir="assets")
+    try:
+        app_state.open_wal("data")
+    except DataDirLocked as e:
+        raise SystemExit(f"{e}; only one process can use it at a time")
+    if device_driver is not None:
+        device_driver.start()
+        app_state.attach_driver(device_driver)
+    power_meter.resync()
+    simulator.on_change(list(app_state.devices))
+    simulator.start(on_tick=lambda sim: power_meter.record_total(time.time(), sim.total_power()))
+    scheduler.load()
+    status_board.start(scheduler)
+    scheduler.call_every(METRICS_EXPORT_INTERVAL, export_metrics)
+    log_archiver.export()
+    scheduler.call_every(LOG_EXPORT_INTERVAL, log_archiver.export)
+    scheduler.start()
+    # This process owns data/ and its schedules; headless CLI commands come
+    # through this API (on a free port unless SMARTHOME_API_PORT is set)
+    api_server = serve(HeadlessController(app_state, scheduler), port=int(os.environ.get("SMARTHOME_API_PORT", 0)))
+    threading.Thread(target=api_server.serve_forever, name="api", daemon=True).start()
+    app_state.data_lock.advertise(api=f"http://127.0.0.1:{api_server.server_address[1]}")
+    if os.environ.get("SMARTHOME_PROFILE"):
+        profiler.start()
+    try:
+        ft.app(target=main, assets_dir="assets")
+    finally:
+        api_server.shutdown()
+        api_server.server_close()
+        scheduler.stop()
+        status_board.stop()
+        if device_driver is not None:
+            device_driver.stop()
+        export_metrics()
+        log_archiver.export()
+        if profiler.running:
+            profiler.stop()
+            profiler.write(PROFILE_PATH)
+        camera_pipeline.stop()
+        app_state.events.stop()
+        simulator.stop()
+        app_state.close()
@@ -0,0 +1,112 @@
+# --- Device Presentation ---
+
+# How each device type looks: its card (on/off button or slider, icon,
+# slider range) and the strings shown for a state. Views ask the registry
+# instead of branching on dev.type, so a new device type is one register()
+# call. Strings are formatted once per (type, state) and cached; after that
+# a state change renders from a dict lookup. Slider previews go through the
+# same cache, keyed by the previewed value.
+#
+#   register(DeviceType("blind", "slider", "blinds", "brown700",
+#                       value="Open: {state}%", slider=(0, 100, 10, "{value}%")))
+
+MAX_CACHED_STATES = 1024
+
+
+class Labels:
+    __slots__ = ("status", "action", "value")
+
+    def __init__(self, status, action, value):
+        self.status = status
+        self.action = action
+        self.value = value
+
+
+def _formatter(spec):
+    # A label is a "{state}" template, a {state: text} map or a function
+    if spec is None or callable(spec):
+        return spec
+    if isinstance(spec, dict):
+        return spec.get
+    return lambda state: spec.format(state=state)
+
+
+class DeviceType:
+    def __init__(self, name, card, icon, icon_color, status="Status: {state}", action=None, value=None,
+                 slider=None, title=None, show_room_temp=False):
+        if card not in ("on_off", "slider"):
+            raise ValueError(f"unknown card kind: {card!r}")
+        self.name = name
+        self.card = card
+        self.icon = icon
+        self.icon_color = icon_color
+        # (min, max, divisions, label) of a slider card
+        self.slider = slider
+        self.title = title or name.title()
+        self.show_room_temp = show_room_temp
+        self._status = _formatter(status)
+        self._action = _formatter(action)
+        self._value = _formatter(value)
+        self._labels = {}
+
+    def labels(self, state):
+        # 1 and 1.0 are equal keys but may format differently
+        key = (state.__class__, state)
+        labels = self._labels.get(key)
+        if labels is None:
+            if len(self._labels) >= MAX_CACHED_STATES:
+                self._labels.clear()
+            labels = self._labels[key] = Labels(
+                self._status(state) if self._status else None,
+                self._action(state) if self._action else None,
+                self._value(state) if self._value else None,
+            )
+        return labels
+
+
+DEVICE_TYPES = {}
+
+
+def register(device_type):
+    DEVICE_TYPES[device_type.name] = device_type
+    return device_type
+
+
+def device_type(dev):
+    return DEVICE_TYPES.get(dev.type)
+
+
+def labels(dev, state=None):
+    # Labels of `dev` in its current state, or in `state` (a slider preview)
+    return DEVICE_TYPES[dev.type].labels(dev.state if state is None else state)
+
+
+def status_text(dev):
+    return labels(dev).status
+
+
+def action_text(dev):
+    return labels(dev).action
+
+
+def value_text(dev):
+    return labels(dev).value
+
+
+register(DeviceType(
+    "light", "on_off", "lightbulb", "orange700",
+    action=lambda state: "Turn ON" if state == "OFF" else "Turn OFF",
+))
+register(DeviceType(
+    "lock", "on_off", "door_front_door", "indigo700",
+    status="Door: {state}",
+    action=lambda state: "Unlock" if state == "LOCKED" else "Lock",
+))
+register(DeviceType(
+    "thermostat", "slider", "thermostat", "deepOrange700",
+    value="Set point: {state} °C", slider=(10, 30, 20, "{value}°C"), show_room_temp=True,
+))
+register(DeviceType(
+    "fan", "slider", "wind_power", "cyan700",
+    value=lambda state: f"Fan speed: {int(state)}", slider=(0, 3, 3, "{value}"),
+))
@@ -0,0 +1,289 @@
+import itertools
+import threading
+import time
+from collections import deque
+
+from scenes import SceneEngine
+
+# --- Automation Rules ---
+
+# A rule is data, like a scene: a trigger on one device, an optional time
+# window, and what to do when it fires.
+#
+#   {
+#       "name": "Late arrival light",
+#       "when": {"device": "door1", "state": "UNLOCKED"},  # or "above"/"below"
+#       "if": {"after": "22:00", "before": "06:00"},        # optional
+#       "then": [({"id": "light1"}, "ON")],                 # scene-style targets
+#       "cooldown": 60,                                     # optional, seconds
+#   }
+#
+# "then" may instead be {"scene": "Night"}. A "when" with only a device
+# fires on every change of that device.
+#
+# The engine listens to AppState and finds candidate rules through indexes
+# keyed by the changed device (and, for equality triggers, its new state),
+# so a mutation never scans unrelated rules. Changes made by rules are fed
+# back through the same worklist; a rule fires at most once per cascade, so
+# a loop of rules that keep re-triggering each other is cut off there and
+# counted in `cycles_broken`. Firing is rate limited per rule (cooldown)
+# and engine-wide (token bucket).
+
+# No rules ship enabled: an install only changes devices on its own once
+# rules like the example above are passed to RuleEngine
+DEFAULT_RULES = []
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _minutes(text):
+    hours, minutes = text.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class Rule:
+    __slots__ = ("id", "name", "device", "state", "above", "below", "after", "before",
+                 "cooldown", "targets", "scene", "last_fired", "fired")
+
+    def __init__(self, rule_id, spec):
+        when = spec.get("when") or {}
+        if "device" not in when:
+            raise RuleError(f"rule {spec.get('name', rule_id)!r} has no trigger device")
+        then = spec.get("then")
+        if not then:
+            raise RuleError(f"rule {spec.get('name', rule_id)!r} has no action")
+        window = spec.get("if") or {}
+        self.id = rule_id
+        self.name = spec.get("name", f"rule{rule_id}")
+        self.device = when["device"]
+        self.state = when.get("state")
+        self.above = when.get("above")
+        self.below = when.get("below")
+        self.after = _minutes(window["after"]) if "after" in window else None
+        self.before = _minutes(window["before"]) if "before" in window else None
+        self.cooldown = spec.get("cooldown", 0.0)
+        self.scene = then.get("scene") if isinstance(then, dict) else None
+        self.targets = None if self.scene else list(then)
+        self.last_fired = None
+        self.fired = 0
+
+    def matches(self, dev):
+        value = dev.state
+        if self.state is not None and value != self.state:
+            return False
+        if self.above is not None and not (isinstance(value, (int, float)) and value > self.above):
+            return False
+        if self.below is not None and not (isinstance(value, (int, float)) and value < self.below):
+            return False
+        return True
+
+    def in_window(self, minute):
+        if self.after is None and self.before is None:
+            return True
+        after = 0 if self.after is None else self.after
+        before = 24 * 60 if self.before is None else self.before
+        if after <= before:
+            return after <= minute < before
+        # Window across midnight, e.g. 22:00-06:00
+        return minute >= after or minute < before
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst or rate
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated = clock()
+
+    def take(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class RuleEngine:
+    def __init__(self, state, rules=None, clock=time.time, max_rate=50.0, max_cascade=1000):
+        self.state = state
+        self.clock = clock
+        # Engine-wide firing limit in rules/second; None disables it
+        self.limiter = TokenBucket(max_rate) if max_rate else None
+        self.max_cascade = max_cascade
+        self.rules = {}
+        self._ids = itertools.count(1)
+        # Indexes: device -> {state: [rule]} for equality triggers,
+        # device -> [rule] for any-change and threshold triggers
+        self._by_state = {}
+        self._by_device = {}
+        # Rule actions compiled like scenes, one entry per rule id
+        self._actions = SceneEngine({})
+        self._queue = deque()
+        self._running = False
+        self._lock = threading.Lock()
+        self.evaluated = 0
+        self.fired = 0
+        self.rate_limited = 0
+        self.cycles_broken = 0
+        for spec in DEFAULT_RULES if rules is None else rules:
+            self.add(spec)
+
+    # --- Rule Registry ---
+
+    def add(self, spec):
+        rule = Rule(next(self._ids), spec)
+        if rule.scene is not None and rule.scene not in self.state.scenes.names():
+            raise RuleError(f"rule {rule.name!r} uses unknown scene {rule.scene!r}")
+        if rule.targets is not None:
+            self._actions.define(rule.id, rule.targets)
+        self.rules[rule.id] = rule
+        if rule.state is not None:
+            self._by_state.setdefault(rule.device, {}).setdefault(rule.state, []).append(rule)
+        else:
+            self._by_device.setdefault(rule.device, []).append(rule)
+        return rule.id
+
+    def remove(self, rule_id):
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        if rule.state is not None:
+            self._by_state[rule.device][rule.state].remove(rule)
+        else:
+            self._by_device[rule.device].remove(rule)
+        self._actions.scenes.pop(rule.id, None)
+        return True
+
+    def __len__(self):
+        return len(self.rules)
+
+    def candidates(self, dev):
+        # Rules that watch `dev` and could match its current state
+        found = self._by_state.get(dev.id)
+        found = list(found.get(dev.state, ())) if found else []
+        found.extend(self._by_device.get(dev.id, ()))
+        return found
+
+    # --- Evaluation ---
+
+    def on_change(self, dev_ids):
+        # AppState listener. Changes made while rules fire come back here and
+        # are queued; the outermost call drains the queue.
+        with self._lock:
+            self._queue.extend(dev_ids)
+            if self._running:
+                return
+            self._running = True
+        fired_in_cascade = set()
+        try:
+            while True:
+                with self._lock:
+                    if not self._queue:
+                        self._running = False
+                        return
+                    dev_id = self._queue.popleft()
+                dev = self.state.devices.get(dev_id)
+                if dev is not None:
+                    self._evaluate(dev, fired_in_cascade)
+        except BaseException:
+            with self._lock:
+                self._queue.clear()
+                self._running = False
+            raise
+
+    def _evaluate(self, dev, fired_in_cascade):
+        candidates = self.candidates(dev)
+        if not candidates:
+            return
+        now = self.clock()
+        local = time.localtime(now)
+        minute = local.tm_hour * 60 + local.tm_min
+        for rule in candidates:
+            self.evaluated += 1
+            if not rule.matches(dev) or not rule.in_window(minute):
+                continue
+            if rule.id in fired_in_cascade or len(fired_in_cascade) >= self.max_cascade:
+                # The cascade came back around to a rule that already fired
+                self.cycles_broken += 1
+                continue
+            if rule.last_fired is not None and now - rule.last_fired < rule.cooldown:
+                self.rate_limited += 1
+                continue
+            if self.limiter is not None and not self.limiter.take():
+                self.rate_limited += 1
+                continue
+            fired_in_cascade.add(rule.id)
+            rule.last_fired = now
+            rule.fired += 1
+            self.fired += 1
+            self._fire(rule)
+
+    def _fire(self, rule):
+        if rule.scene is not None:
+            ops = self.state.scenes.compile(rule.scene, self.state.devices, self.state.devices_version)
+        else:
+            ops = self._actions.compile(rule.id, self.state.devices, self.state.devices_version)
+        self.state.apply_ops(ops, "RULE", f"Rule {rule.name} fired", user="Automation")
+
+    # --- Static Analysis ---
+
+    def find_cycles(self):
+        # Groups of devices whose rules can trigger each other in a loop:
+        # strongly connected components of the "watched device -> written
+        # device" graph (Tarjan, iterative). Conditions are ignored, so these
+        # are possible cycles, not certain ones.
+        devices = self.state.devices
+        version = self.state.devices_version
+        graph = {}
+        for rule in self.rules.values():
+            if rule.scene is not None:
+                ops = self.state.scenes.compile(rule.scene, devices, version)
+            else:
+                ops = self._actions.compile(rule.id, devices, version)
+            graph.setdefault(rule.device, set()).update(dev.id for dev, _ in ops)
+
+        index = {}
+        low = {}
+        on_stack = set()
+        stack = []
+        cycles = []
+        counter = itertools.count()
+        for root in graph:
+            if root in index:
+                continue
+            work = [(root, iter(graph.get(root, ())))]
+            index[root] = low[root] = next(counter)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, successors = work[-1]
+                for succ in successors:
+                    if succ not in index:
+                        index[succ] = low[succ] = next(counter)
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, iter(graph.get(succ, ()))))
+                        break
+                    if succ in on_stack:
+                        low[node] = min(low[node], index[succ])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or node in graph.get(node, ()):
+                            cycles.append(component)
+        return cycles
@@ -0,0 +1,111 @@
+# --- Scenes ---
+
+# A scene is data: an icon for its button plus a list of (selector, state)
+# targets. A selector is a dict whose keys narrow the devices it matches:
+#
+#   {"id": "light1"}                  one device
+#   {"type": "light"}                 every light
+#   {"type": "light", "room": "bed"}  every light in the bedroom
+#   {"tag": "outdoor"}                every device tagged "outdoor"
+#
+# Each value may also be a list of alternatives. Later targets override
+# earlier ones for the same device. A scene is compiled once into a flat
+# list of (device, state) operations and recompiled only when the device
+# registry changes.
+
+DEFAULT_SCENES = {
+    "Home": {
+        "icon": "home",
+        "targets": [
+            ({"id": "light1"}, "ON"),
+            ({"id": "door1"}, "UNLOCKED"),
+        ],
+    },
+    "Away": {
+        "icon": "directions_walk",
+        "targets": [
+            ({"id": "light1"}, "OFF"),
+            ({"id": "door1"}, "LOCKED"),
+        ],
+    },
+    "Night": {
+        "icon": "bedtime",
+        "targets": [
+            ({"id": "light1"}, "OFF"),
+            ({"id": "door1"}, "LOCKED"),
+            ({"id": "fan1"}, 1),
+        ],
+    },
+    "Party": {
+        "icon": "music_note",
+        "targets": [
+            ({"id": "light1"}, "ON"),
+            ({"id": "door1"}, "UNLOCKED"),
+            ({"id": "fan1"}, 2),
+        ],
+    },
+}
+
+
+def _as_set(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return set(value)
+    return {value}
+
+
+def compile_selector(selector):
+    # Turns a selector dict into a predicate over devices
+    checks = []
+    for key, value in selector.items():
+        wanted = _as_set(value)
+        if key == "id":
+            checks.append(lambda dev, wanted=wanted: dev.id in wanted)
+        elif key == "type":
+            checks.append(lambda dev, wanted=wanted: dev.type in wanted)
+        elif key == "room":
+            checks.append(lambda dev, wanted=wanted: dev.room in wanted)
+        elif key == "tag":
+            checks.append(lambda dev, wanted=wanted: not wanted.isdisjoint(dev.tags))
+        else:
+            raise ValueError(f"Unknown scene selector key: {key}")
+    return lambda dev: all(check(dev) for check in checks)
+
+
+class SceneEngine:
+    def __init__(self, scenes=None):
+        self.scenes = dict(DEFAULT_SCENES if scenes is None else scenes)
+        self._compiled = {}
+
+    def names(self):
+        return list(self.scenes)
+
+    def icon(self, name):
+        return self.scenes[name].get("icon")
+
+    def define(self, name, targets, icon=None):
+        self.scenes[name] = {"icon": icon, "targets": list(targets)}
+        self._compiled.pop(name, None)
+
+    def compile(self, name, devices, version=0):
+        # Returns [(device, state), ...]; cached until `version` changes
+        cached = self._compiled.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        ops = {}
+        for selector, state in self.scenes[name]["targets"]:
+            if list(selector) == ["id"]:
+                # Plain id selectors are direct lookups, no fleet scan
+                for dev_id in _as_set(selector["id"]):
+                    dev = devices.get(dev_id)
+                    if dev is not None:
+                        ops[dev_id] = (dev, state)
+                continue
+            matches = compile_selector(selector)
+            for dev in devices.values():
+                if matches(dev):
+                    ops[dev.id] = (dev, state)
+
+        compiled = list(ops.values())
+        self._compiled[name] = (version, compiled)
+        return compiled
@@ -0,0 +1,339 @@
+import datetime
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+# --- Scheduler ---
+
+# Timed device actions and internal callbacks on one heap-ordered timeline.
+# Insert is O(log n). Cancel is O(1): the job is flagged and skipped when it
+# reaches the top of the heap, and the heap is compacted once cancelled
+# entries make up more than half of it. Recurring jobs are re-pushed with
+# their next time after each run.
+#
+# A job runs once `at` a timestamp, `every` N seconds, or on a `cron`
+# expression ("minute hour day-of-month month day-of-week", local time,
+# with *, lists, ranges and /steps). Its action is one of
+#
+#   {"toggle": "light1"}
+#   {"set": ["thermostat1", 19.0]}
+#   {"scene": "Night"}
+#
+# Jobs with actions are persisted to a JSON file; callback jobs (call_at,
+# call_every, call_cron) belong to the running process and are not. The
+# file is only loaded and saved by the process that owns the data
+# directory (wal.DataDirLock), so no two processes run the same jobs or
+# overwrite each other's changes; everyone else schedules through its API.
+
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+# One-shot jobs found overdue on load still run if they are at most this late
+MISFIRE_GRACE = 300.0
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-"))
+        else:
+            start = end = int(part)
+            if step != 1:
+                end = high
+        if start < low or end > high + (1 if high == 6 else 0) or start > end or step < 1:
+            raise ValueError(f"cron field {text!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    if high == 6 and 7 in values:
+        # 7 is Sunday too
+        values.discard(7)
+        values.add(0)
+    return frozenset(values)
+
+
+class CronSpec:
+    def __init__(self, expr):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+        self.expr = expr
+        parsed = [_parse_field(text, low, high) for text, (low, high) in zip(fields, CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = parsed
+        # Classic cron: if both day fields are restricted, either may match
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, t):
+        dom = t.day in self.days
+        dow = (t.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, ts):
+        # First matching minute strictly after ts. Skips whole months, days
+        # and hours that can't match, so this is a few dozen steps at most.
+        t = datetime.datetime.fromtimestamp(ts).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        for _ in range(10_000):
+            if t.month not in self.months:
+                t = (t.replace(day=1) + datetime.timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = (t + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif t.hour not in self.hours:
+                t = (t + datetime.timedelta(hours=1)).replace(minute=0)
+            elif t.minute not in self.minutes:
+                t += datetime.timedelta(minutes=1)
+            else:
+                return t.timestamp()
+        raise ValueError(f"cron expression never fires: {self.expr!r}")
+
+
+class Job:
+    __slots__ = ("id", "name", "action", "callback", "at", "every", "cron", "when", "cancelled", "runs")
+
+    def __init__(self, job_id, name=None, action=None, callback=None, at=None, every=None, cron=None):
+        self.id = job_id
+        self.name = name
+        self.action = action
+        self.callback = callback
+        self.at = at
+        self.every = every
+        self.cron = CronSpec(cron) if isinstance(cron, str) else cron
+        self.when = None
+        self.cancelled = False
+        self.runs = 0
+
+    def next_time(self, now):
+        if self.every is not None:
+            return now + self.every
+        if self.cron is not None:
+            return self.cron.next_after(now)
+        return None
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "action": self.action,
+            "at": self.at,
+            "every": self.every,
+            "cron": self.cron.expr if self.cron else None,
+            "next": self.when,
+        }
+
+
+class Scheduler:
+    def __init__(self, state=None, path=None, clock=time.time, save_interval=1.0):
+        self.state = state
+        self.path = path
+        self.clock = clock
+        self.save_interval = save_interval
+        self._jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._cancelled = 0
+        self._dirty = False
+        self._saved_at = 0.0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.fired = 0
+        self.errors = 0
+
+    # --- Jobs ---
+
+    def schedule(self, action, at=None, every=None, cron=None, name=None, job_id=None):
+        # Persistent device action; returns the job id
+        if sum(x is not None for x in (at, every, cron)) != 1:
+            raise ValueError("give exactly one of at, every or cron")
+        if not isinstance(action, dict) or len(action) != 1 or next(iter(action)) not in ("toggle", "set", "scene"):
+            raise ValueError(f"unknown action: {action!r}")
+        job = Job(job_id or f"job{next(self._ids)}", name, action=action, at=at, every=every, cron=cron)
+        return self._add(job, at)
+
+    def call_at(self, ts, callback, job_id=None):
+        return self._add(Job(job_id or f"cb{next(self._ids)}", callback=callback, at=ts), ts)
+
+    def call_every(self, seconds, callback, job_id=None, start=None):
+        job = Job(job_id or f"cb{next(self._ids)}", callback=callback, every=seconds)
+        return self._add(job, start if start is not None else self.clock() + seconds)
+
+    def call_cron(self, expr, callback, job_id=None):
+        return self._add(Job(job_id or f"cb{next(self._ids)}", callback=callback, cron=expr), None)
+
+    def _add(self, job, when):
+        if when is None:
+            when = job.next_time(self.clock())
+        with self._cond:
+            # Scheduling under an existing id replaces that job
+            self._cancel_locked(job.id)
+            job.when = when
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (when, next(self._seq), job))
+            if job.action is not None:
+                self._dirty = True
+            if self._heap[0][2] is job:
+                self._cond.notify()
+        return job.id
+
+    def cancel(self, job_id):
+        with self._cond:
+            return self._cancel_locked(job_id)
+
+    def _cancel_locked(self, job_id):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        self._cancelled += 1
+        if job.action is not None:
+            self._dirty = True
+        if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+        return True
+
+    def jobs(self):
+        with self._cond:
+            return [job.to_json() for job in self._jobs.values() if job.action is not None]
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def next_due(self):
+        with self._cond:
+            self._drop_cancelled_top()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_cancelled_top(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+    # --- Running ---
+
+    def run_pending(self, now=None):
+        # Runs every job due at `now`; returns how many ran
+        now = self.clock() if now is None else now
+        due = []
+        with self._cond:
+            while True:
+                self._drop_cancelled_top()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, _, job = heapq.heappop(self._heap)
+                due.append(job)
+                next_time = job.next_time(max(now, job.when))
+                if next_time is None:
+                    del self._jobs[job.id]
+                else:
+                    job.when = next_time
+                    heapq.heappush(self._heap, (next_time, next(self._seq), job))
+                if job.action is not None:
+                    self._dirty = True
+        for job in due:
+            job.runs += 1
+            try:
+                if job.callback is not None:
+                    job.callback()
+                else:
+                    self._run_action(job.action)
+                self.fired += 1
+            except Exception:
+                self.errors += 1
+                if job.callback is not None:
+                    # e.g. the session behind it is gone
+                    self.cancel(job.id)
+        return len(due)
+
+    def _run_action(self, action):
+        # AppState takes its own lock, so jobs can't interleave with handler
+        # or API threads changing the same devices
+        kind, arg = next(iter(action.items()))
+        if kind == "toggle":
+            self.state.toggle_device(arg)
+        elif kind == "set":
+            self.state.set_device_value(arg[0], arg[1])
+        elif kind == "scene":
+            self.state.apply_scene(arg)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+        self.save()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                self._drop_cancelled_top()
+                delay = self._heap[0][0] - self.clock() if self._heap else None
+                if self._dirty and self.path:
+                    delay = min(delay, self.save_interval) if delay is not None else self.save_interval
+                if delay is None or delay > 0:
+                    self._cond.wait(delay)
+                    if self._stopping:
+                        return
+            self.run_pending()
+            if self._dirty and self.clock() - self._saved_at >= self.save_interval:
+                self.save()
+
+    # --- Persistence ---
+
+    def save(self):
+        if not self.path:
+            return
+        with self._cond:
+            jobs = [job.to_json() for job in self._jobs.values() if job.action is not None]
+            # Peeking consumes an id; that only leaves a gap
+            next_id = next(self._ids)
+            self._dirty = False
+            self._saved_at = self.clock()
+        tmp = self.path + ".tmp"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump({"next_id": next_id, "jobs": jobs}, f)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        # Re-schedules saved jobs; recurring jobs that came due while the
+        # app was down run once, then continue from now
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with open(self.path) as f:
+            data = json.load(f)
+        saved = data["jobs"]
+        # Ids of cancelled jobs are never handed out again
+        self._ids = itertools.count(max(data.get("next_id", 1), next(self._ids)))
+        now = self.clock()
+        for spec in saved:
+            when = spec.get("next")
+            if spec["at"] is not None and (when is None or when < now - MISFIRE_GRACE):
+                continue
+            job = Job(spec["id"], spec.get("name"), action=spec["action"], at=spec["at"], every=spec["every"], cron=spec["cron"])
+            self._add(job, when)
+        with self._cond:
+            self._dirty = False
+        return len(saved)
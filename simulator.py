@@ -0,0 +1,254 @@
+import threading
+
+import numpy as np
+
+from timeseries import FAN_W_PER_STEP, LIGHT_STANDBY_W, LIGHT_W, LOCK_W, THERMOSTAT_STANDBY_W
+
+# --- Fleet Simulator ---
+
+# Simulates the whole fleet as NumPy arrays indexed by device: thermostats
+# run a proportional heating controller against their room's temperature,
+# lights and fans draw power from their state, and every device's draw
+# that ends up as heat warms its room. Rooms lose heat to the outdoors.
+# One step() is a handful of array operations regardless of fleet size;
+# lights and fans only change on user input, so their draw and heat are
+# recomputed when a state changes rather than on every tick.
+#
+# Room temperature is integrated exactly for the step (exponential approach
+# to the equilibrium temperature), so large steps stay stable and a year
+# can be simulated in a few seconds with dt of minutes.
+#
+# Devices added to the AppState later (its devices_version moves) are
+# appended to the arrays on the next change or step.
+
+LIGHT, LOCK, THERMOSTAT, FAN, OTHER = range(5)
+TYPE_CODES = {"light": LIGHT, "lock": LOCK, "thermostat": THERMOSTAT, "fan": FAN}
+
+HEATER_W = 1500.0
+CONTROL_GAIN = 0.8  # duty cycle per °C below set point
+
+# Share of each type's draw that ends up as heat in the room
+HEAT_FRACTION = np.array([0.9, 0.0, 1.0, 1.0, 0.0], np.float32)
+
+ROOM_LOSS_W_PER_K = 50.0
+ROOM_CAPACITY_J_PER_K = 200_000.0
+
+
+class FleetSimulator:
+    def __init__(self, types, rooms, room_count=None, outdoor_temp=-2.0, start_temp=20.0):
+        self.types = np.asarray(types, np.int8)
+        self.rooms = np.asarray(rooms, np.int32)
+        n = len(self.types)
+        room_count = room_count or (int(self.rooms.max()) + 1 if n else 0)
+
+        self.light_on = np.zeros(n, bool)
+        self.fan_speed = np.zeros(n, np.float32)
+        self.setpoint = np.full(n, 21.0, np.float32)
+        self.duty = np.zeros(n, np.float32)
+        self.power = np.zeros(n, np.float32)
+        self.energy_wh = np.zeros(n, np.float64)
+        self.room_temp = np.full(room_count, start_temp, np.float64)
+        self.start_temp = start_temp
+        self.outdoor_temp = outdoor_temp
+        self.time = 0.0
+        self.ticks = 0
+        self._index_types()
+        self.power[self.types == LOCK] = LOCK_W
+
+        # Filled in by from_state()
+        self.state = None
+        self.dev_ids = []
+        self.index = {}
+        self.room_names = []
+        self.room_index = {}
+        self.devices_version = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # --- Construction ---
+
+    def _index_types(self):
+        self.lights = np.flatnonzero(self.types == LIGHT)
+        self.fans = np.flatnonzero(self.types == FAN)
+        self.thermostats = np.flatnonzero(self.types == THERMOSTAT)
+        self.thermostat_rooms = self.rooms[self.thermostats]
+        self.heat_fraction = HEAT_FRACTION[self.types]
+        self._static_heat = None  # per-room heat from everything but heaters
+
+    @classmethod
+    def from_state(cls, state, **options):
+        with state.lock:
+            dev_ids = list(state.devices)
+            version = state.devices_version
+        room_index = {}
+        types, rooms = cls._codes([state.devices[dev_id] for dev_id in dev_ids], room_index)
+        sim = cls(types, rooms, room_count=len(room_index), **options)
+        sim.state = state
+        sim.dev_ids = dev_ids
+        sim.index = {dev_id: i for i, dev_id in enumerate(dev_ids)}
+        sim.room_names = list(room_index)
+        sim.room_index = room_index
+        sim.devices_version = version
+        sim.on_change(dev_ids)
+        return sim
+
+    @staticmethod
+    def _codes(devices, room_index):
+        # Type codes and room numbers, numbering new rooms in `room_index`
+        types = np.empty(len(devices), np.int8)
+        rooms = np.empty(len(devices), np.int32)
+        for i, dev in enumerate(devices):
+            types[i] = TYPE_CODES.get(dev.type, OTHER)
+            rooms[i] = room_index.setdefault(dev.room or "", len(room_index))
+        return types, rooms
+
+    def _sync_devices(self):
+        # Appends devices added to the state since the arrays were built.
+        # Takes the state's lock before our own, the order on_change() runs
+        # in from AppState notifications, so the two can't deadlock.
+        state = self.state
+        if state is None or state.devices_version == self.devices_version:
+            return
+        with state.lock:
+            version = state.devices_version
+            devices = [dev for dev_id, dev in state.devices.items() if dev_id not in self.index]
+        with self._lock:
+            # Another thread may have appended them meanwhile
+            devices = [dev for dev in devices if dev.id not in self.index]
+            self.devices_version = version
+            if devices:
+                self._append(devices)
+
+    def _append(self, devices):
+        types, rooms = self._codes(devices, self.room_index)
+        n = len(devices)
+        self.types = np.concatenate([self.types, types])
+        self.rooms = np.concatenate([self.rooms, rooms])
+        self.light_on = np.concatenate([self.light_on, np.zeros(n, bool)])
+        self.fan_speed = np.concatenate([self.fan_speed, np.zeros(n, np.float32)])
+        self.setpoint = np.concatenate([self.setpoint, np.full(n, 21.0, np.float32)])
+        self.duty = np.concatenate([self.duty, np.zeros(n, np.float32)])
+        self.power = np.concatenate([self.power, np.where(types == LOCK, LOCK_W, 0.0).astype(np.float32)])
+        self.energy_wh = np.concatenate([self.energy_wh, np.zeros(n, np.float64)])
+        new_rooms = len(self.room_index) - len(self.room_temp)
+        if new_rooms:
+            self.room_temp = np.concatenate([self.room_temp, np.full(new_rooms, self.start_temp, np.float64)])
+            self.room_names = list(self.room_index)
+        added = [dev.id for dev in devices]
+        for dev_id in added:
+            self.index[dev_id] = len(self.dev_ids)
+            self.dev_ids.append(dev_id)
+        self._index_types()
+        self._copy_states(added)
+
+    @classmethod
+    def synthetic(cls, device_count, devices_per_room=8, seed=0, **options):
+        # Random fleet without an AppState, for benchmarks and batch runs
+        rng = np.random.default_rng(seed)
+        types = rng.choice([LIGHT, LOCK, THERMOSTAT, FAN], size=device_count, p=[0.5, 0.1, 0.15, 0.25])
+        rooms = np.arange(device_count) // devices_per_room
+        sim = cls(types, rooms, **options)
+        sim.light_on[:] = rng.random(device_count) < 0.3
+        sim.fan_speed[:] = rng.integers(0, 4, device_count)
+        sim.setpoint[:] = rng.uniform(18.0, 23.0, device_count)
+        sim.invalidate()
+        return sim
+
+    def on_change(self, dev_ids):
+        # AppState listener: copy changed device states into the arrays
+        self._sync_devices()
+        with self._lock:
+            self._copy_states(dev_ids)
+
+    def _copy_states(self, dev_ids):
+        for dev_id in dev_ids:
+            i = self.index.get(dev_id)
+            if i is None:
+                continue
+            dev = self.state.devices[dev_id]
+            kind = self.types[i]
+            if kind == LIGHT:
+                self.light_on[i] = dev.state == "ON"
+            elif kind == FAN:
+                self.fan_speed[i] = float(dev.state)
+            elif kind == THERMOSTAT:
+                self.setpoint[i] = float(dev.state)
+        self._static_heat = None
+
+    def invalidate(self):
+        # Call after writing light_on / fan_speed directly
+        self._static_heat = None
+
+    # --- Physics ---
+
+    def _update_static(self):
+        self.power[self.lights] = np.where(self.light_on[self.lights], LIGHT_W, LIGHT_STANDBY_W)
+        self.power[self.fans] = self.fan_speed[self.fans] * FAN_W_PER_STEP
+        static = self.power * self.heat_fraction
+        static[self.thermostats] = 0.0
+        self._static_heat = np.bincount(self.rooms, weights=static, minlength=len(self.room_temp))
+
+    def step(self, dt):
+        self._sync_devices()
+        with self._lock:
+            if self._static_heat is None:
+                self._update_static()
+            t = self.thermostats
+            error = self.setpoint[t] - self.room_temp[self.thermostat_rooms]
+            duty = np.clip(error * CONTROL_GAIN, 0.0, 1.0).astype(np.float32)
+            self.duty[t] = duty
+            heater_power = THERMOSTAT_STANDBY_W + duty * HEATER_W
+            self.power[t] = heater_power
+
+            heat = self._static_heat + np.bincount(self.thermostat_rooms, weights=heater_power, minlength=len(self.room_temp))
+            equilibrium = self.outdoor_temp + heat / ROOM_LOSS_W_PER_K
+            decay = np.exp(-dt * ROOM_LOSS_W_PER_K / ROOM_CAPACITY_J_PER_K)
+            self.room_temp = equilibrium + (self.room_temp - equilibrium) * decay
+
+            self.energy_wh += self.power * (dt / 3600.0)
+            self.time += dt
+            self.ticks += 1
+
+    def total_power(self):
+        return float(self.power.sum(dtype=np.float64))
+
+    def run(self, seconds, dt=60.0, series=None, start_ts=0.0):
+        # Batch run as fast as possible. With `series`, the fleet's total
+        # draw is recorded every tick and appended in one go at the end.
+        steps = int(seconds // dt)
+        totals = np.empty(steps, np.float32) if series is not None else None
+        for i in range(steps):
+            self.step(dt)
+            if totals is not None:
+                totals[i] = self.power.sum(dtype=np.float64)
+        if series is not None:
+            series.extend(start_ts + dt * np.arange(1, steps + 1), totals)
+        return steps
+
+    # --- Real time ---
+
+    def start(self, interval=1.0, speed=1.0, on_tick=None):
+        # Steps every `interval` wall seconds by interval * speed sim seconds
+        def loop():
+            while not self._stop.wait(interval):
+                self.step(interval * speed)
+                if on_tick is not None:
+                    on_tick(self)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="fleet-simulator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def room_temperature(self, dev_id):
+        i = self.index.get(dev_id)
+        if i is None:
+            return None
+        return float(self.room_temp[self.rooms[i]])
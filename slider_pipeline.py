@@ -0,0 +1,61 @@
+import threading
+import time
+
+# --- Slider Input Pipeline ---
+
+# Sliders fire on_change for every tick while the user drags. The pipeline
+# lets the view update its own label locally for each tick, but only writes
+# AppState at most once per `commit_interval` per device while dragging.
+# The final value is always committed on on_change_end (trailing edge),
+# which is also the only point that writes a log entry, at most once per
+# `log_interval` per device.
+
+
+class SliderPipeline:
+    def __init__(self, state, commit_interval=0.25, log_interval=1.0, clock=time.monotonic):
+        self.state = state
+        self.commit_interval = commit_interval
+        self.log_interval = log_interval
+        self.clock = clock
+        self.events_received = 0
+        self.events_committed = 0
+        self.events_logged = 0
+        self._last_commit = {}
+        self._last_log = {}
+        self._lock = threading.Lock()
+
+    def on_change(self, dev_id, value):
+        # Returns True if this tick was written to AppState
+        now = self.clock()
+        with self._lock:
+            self.events_received += 1
+            last = self._last_commit.get(dev_id)
+            if last is not None and now - last < self.commit_interval:
+                return False
+            self._last_commit[dev_id] = now
+            self.events_committed += 1
+        self.state.set_device_value(dev_id, value)
+        return True
+
+    def on_change_end(self, dev_id, value):
+        now = self.clock()
+        with self._lock:
+            self.events_received += 1
+            self.events_committed += 1
+            self._last_commit.pop(dev_id, None)
+            last_log = self._last_log.get(dev_id)
+            log = last_log is None or now - last_log >= self.log_interval
+            if log:
+                self._last_log[dev_id] = now
+                self.events_logged += 1
+        self.state.set_device_value(dev_id, value)
+        if log:
+            self.state.log_action(dev_id, f"Set to {value}")
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "events_received": self.events_received,
+                "events_committed": self.events_committed,
+                "events_logged": self.events_logged,
+            }
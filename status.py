@@ -0,0 +1,279 @@
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Status Providers ---
+
+# The System Status card shows values that take I/O to get: the weather,
+# whether the network is up, whether the house is locked. Each comes from a
+# provider whose fetch() may block. Fetches only ever run on the board's
+# worker threads, started by the scheduler every `interval` seconds. Views
+# read the last fetched value, which never blocks.
+#
+# A value older than its provider's `ttl` is stale. Reading a stale value
+# still returns it at once and starts a refresh in the background
+# (stale-while-revalidate). Before the first fetch completes, reads get the
+# provider's placeholder. A failed fetch keeps the previous value until it
+# is past its ttl; from then on it is published as stale and not ok, so the
+# card stops vouching for it. Sessions subscribe to hear about values that
+# changed.
+#
+# A provider without an `interval` is not polled: it refreshes itself from
+# events it hooks in attach(), e.g. AppState notifications.
+
+
+class StatusValue:
+    __slots__ = ("text", "ok", "fetched_at", "stale")
+
+    def __init__(self, text, ok=True, fetched_at=None, stale=False):
+        self.text = text
+        self.ok = ok
+        self.fetched_at = time.monotonic() if fetched_at is None else fetched_at
+        # Kept past the provider's ttl because refreshing it failed
+        self.stale = stale
+
+    def same(self, other):
+        return (other is not None and self.text == other.text and self.ok == other.ok
+                and self.stale == other.stale)
+
+    def expired(self):
+        return StatusValue(self.text, ok=False, fetched_at=self.fetched_at, stale=True)
+
+
+class StatusProvider:
+    def __init__(self, name, interval=60.0, ttl=None, placeholder="..."):
+        self.name = name
+        self.interval = interval
+        if ttl is None:
+            ttl = float("inf") if interval is None else interval * 2
+        self.ttl = ttl
+        self.value = StatusValue(placeholder, ok=False, fetched_at=-float("inf"))
+        self.fetches = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_latency = None
+
+    def fetch(self):
+        # Returns a StatusValue; may block, runs on a worker thread
+        raise NotImplementedError
+
+    def attach(self, board):
+        # Called by StatusBoard.start(); hook event sources here
+        pass
+
+    def detach(self):
+        pass
+
+    def age(self):
+        return time.monotonic() - self.value.fetched_at
+
+    def stale(self):
+        return self.age() > self.ttl
+
+
+class StubProvider(StatusProvider):
+    # Canned values for tests and benchmarks: cycles through `values`
+    # ((text, ok) pairs), taking `delay` seconds per fetch
+    def __init__(self, name, values, delay=0.0, **options):
+        super().__init__(name, **options)
+        self.values = list(values)
+        self.delay = delay
+        self._next = 0
+
+    def fetch(self):
+        if self.delay:
+            time.sleep(self.delay)
+        text, ok = self.values[self._next % len(self.values)]
+        self._next += 1
+        return StatusValue(text, ok)
+
+
+# Open-Meteo WMO weather codes, coarsely
+WEATHER_CODES = (
+    (0, "Clear"), (3, "Cloudy"), (48, "Fog"), (57, "Drizzle"), (67, "Rain"),
+    (77, "Snowy"), (82, "Showers"), (86, "Snow showers"), (99, "Thunderstorm"),
+)
+
+
+class WeatherProvider(StatusProvider):
+    URL = "https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true"
+
+    def __init__(self, city, lat, lon, timeout=5.0, interval=900.0, **options):
+        super().__init__("weather", interval=interval, placeholder=f"{city}: --", **options)
+        self.city = city
+        self.url = self.URL.format(lat=lat, lon=lon)
+        self.timeout = timeout
+
+    def fetch(self):
+        # urllib pulls in http.client and ssl; only worker threads pay for that
+        from urllib.request import urlopen
+
+        with urlopen(self.url, timeout=self.timeout) as response:
+            current = json.load(response)["current_weather"]
+        code = int(current.get("weathercode", 0))
+        sky = next((text for limit, text in WEATHER_CODES if code <= limit), "Unknown")
+        return StatusValue(f"{self.city}: {round(current['temperature'])}°C, {sky}")
+
+
+class NetworkProvider(StatusProvider):
+    # Online if a TCP connection to `host`:`port` opens within `timeout`
+    def __init__(self, host="1.1.1.1", port=53, timeout=2.0, interval=30.0, **options):
+        super().__init__("network", interval=interval, placeholder="Network: checking", **options)
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def fetch(self):
+        start = time.perf_counter()
+        try:
+            socket.create_connection((self.host, self.port), timeout=self.timeout).close()
+        except OSError:
+            return StatusValue("Network Offline", ok=False)
+        return StatusValue(f"Network Online ({(time.perf_counter() - start) * 1e3:.0f} ms)")
+
+
+class SecurityProvider(StatusProvider):
+    # Armed while every lock is locked; answered from the state index.
+    # Refreshed when a lock changes, through the AppState's listeners,
+    # rather than polled.
+    def __init__(self, state, interval=None, **options):
+        super().__init__("security", interval=interval, placeholder="System: checking", **options)
+        self.state = state
+        self._board = None
+
+    def attach(self, board):
+        self._board = board
+        self.state.add_listener(self.on_change)
+
+    def detach(self):
+        self.state.remove_listener(self.on_change)
+        self._board = None
+
+    def on_change(self, dev_ids):
+        # Under the state's lock; the fetch itself runs on a worker
+        board = self._board
+        devices = self.state.devices
+        if board is not None and any(devices[dev_id].type == "lock" for dev_id in dev_ids if dev_id in devices):
+            board.refresh(self.name)
+
+    def fetch(self):
+        unlocked = self.state.select_devices({"type": "lock", "state": "UNLOCKED"})
+        if not unlocked:
+            return StatusValue("System Armed")
+        return StatusValue(f"System Disarmed ({len(unlocked)} unlocked)", ok=False)
+
+
+class StatusBoard:
+    def __init__(self, providers, workers=None):
+        self.providers = {provider.name: provider for provider in providers}
+        self.reads = 0
+        self.stale_reads = 0
+        self.empty_reads = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers or max(1, len(self.providers)),
+                                            thread_name_prefix="status")
+        self._in_flight = set()
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def start(self, scheduler):
+        # One refresh per provider right away, then every `interval`
+        now = scheduler.clock()
+        for name, provider in self.providers.items():
+            provider.attach(self)
+            if provider.interval is None:
+                self.refresh(name)
+                continue
+            scheduler.call_every(provider.interval, lambda name=name: self.refresh(name),
+                                 job_id=f"status:{name}", start=now)
+
+    def stop(self, scheduler=None):
+        for name, provider in self.providers.items():
+            provider.detach()
+            if scheduler is not None and provider.interval is not None:
+                scheduler.cancel(f"status:{name}")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def read(self, name):
+        # Last value, never waiting on I/O; a stale or missing one is
+        # refreshed in the background
+        provider = self.providers[name]
+        self.reads += 1
+        if provider.stale():
+            if provider.fetches == 0:
+                self.empty_reads += 1
+            else:
+                self.stale_reads += 1
+            self.refresh(name)
+        return provider.value
+
+    def refresh(self, name):
+        # Queues a fetch unless one is already running; returns the Future or None
+        with self._lock:
+            if name in self._in_flight:
+                return None
+            self._in_flight.add(name)
+        try:
+            return self._executor.submit(self._fetch, self.providers[name])
+        except RuntimeError:
+            # Shut down
+            with self._lock:
+                self._in_flight.discard(name)
+            return None
+
+    def _fetch(self, provider):
+        start = time.perf_counter()
+        try:
+            value = provider.fetch()
+        except Exception as e:
+            provider.failures += 1
+            provider.last_error = repr(e)
+            value = None
+        finally:
+            provider.last_latency = time.perf_counter() - start
+            with self._lock:
+                self._in_flight.discard(provider.name)
+        if value is None:
+            # Past its ttl the old value is no longer vouched for
+            previous = provider.value
+            if provider.fetches and not previous.stale and provider.stale():
+                provider.value = previous.expired()
+                self._publish(provider.name, provider.value)
+            return None
+        previous, provider.value = provider.value, value
+        provider.fetches += 1
+        if not value.same(previous):
+            self._publish(provider.name, value)
+        return value
+
+    def subscribe(self, session_id, callback):
+        # `callback(name, value)` runs on a worker thread for every changed value
+        with self._lock:
+            self._sessions[session_id] = callback
+
+    def unsubscribe(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _publish(self, name, value):
+        with self._lock:
+            sessions = list(self._sessions.items())
+        for session_id, callback in sessions:
+            try:
+                callback(name, value)
+            except Exception:
+                # A session that can't take updates (e.g. disconnected) is dropped
+                self.unsubscribe(session_id)
+
+    def stats(self):
+        return {
+            "reads": self.reads,
+            "stale_reads": self.stale_reads,
+            "empty_reads": self.empty_reads,
+            "providers": {
+                name: {"age": provider.age(), "fetches": provider.fetches, "failures": provider.failures,
+                       "last_latency": provider.last_latency, "last_error": provider.last_error}
+                for name, provider in self.providers.items()
+            },
+        }
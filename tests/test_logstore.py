@@ -0,0 +1,133 @@
+import pytest
+
+from logstore import LogStore
+
+
+def _entry(i):
+    return {
+        "time": f"08:{i // 60:02d}:{i % 60:02d}",
+        "device": f"dev{i % 3}",
+        "action": f"Set to {'ON' if i % 2 else 'OFF'}",
+        "user": "User",
+        "n": i,
+    }
+
+
+def _store(count, **options):
+    return LogStore([_entry(i) for i in range(count)], **options)
+
+
+def _walk(store, limit, **filters):
+    # Every page from the first to the last, following the cursors
+    pages = []
+    cursor = None
+    while True:
+        entries, cursor = store.page(after=cursor, limit=limit, **filters)
+        pages.append(entries)
+        if cursor is None:
+            return pages
+
+
+def _numbers(entries):
+    return [entry["n"] for entry in entries]
+
+
+# --- Cursors ---
+
+@pytest.mark.parametrize("descending", [True, False])
+@pytest.mark.parametrize("device", [None, "dev1"])
+def test_pages_cover_every_entry_once(descending, device):
+    store = _store(95)
+    pages = _walk(store, 10, device=device, descending=descending)
+    found = [n for entries in pages for n in _numbers(entries)]
+    expected, _ = store.query(device=device, descending=descending, limit=1000)
+    assert found == _numbers(expected)
+    assert all(len(entries) == 10 for entries in pages[:-1])
+
+
+def test_last_page_has_no_cursor():
+    store = _store(20)
+    entries, cursor = store.page(limit=20)
+    assert len(entries) == 20
+    assert cursor is None
+    assert store.page(limit=5)[1] is not None
+
+
+@pytest.mark.parametrize("device", [None, "dev2"])
+def test_cursor_survives_new_entries(device):
+    store = _store(60)
+    first, cursor = store.page(device=device, limit=10)
+    # Entries arriving between two pages shift offsets but not the cursor
+    for i in range(60, 75):
+        store.append(_entry(i))
+    second, _ = store.page(device=device, after=cursor, limit=10)
+    older = [n for n in reversed(range(60)) if device is None or f"dev{n % 3}" == device]
+    assert _numbers(first) == older[:10]
+    assert _numbers(second) == older[10:20]
+
+
+def test_cursor_with_filters():
+    store = _store(120)
+    pages = _walk(store, 7, action="on", since="08:00:30", until="08:01:30")
+    found = [n for entries in pages for n in _numbers(entries)]
+    assert found == [n for n in reversed(range(30, 91)) if n % 2]
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_sorted_pages_keep_equal_values_in_order(descending):
+    # Many entries share an action; the sequence number breaks the ties
+    store = _store(50)
+    pages = _walk(store, 8, sort_by="action", descending=descending)
+    found = [n for entries in pages for n in _numbers(entries)]
+    expected = sorted(range(50), key=lambda n: (_entry(n)["action"], n), reverse=descending)
+    assert found == expected
+
+
+# --- upto ---
+
+@pytest.mark.parametrize("sort_by", ["time", "action"])
+def test_upto_returns_the_range_between_cursors(sort_by):
+    store = _store(80)
+    first, first_cursor = store.page(sort_by=sort_by, limit=10)
+    second, second_cursor = store.page(sort_by=sort_by, after=first_cursor, limit=10)
+    third, _ = store.page(sort_by=sort_by, after=second_cursor, limit=10)
+
+    entries, cursor = store.page(sort_by=sort_by, upto=second_cursor)
+    assert _numbers(entries) == _numbers(first + second)
+    assert cursor == second_cursor
+
+    entries, _ = store.page(sort_by=sort_by, after=first_cursor, upto=second_cursor)
+    assert _numbers(entries) == _numbers(second)
+
+    # The page below the reloaded range still follows on without a gap
+    assert store.page(sort_by=sort_by, after=cursor, limit=10)[0] == third
+
+
+def test_upto_ignores_entries_that_arrived_later():
+    store = _store(40)
+    first, cursor = store.page(limit=10)
+    for i in range(40, 50):
+        store.append(_entry(i))
+    entries, _ = store.page(upto=cursor)
+    assert _numbers(entries) == list(range(49, 29, -1))
+    entries, _ = store.page(upto=cursor, since="08:00:45")
+    assert _numbers(entries) == list(range(49, 44, -1))
+
+
+def test_upto_ascending():
+    store = _store(30)
+    first, cursor = store.page(descending=False, limit=12)
+    entries, _ = store.page(descending=False, upto=cursor, device="dev0")
+    assert _numbers(entries) == [0, 3, 6, 9]
+    assert _numbers(first) == list(range(12))
+
+
+def test_cursor_after_eviction():
+    store = _store(30, max_entries=30)
+    first, cursor = store.page(limit=10)
+    # Evicts the ten oldest entries, none of which the next page needs yet
+    for i in range(30, 40):
+        store.append(_entry(i))
+    second, _ = store.page(after=cursor, limit=10)
+    assert _numbers(first) == list(range(29, 19, -1))
+    assert _numbers(second) == list(range(19, 9, -1))
@@ -0,0 +1,153 @@
+import os
+
+import pytest
+
+from core import AppState
+from wal import (OP_BULK, OP_LOG, OP_STATE, DataDirLock, DataDirLocked, WriteAheadLog,
+                 decode_value, encode_record, encode_value, iter_records)
+
+# --- Records ---
+
+def test_record_round_trip():
+    records = [
+        (OP_STATE, ["light1", encode_value("ON")]),
+        (OP_LOG, ["08:00:00", "door1", "Set to UNLOCKED", "User", "1700000000.5"]),
+        (OP_BULK, [encode_value(21.5), "t1", "t2", "t3"]),
+        (OP_LOG, ["08:00:01", "light1", "Pflanzenlicht überprüft", "User"]),
+    ]
+    buf = b"".join(encode_record(op, fields) for op, fields in records)
+    assert list(iter_records(buf)) == records
+
+
+@pytest.mark.parametrize("text", ["a\x1fb", "\x1b", "\x1b0", "\x1b1", "\x1f\x1b\x1f", "end\x1b"])
+def test_separator_and_escape_bytes_in_fields(text):
+    fields = ["08:00:00", "light1", text, "User"]
+    assert list(iter_records(encode_record(OP_LOG, fields))) == [(OP_LOG, fields)]
+
+
+@pytest.mark.parametrize("value", ["ON", "", 0, 3, -1, 22.5, 0.1, True, False, "i12"])
+def test_value_round_trip(value):
+    decoded = decode_value(encode_value(value))
+    assert decoded == value
+    assert type(decoded) is type(value)
+
+
+def test_torn_tail_is_not_yielded():
+    first = encode_record(OP_STATE, ["light1", "sON"])
+    second = encode_record(OP_STATE, ["light1", "sOFF"])
+    for cut in range(1, len(second)):
+        assert list(iter_records(first + second[:cut])) == [(OP_STATE, ["light1", "sON"])]
+
+
+def test_corrupt_record_ends_replay():
+    first = encode_record(OP_STATE, ["light1", "sON"])
+    second = bytearray(encode_record(OP_STATE, ["light1", "sOFF"]))
+    second[-1] ^= 0xFF
+    third = encode_record(OP_STATE, ["fan1", "i2"])
+    assert list(iter_records(first + bytes(second) + third)) == [(OP_STATE, ["light1", "sON"])]
+
+
+# --- Segments ---
+
+def _segment_files(data_dir):
+    return sorted(name for name in os.listdir(data_dir) if name.startswith("wal-"))
+
+
+def test_start_truncates_torn_tail(tmp_path):
+    wal = WriteAheadLog(str(tmp_path), fsync=False)
+    wal.start()
+    for state in ("sON", "sOFF", "sON"):
+        wal.append(OP_STATE, ["light1", state])
+    wal.close()
+
+    path = tmp_path / _segment_files(tmp_path)[-1]
+    intact = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(encode_record(OP_STATE, ["light1", "sOFF"])[:7])
+
+    wal = WriteAheadLog(str(tmp_path), fsync=False)
+    wal.start()
+    assert path.stat().st_size == intact
+    wal.append(OP_STATE, ["fan1", "i3"])
+    wal.close()
+
+    records = list(WriteAheadLog(str(tmp_path)).replay())
+    assert [fields for _, fields in records] == [
+        ["light1", "sON"], ["light1", "sOFF"], ["light1", "sON"], ["fan1", "i3"],
+    ]
+
+
+def test_snapshot_rotates_segments(tmp_path):
+    state = AppState()
+    state.open_wal(str(tmp_path), snapshot_every=5, fsync=False)
+    for _ in range(13):
+        state.toggle_device("light1")
+    state.set_device_value("thermostat1", 19.5)
+    expected_logs = list(state.logs)
+    state.close()
+
+    assert (tmp_path / "snapshot.bin").exists()
+    # Segments before the latest snapshot are deleted
+    assert len(_segment_files(tmp_path)) == 1
+
+    restored = AppState()
+    restored.open_wal(str(tmp_path), fsync=False)
+    try:
+        assert restored.devices["light1"].state == "ON"
+        assert restored.devices["thermostat1"].state == 19.5
+        assert list(restored.logs) == expected_logs
+        assert restored.replay_errors == 0
+    finally:
+        restored.close()
+
+
+# --- AppState ---
+
+def test_app_state_round_trip(tmp_path):
+    state = AppState()
+    state.open_wal(str(tmp_path), fsync=False)
+    state.toggle_device("door1")
+    state.set_device_value("fan1", 2)
+    state.set_devices({"type": "light"}, "ON")
+    state.log_action("light1", "Note\x1fwith\x1bcontrol bytes", user="Tester")
+    expected_logs = list(state.logs)
+    state.close()
+
+    restored = AppState()
+    restored.open_wal(str(tmp_path), fsync=False)
+    try:
+        assert restored.devices["door1"].state == "UNLOCKED"
+        assert restored.devices["fan1"].state == 2
+        assert restored.devices["light1"].state == "ON"
+        assert restored.logs[0]["action"] == "Note\x1fwith\x1bcontrol bytes"
+        assert list(restored.logs)[:len(expected_logs)] == expected_logs
+    finally:
+        restored.close()
+
+
+def test_bad_record_is_skipped(tmp_path):
+    wal = WriteAheadLog(str(tmp_path), fsync=False)
+    wal.start()
+    wal.append(OP_STATE, ["fan1", "inot-a-number"])
+    wal.append(OP_STATE, ["light1", "sON"])
+    wal.close()
+
+    state = AppState()
+    state.open_wal(str(tmp_path), fsync=False)
+    try:
+        assert state.replay_errors == 1
+        assert state.devices["light1"].state == "ON"
+    finally:
+        state.close()
+
+
+def test_data_dir_has_one_owner(tmp_path):
+    state = AppState()
+    state.open_wal(str(tmp_path), fsync=False)
+    try:
+        with pytest.raises(DataDirLocked) as info:
+            DataDirLock(str(tmp_path)).acquire()
+        assert info.value.owner["pid"] == os.getpid()
+    finally:
+        state.close()
+    DataDirLock(str(tmp_path)).acquire().release()
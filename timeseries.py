@@ -0,0 +1,337 @@
+import threading
+import time
+
+import numpy as np
+
+# --- Power Time Series ---
+
+# Append-only, columnar power samples per device plus an aggregate series.
+# Each series keeps its raw samples in growable NumPy arrays and maintains
+# rollups (sum/min/max/count per bucket) at 1 minute, 1 hour and 1 day as
+# samples arrive, so any time range can be served from a level whose point
+# count is close to what the chart can actually draw.
+#
+# Raw samples are only kept for `retention` seconds behind the newest one;
+# older history is served by the rollups. Expired samples are dropped when
+# the raw columns fill up, so trimming costs amortized O(1) per sample.
+
+ROLLUPS = (60, 3600, 86400)
+
+RAW_RETENTION = 86400
+
+# Over-fetch factor: pick the finest level with at most this many times the
+# requested points, then downsample the rest of the way.
+OVERSAMPLE = 64
+
+
+class _Columns:
+    # Growable set of equally long NumPy columns
+    def __init__(self, dtypes, capacity=256):
+        self.size = 0
+        self.columns = {name: np.empty(capacity, dtype) for name, dtype in dtypes.items()}
+
+    def reserve(self, extra):
+        needed = self.size + extra
+        capacity = self.capacity
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.empty(capacity, column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    @property
+    def capacity(self):
+        return len(next(iter(self.columns.values())))
+
+    def drop(self, n):
+        # Removes the first n rows
+        for column in self.columns.values():
+            column[:self.size - n] = column[n:self.size]
+        self.size -= n
+
+    def __getitem__(self, name):
+        return self.columns[name][:self.size]
+
+
+class Rollup:
+    def __init__(self, step, capacity=256):
+        self.step = step
+        self.data = _Columns({"bucket": np.int64, "sum": np.float64, "min": np.float32, "max": np.float32, "count": np.int64}, capacity)
+
+    def add(self, ts, values):
+        # ts must be sorted and not older than the last bucket
+        buckets = (ts // self.step).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        keys = buckets[starts]
+        sums = np.add.reduceat(values, starts, dtype=np.float64)
+        mins = np.minimum.reduceat(values, starts)
+        maxs = np.maximum.reduceat(values, starts)
+        counts = np.diff(np.r_[starts, len(values)])
+
+        data = self.data
+        if data.size and keys[0] == data["bucket"][-1]:
+            # First bucket continues the last stored one
+            last = data.size - 1
+            data.columns["sum"][last] += sums[0]
+            data.columns["min"][last] = min(data.columns["min"][last], mins[0])
+            data.columns["max"][last] = max(data.columns["max"][last], maxs[0])
+            data.columns["count"][last] += counts[0]
+            keys, sums, mins, maxs, counts = keys[1:], sums[1:], mins[1:], maxs[1:], counts[1:]
+        n = len(keys)
+        if not n:
+            return
+        data.reserve(n)
+        end = data.size + n
+        data.columns["bucket"][data.size:end] = keys
+        data.columns["sum"][data.size:end] = sums
+        data.columns["min"][data.size:end] = mins
+        data.columns["max"][data.size:end] = maxs
+        data.columns["count"][data.size:end] = counts
+        data.size = end
+
+    def add_one(self, ts, value):
+        bucket = int(ts // self.step)
+        data = self.data
+        last = data.size - 1
+        if last >= 0 and data.columns["bucket"][last] == bucket:
+            data.columns["sum"][last] += value
+            if value < data.columns["min"][last]:
+                data.columns["min"][last] = value
+            if value > data.columns["max"][last]:
+                data.columns["max"][last] = value
+            data.columns["count"][last] += 1
+            return
+        data.reserve(1)
+        i = data.size
+        data.columns["bucket"][i] = bucket
+        data.columns["sum"][i] = value
+        data.columns["min"][i] = value
+        data.columns["max"][i] = value
+        data.columns["count"][i] = 1
+        data.size += 1
+
+    def bounds(self, start, end):
+        buckets = self.data["bucket"]
+        lo = np.searchsorted(buckets, start // self.step, "left")
+        hi = np.searchsorted(buckets, end // self.step, "right")
+        return lo, hi
+
+    def points(self, lo, hi):
+        # Bucket midpoints and means
+        ts = self.data["bucket"][lo:hi] * self.step + self.step / 2
+        mean = self.data["sum"][lo:hi] / self.data["count"][lo:hi]
+        return ts.astype(np.float64), mean
+
+
+class Series:
+    def __init__(self, capacity=256, retention=RAW_RETENTION):
+        self.raw = _Columns({"ts": np.float64, "value": np.float32}, capacity)
+        self.rollups = [Rollup(step, capacity) for step in ROLLUPS]
+        # None keeps every raw sample
+        self.retention = retention
+        # Raw samples before this time have been dropped
+        self.raw_since = -np.inf
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.raw.size
+
+    def _make_room(self, extra, newest):
+        # Drops expired raw samples once the columns are full, then grows
+        raw = self.raw
+        if self.retention is not None and raw.size + extra > raw.capacity:
+            cutoff = newest - self.retention
+            expired = int(np.searchsorted(raw["ts"], cutoff, "left"))
+            if expired:
+                raw.drop(expired)
+                self.raw_since = max(self.raw_since, cutoff)
+        raw.reserve(extra)
+
+    def append(self, ts, value):
+        # Scalar fast path; see extend() for bulk loads
+        with self._lock:
+            raw = self.raw
+            if raw.size and ts < raw.columns["ts"][raw.size - 1]:
+                raise ValueError("time series samples must be appended in time order")
+            self._make_room(1, ts)
+            raw.columns["ts"][raw.size] = ts
+            raw.columns["value"][raw.size] = value
+            raw.size += 1
+            for rollup in self.rollups:
+                rollup.add_one(ts, value)
+
+    def extend(self, ts, values):
+        ts = np.asarray(ts, np.float64)
+        values = np.asarray(values, np.float32)
+        if not len(ts):
+            return
+        with self._lock:
+            raw = self.raw
+            if raw.size and ts[0] < raw["ts"][-1]:
+                raise ValueError("time series samples must be appended in time order")
+            for rollup in self.rollups:
+                rollup.add(ts, values)
+            keep_ts, keep_values = ts, values
+            if self.retention is not None:
+                cutoff = ts[-1] - self.retention
+                first = int(np.searchsorted(ts, cutoff, "left"))
+                if first:
+                    # The batch alone outlasts the window: only its tail stays raw
+                    raw.drop(raw.size)
+                    self.raw_since = max(self.raw_since, cutoff)
+                    keep_ts, keep_values = ts[first:], values[first:]
+            n = len(keep_ts)
+            self._make_room(n, ts[-1])
+            raw.columns["ts"][raw.size:raw.size + n] = keep_ts
+            raw.columns["value"][raw.size:raw.size + n] = keep_values
+            raw.size += n
+
+    def query(self, start, end, max_points=300, method="lttb"):
+        # (ts, values) for [start, end] with at most max_points points. Only
+        # the chosen level is materialized; the others are just bisected.
+        # Raw samples serve the range only if they still cover its start.
+        budget = max_points * OVERSAMPLE
+        with self._lock:
+            raw_ts = self.raw["ts"]
+            lo = np.searchsorted(raw_ts, start, "left")
+            hi = np.searchsorted(raw_ts, end, "right")
+            if start >= self.raw_since and hi - lo <= budget:
+                ts = raw_ts[lo:hi].copy()
+                values = self.raw["value"][lo:hi].astype(np.float64)
+            else:
+                for rollup in self.rollups:
+                    lo, hi = rollup.bounds(start, end)
+                    if hi - lo <= budget or rollup is self.rollups[-1]:
+                        ts, values = rollup.points(lo, hi)
+                        break
+        if len(ts) <= max_points:
+            return ts, values
+        if method == "minmax":
+            return minmax_downsample(ts, values, max_points)
+        return lttb(ts, values, max_points)
+
+
+def minmax_downsample(ts, values, max_points):
+    # Keeps the min and max of each of at most max_points // 2 equal-count
+    # buckets, so spikes survive; fully vectorized. Samples that don't fill
+    # a whole bucket form a shorter final one.
+    n = len(ts)
+    width = -(-n // max(1, max_points // 2))
+    full = n // width
+    shaped = values[:full * width].reshape(full, width)
+    offsets = np.arange(full) * width
+    parts = [shaped.argmin(axis=1) + offsets, shaped.argmax(axis=1) + offsets]
+    if full * width < n:
+        tail = values[full * width:]
+        parts.append([full * width + int(tail.argmin()), full * width + int(tail.argmax())])
+    idx = np.sort(np.concatenate(parts))
+    return ts[idx], values[idx]
+
+
+def lttb(ts, values, max_points):
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and,
+    # from each bucket in between, the point forming the largest triangle
+    # with the previously kept point and the next bucket's average.
+    n = len(ts)
+    if max_points >= n or max_points < 3:
+        return ts, values
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_t = ts[next_lo:next_hi].mean()
+        avg_v = values[next_lo:next_hi].mean()
+        area = np.abs(
+            (ts[a] - avg_t) * (values[lo:hi] - values[a])
+            - (ts[a] - ts[lo:hi]) * (avg_v - values[a])
+        )
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return ts[keep], values[keep]
+
+
+# --- Power Metering ---
+
+# Device draw in watts, shared with the fleet simulator
+LIGHT_W = 60.0
+LIGHT_STANDBY_W = 0.5
+LOCK_W = 3.0
+FAN_W_PER_STEP = 25.0
+THERMOSTAT_STANDBY_W = 5.0
+
+
+# Static draw per device until a simulator drives it
+def device_power(dev):
+    if dev.type == "light":
+        return LIGHT_W if dev.state == "ON" else LIGHT_STANDBY_W
+    if dev.type == "lock":
+        return LOCK_W
+    if dev.type == "fan":
+        return FAN_W_PER_STEP * float(dev.state)
+    if dev.type == "thermostat":
+        return THERMOSTAT_STANDBY_W
+    return 0.0
+
+
+class PowerMeter:
+    # AppState listener that records each changed device's draw and keeps
+    # the fleet total up to date in the "total" series. Per-device series
+    # are created on a device's first change and start small, so idle
+    # devices in a large fleet cost one dict entry.
+    def __init__(self, state, clock=time.time):
+        self.state = state
+        self.clock = clock
+        self.series = {}
+        self.total = Series()
+        self._draw = {}
+        self._total_draw = 0.0
+        self._last = 0.0
+        # Set once an external source (the simulator) reports the total
+        self.external_total = False
+        self._lock = threading.Lock()
+        self.resync()
+
+    def resync(self):
+        # Re-reads every device, e.g. after state was restored from disk
+        with self._lock:
+            self._draw = {dev_id: device_power(dev) for dev_id, dev in self.state.devices.items()}
+            self._total_draw = sum(self._draw.values())
+            self._last = max(self.clock(), self._last)
+            self.total.append(self._last, self._total_draw)
+
+    def _record(self, dev_id, watts, now):
+        series = self.series.get(dev_id)
+        if series is None:
+            series = self.series[dev_id] = Series(capacity=8)
+        series.append(now, watts)
+        self._total_draw += watts - self._draw.get(dev_id, 0.0)
+        self._draw[dev_id] = watts
+
+    def on_change(self, dev_ids):
+        with self._lock:
+            # Never step backwards if the wall clock does
+            now = self._last = max(self.clock(), self._last)
+            for dev_id in dev_ids:
+                dev = self.state.devices.get(dev_id)
+                if dev is not None:
+                    self._record(dev_id, device_power(dev), now)
+            if not self.external_total:
+                self.total.append(now, self._total_draw)
+
+    def record_total(self, now, watts):
+        # Fleet total from a source that models draw better than device_power
+        with self._lock:
+            now = self._last = max(now, self._last)
+            self.external_total = True
+            self._total_draw = watts
+            self.total.append(now, watts)
+
+    def total_draw(self):
+        return self._total_draw
@@ -0,0 +1,385 @@
+import collections
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- Write-Ahead Log ---
+
+# Every state mutation is appended to a binary log segment as a small record:
+#
+#   u32 body length | u32 crc32(body) | u8 op | body
+#
+# where body is the record's fields joined by \x1f. Inside a field \x1b is
+# written as \x1b0 and \x1f as \x1b1, so user text (actions, names, values)
+# can't split a record in the wrong place. Records are encoded on
+# the caller's thread but written by a background thread that drains
+# everything queued since its last write and fsyncs once per batch (group
+# commit), so the UI thread only ever appends to an in-memory deque.
+#
+# Every `snapshot_every` records the full state is written to snapshot.bin
+# and a new segment is started; older segments are deleted. Recovery loads
+# the snapshot (memory-mapped) and replays only the segments after it.
+# Reopening the log appends to the last segment, cut back to its last
+# intact record, so short-lived CLI runs don't leave a segment each.
+#
+# A write that fails (disk full, I/O error) doesn't stop the writer: the
+# batch is retried with backoff on a fresh segment, so whatever torn bytes
+# the failure left behind are never appended to (records of the batch that
+# did reach the disk are then replayed twice, which state records tolerate).
+# Failures are counted in `write_errors`, the latest one kept in `last_error`.
+
+OP_STATE = 1  # dev_id, encoded value
+OP_LOG = 2  # time, dev_id, action, user, epoch seconds (older records have no epoch)
+OP_BULK = 3  # encoded value, dev_id, dev_id, ...
+
+_HEADER = struct.Struct("<IIB")
+_SEP = "\x1f"
+_ESC = "\x1b"
+_UNESCAPE = re.compile("\x1b([01])")
+_UNESCAPED = {"0": _ESC, "1": _SEP}
+_SNAPSHOT_MAGIC = b"SHSNAP1\n"
+_SNAPSHOT_FILE = "snapshot.bin"
+_SEGMENT_FMT = "wal-{:08d}.log"
+_OWNER_FILE = "owner.lock"
+_STOP = object()
+
+
+def encode_value(value):
+    # Device states are strings, ints (fan speed) or floats (set point)
+    if isinstance(value, bool):
+        return "b1" if value else "b0"
+    if isinstance(value, int):
+        return "i" + str(value)
+    if isinstance(value, float):
+        return "f" + repr(value)
+    return "s" + str(value)
+
+
+def decode_value(text):
+    tag, raw = text[0], text[1:]
+    if tag == "i":
+        return int(raw)
+    if tag == "f":
+        return float(raw)
+    if tag == "b":
+        return raw == "1"
+    return raw
+
+
+def _escape(field):
+    if _ESC in field or _SEP in field:
+        return field.replace(_ESC, _ESC + "0").replace(_SEP, _ESC + "1")
+    return field
+
+
+def _unescape(field):
+    return _UNESCAPE.sub(lambda m: _UNESCAPED[m.group(1)], field)
+
+
+def encode_record(op, fields):
+    text = _SEP.join(fields)
+    if _ESC in text or text.count(_SEP) != len(fields) - 1:
+        text = _SEP.join([_escape(field) for field in fields])
+    body = text.encode("utf-8")
+    return _HEADER.pack(len(body), zlib.crc32(body), op) + body
+
+
+def iter_records(buf):
+    # Yields (op, fields) until the end of the buffer or the first torn or
+    # corrupt record, which can only be the tail of an interrupted write.
+    offset = 0
+    end = len(buf)
+    header_size = _HEADER.size
+    while offset + header_size <= end:
+        length, crc, op = _HEADER.unpack_from(buf, offset)
+        start = offset + header_size
+        body = buf[start:start + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            return
+        text = body.decode("utf-8")
+        fields = text.split(_SEP)
+        if _ESC in text:
+            fields = [_unescape(field) for field in fields]
+        yield op, fields
+        offset = start + length
+
+
+def _valid_length(buf):
+    # Bytes up to the end of the last intact record
+    offset = 0
+    end = len(buf)
+    header_size = _HEADER.size
+    while offset + header_size <= end:
+        length, crc, _ = _HEADER.unpack_from(buf, offset)
+        start = offset + header_size
+        if start + length > end or zlib.crc32(buf[start:start + length]) != crc:
+            break
+        offset = start + length
+    return offset
+
+
+def _segment_number(name):
+    if name.startswith("wal-") and name.endswith(".log"):
+        try:
+            return int(name[4:-4])
+        except ValueError:
+            return None
+    return None
+
+
+class WriteAheadLog:
+    def __init__(self, data_dir, snapshot_every=50_000, fsync=True):
+        self.data_dir = data_dir
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.records_since_snapshot = 0
+        self.write_errors = 0
+        self.last_error = None
+        self._pending = collections.deque()
+        self._wakeup = threading.Event()
+        # Keeps a snapshot's copy of the state and its place in the queue
+        # together; see snapshot()
+        self._lock = threading.Lock()
+        self._segment = 0
+        self._file = None
+        self._thread = None
+        self._stopping = False
+        os.makedirs(data_dir, exist_ok=True)
+
+    # --- Recovery ---
+
+    def _segments(self):
+        numbers = []
+        for name in os.listdir(self.data_dir):
+            number = _segment_number(name)
+            if number is not None:
+                numbers.append(number)
+        return sorted(numbers)
+
+    def _segment_path(self, number):
+        return os.path.join(self.data_dir, _SEGMENT_FMT.format(number))
+
+    def load_snapshot(self):
+        path = os.path.join(self.data_dir, _SNAPSHOT_FILE)
+        if not os.path.exists(path) or os.path.getsize(path) <= len(_SNAPSHOT_MAGIC):
+            return None
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(_SNAPSHOT_MAGIC)] != _SNAPSHOT_MAGIC:
+                return None
+            return json.loads(mm[len(_SNAPSHOT_MAGIC):])
+
+    def replay(self, first_segment=0):
+        # Yields (op, fields) for every record in the segments that follow
+        # the snapshot, oldest first.
+        for number in self._segments():
+            if number < first_segment:
+                continue
+            path = self._segment_path(number)
+            if os.path.getsize(path) == 0:
+                continue
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from iter_records(mm)
+
+    # --- Writing ---
+
+    def start(self):
+        # Appends to the last segment after dropping any torn tail it has
+        segments = self._segments()
+        self._segment = segments[-1] if segments else 1
+        path = self._segment_path(self._segment)
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "r+b") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    valid = _valid_length(mm)
+                f.truncate(valid)
+        self._file = open(path, "ab")
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="wal-writer", daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        self._pending.append(item)
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def append(self, op, fields):
+        record = encode_record(op, fields)
+        with self._lock:
+            self._put(record)
+            self.records_since_snapshot += 1
+
+    def snapshot_due(self):
+        return self.snapshot_every and self.records_since_snapshot >= self.snapshot_every
+
+    def snapshot(self, take):
+        # `take()` returns a JSON-serialisable copy of the state. It is called
+        # with appends held off, so every record queued before the snapshot
+        # is in the copy and every record after it lands in the new segment.
+        # Callers must also hold off the mutations those records describe
+        # (AppState journals under its own lock).
+        with self._lock:
+            self.records_since_snapshot = 0
+            self._put(("snapshot", take()))
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._put(_STOP)
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+
+    def _run(self):
+        running = True
+        while running:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            pending = []
+            while self._pending:
+                item = self._pending.popleft()
+                if isinstance(item, bytes):
+                    pending.append(item)
+                    continue
+                self._write(self._commit, pending)
+                pending = []
+                if item is _STOP:
+                    running = False
+                    break
+                self._write(self._write_snapshot, item[1])
+            self._write(self._commit, pending)
+
+    def _write(self, write, arg):
+        delay = 0.05
+        while True:
+            try:
+                write(arg)
+                return True
+            except (OSError, ValueError) as e:
+                # ValueError: the file is closed after a failed reopen
+                self.write_errors += 1
+                self.last_error = repr(e)
+                if self._stopping:
+                    # Closing; don't hold shutdown hostage to a broken disk
+                    return False
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+                try:
+                    self._open_segment(self._segment + 1)
+                except OSError:
+                    pass
+            except Exception as e:
+                # e.g. a state that won't serialise; retrying can't help
+                self.write_errors += 1
+                self.last_error = repr(e)
+                return False
+
+    def _open_segment(self, number):
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._segment = number
+        self._file = open(self._segment_path(number), "ab")
+
+    def _commit(self, records):
+        if not records:
+            return
+        self._file.write(b"".join(records))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _write_snapshot(self, state):
+        # Switch segments first: the snapshot covers everything written so far
+        self._open_segment(self._segment + 1)
+
+        state = dict(state, segment=self._segment)
+        path = os.path.join(self.data_dir, _SNAPSHOT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_SNAPSHOT_MAGIC)
+            f.write(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        for number in self._segments():
+            if number < self._segment:
+                os.remove(self._segment_path(number))
+
+
+# --- Data Directory Lock ---
+
+# One process at a time owns a data directory: it replays and appends to
+# the journal (cutting back the last segment's torn tail on open) and runs
+# the saved schedules. The owner holds an exclusive lock on owner.lock for
+# as long as it runs and keeps in it who it is: its pid and, if it serves
+# the HTTP API, the URL, so other processes can say who has the directory
+# or send their commands there.
+
+class DataDirLocked(RuntimeError):
+    def __init__(self, data_dir, owner):
+        self.data_dir = data_dir
+        self.owner = owner
+        super().__init__(f"{data_dir} is in use by process {owner.get('pid', '?')}")
+
+
+class DataDirLock:
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, _OWNER_FILE)
+        self._file = None
+
+    def acquire(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        f = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), "r+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            owner = self.owner(f)
+            f.close()
+            raise DataDirLocked(self.data_dir, owner) from None
+        self._file = f
+        self.advertise()
+        return self
+
+    def advertise(self, **info):
+        # Replaces what the lock file says about the owner
+        f = self._file
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps({"pid": os.getpid(), **info}))
+        f.flush()
+
+    def owner(self, f=None):
+        # What the current owner wrote; {} if unreadable
+        try:
+            if f is None:
+                with open(self.path) as f:
+                    return json.loads(f.read() or "{}")
+            f.seek(0)
+            return json.loads(f.read() or "{}")
+        except (OSError, ValueError):
+            return {}
+
+    def release(self):
+        if self._file is not None:
+            # Closing the file drops the lock
+            self._file.close()
+            self._file = None